@@ -0,0 +1,109 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+'''
+Sample conversion benchmark: compiled kernels against the NumPy expressions they replaced.
+
+    python benchmarks/conversion_kernels.py [--repeat 500] [--samples 131072]
+
+Every conversion runs on one USB transfer worth of data (131072 IQ samples by default) and is reported in
+microseconds per transfer and in million samples per second. The NumPy rows are the exact expressions the tools used
+before (including their temporaries), the kernel rows write into preallocated arrays. The results are checked against
+each other before timing; the int8 output of complex64_to_int8 differs from the old expression by design (it rounds
+and clips instead of truncating and wrapping), so it is compared against np.clip(np.rint(...)) and may differ by one
+step for values within float32 precision of a rounding boundary.
+'''
+
+import argparse
+import time
+
+import numpy as np
+
+from python_hackrf.pyhackrf_tools import kernels
+
+
+def measure(function: object, repeat: int) -> float:
+    function()  # type: ignore
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()  # type: ignore
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='python_hackrf sample conversion benchmark')
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--samples', type=int, default=131_072, help='IQ samples per transfer')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    num_samples = args.samples
+    buffer = rng.integers(-128, 128, num_samples * 2, dtype=np.int8)
+    iq = ((rng.standard_normal(num_samples) + 1j * rng.standard_normal(num_samples)) * .3).astype(np.complex64)
+    divider = 1 / 128
+
+    iq_out = np.empty(num_samples, dtype=np.complex64)
+    int8_out = np.empty(num_samples * 2, dtype=np.int8)
+    int16_out = np.empty(num_samples * 2, dtype=np.int16)
+
+    def transfer_rx() -> np.ndarray:
+        return (buffer[::2] / 128 + 1j * buffer[1::2] / 128).astype(np.complex64)
+
+    def scan_rx() -> None:
+        iq_out[:] = (buffer[::2] * divider + 1j * buffer[1::2] * divider).astype(np.complex64)
+
+    def transfer_tx() -> None:
+        scaled_data = (iq.view(np.float32) * 128).astype(np.int8)
+        int8_out[0::2] = scaled_data[0::2]
+        int8_out[1::2] = scaled_data[1::2]
+
+    kernels.int8_to_complex64(buffer, iq_out)
+    assert np.array_equal(iq_out, transfer_rx())
+    kernels.complex64_to_int8(iq, int8_out)
+    assert np.all(np.abs(int8_out - np.clip(np.rint(iq.view(np.float32) * 128), -128, 127)) <= 1)
+    kernels.int8_to_int16(buffer, int16_out)
+    assert np.array_equal(int16_out, buffer)
+    assert kernels.int8_sum_of_squares(buffer) == np.sum(buffer.astype(np.int32) ** 2)
+
+    cases = (
+        ('int8 -> complex64', 'transfer rx (numpy)', transfer_rx),
+        ('', 'scan rx (numpy)', scan_rx),
+        ('', 'int8_to_complex64', lambda: kernels.int8_to_complex64(buffer, iq_out)),
+        ('complex64 -> int8', 'transfer tx (numpy)', transfer_tx),
+        ('', 'clip and round (numpy)', lambda: np.clip(np.rint(iq.view(np.float32) * 128), -128, 127).astype(np.int8)),
+        ('', 'complex64_to_int8', lambda: kernels.complex64_to_int8(iq, int8_out)),
+        ('', 'complex64_to_int8 dither', lambda: kernels.complex64_to_int8(iq, int8_out, True)),
+        ('int8 -> int16', 'astype (numpy)', lambda: buffer.astype(np.int16)),
+        ('', 'int8_to_int16', lambda: kernels.int8_to_int16(buffer, int16_out)),
+        ('power', 'transfer (numpy)', lambda: np.sum(buffer.astype(np.int32) ** 2)),
+        ('', 'int8_sum_of_squares', lambda: kernels.int8_sum_of_squares(buffer)),
+    )
+
+    print(f'{num_samples} IQ samples per transfer, {args.repeat} repeats')
+    for group, name, function in cases:
+        elapsed = measure(function, args.repeat)
+        print(f'{group:>18} {name:<32} {elapsed:>9.1f} us {num_samples / elapsed:>8.1f} MS/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+FFT backend benchmark for pyhackrf_sweep.
+
+    python benchmarks/fft_backends.py [--repeat 200] [--threads 1] [--segments 1] [--sample_rate 20]
+
+For every installed backend and a range of bin widths the script times the FFT of one transfer
+(16 blocks x segments, the batch pyhackrf_sweep transforms per callback) both as one batched call and as one
+call per block, and reports microseconds per transfer. Plan building and wisdom loading are excluded.
+'''
+
+import argparse
+import time
+
+import numpy as np
+
+from python_hackrf.pyhackrf_tools import fft_backend
+
+BLOCKS_PER_TRANSFER = 16
+BIN_WIDTHS = (5_000_000, 1_000_000, 250_000, 100_000, 25_000, 5_000)
+
+
+def sweep_fft_size(sample_rate: int, bin_width: int) -> int:
+    '''Same rounding as pyhackrf_sweep.'''
+    fft_size = int(sample_rate / bin_width)
+    while ((fft_size + 4) % 8):
+        fft_size += 1
+    return fft_size
+
+
+def measure(function: object, repeat: int) -> float:
+    function()  # type: ignore
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()  # type: ignore
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='python_hackrf FFT backend benchmark')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--segments', type=int, default=1)
+    parser.add_argument('--sample_rate', type=int, default=20, help='sample rate in MHz')
+    args = parser.parse_args()
+
+    backends = fft_backend.available_backends()
+    print(f'backends: {", ".join(backends)}, threads: {args.threads}, segments: {args.segments}')
+    print(f'{"bin width":>10} {"fft size":>8} ' + ' '.join(f'{name + " batch":>14} {name + " loop":>14}' for name in backends))
+
+    rng = np.random.default_rng(0)
+    for bin_width in BIN_WIDTHS:
+        fft_size = sweep_fft_size(args.sample_rate * 1_000_000, bin_width)
+        if not 4 <= fft_size <= 8184:
+            continue
+
+        data = (rng.standard_normal((BLOCKS_PER_TRANSFER * args.segments, fft_size)) + 1j * rng.standard_normal((BLOCKS_PER_TRANSFER * args.segments, fft_size))).astype(np.complex128)
+        row = f'{bin_width:>10} {fft_size:>8} '
+        for name in backends:
+            backend = fft_backend.FFTBackend(name, args.threads)
+            batch = measure(lambda: backend.fft(data), args.repeat)
+            loop = measure(lambda: [backend.fft(data[i:i + args.segments]) for i in range(0, len(data), args.segments)], args.repeat)
+            row += f'{batch:>11.1f} us {loop:>11.1f} us '
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+Multi-stream stress test for free-threaded CPython (3.13t / 3.14t), no HackRF required.
+
+    python benchmarks/free_threading.py [--streams 1,2,4,8] [--transfers 200] [--bin_width 100000] [--segments 1]
+
+Every stream is a separate PyHackrfDevice with its own device_data and device slot, fed with synthetic sweep
+transfers (16 blocks with 0x7f 0x7f frequency headers) from its own thread through pyhackrf_sweep.sweep_callback,
+exactly as the libusb thread of a real device would. Spectra go to a bounded OutputChannel in batch mode.
+The script reports aggregate throughput and speed-up per stream count, and checks that no counter update was lost:
+a reader thread takes and resets accepted_bytes under the device lock while the callbacks run, as the pyhackrf_sweep
+main loop does, and the bytes it collects must match the transfers fed to each stream. Before that, device slots
+are claimed with init_signals() from many threads at once and must all be distinct.
+On a GIL build the speed-up stays close to 1x except for the time NumPy spends with the GIL released.
+'''
+
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+
+import numpy as np
+
+from python_hackrf import pyhackrf
+from python_hackrf.pyhackrf_tools import channel, fft_backend, pyhackrf_sweep
+
+BLOCKS_PER_TRANSFER = 16
+TUNE_STEPS = 10
+START_FREQUENCY = 2_400_000_000
+
+
+def make_transfers(sample_rate: int, count: int, seed: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    transfers = []
+    step = 0
+    for _ in range(count):
+        buffer = rng.integers(-128, 128, BLOCKS_PER_TRANSFER * pyhackrf.PY_BYTES_PER_BLOCK, dtype=np.int8)
+        for block in range(BLOCKS_PER_TRANSFER):
+            index = block * pyhackrf.PY_BYTES_PER_BLOCK
+            buffer[index:index + 2] = 127
+            frequency = np.array([START_FREQUENCY + (step % TUNE_STEPS) * sample_rate], dtype=np.uint64)
+            buffer[index + 2:index + 10] = frequency.view(np.int8)
+            step += 1
+        transfers.append(buffer)
+    return transfers
+
+
+def make_device(device_id: int, sample_rate: int, bin_width: int, num_segments: int) -> pyhackrf.PyHackrfDevice:
+    '''device_data as pyhackrf_sweep builds it for a LINEAR sweep without file output.'''
+    fft_size = int(sample_rate / bin_width)
+    while ((fft_size + 4) % 8):
+        fft_size += 1
+    segment_step = max(1, fft_size // 2)
+
+    device = pyhackrf.PyHackrfDevice()
+    device.device_data = {
+        'device_id': device_id,
+        'fft_backend': fft_backend.get_backend(),
+        'sweep_style': pyhackrf.py_sweep_style.LINEAR,
+        'sample_rate': sample_rate,
+        'sweep_started': False,
+        'accepted_bytes': 0,
+        'sweep_count': 0,
+        'num_sweeps': None,
+        'start_frequency': START_FREQUENCY,
+        'sweep_step': 0,
+        'last_start_step': 0,
+        'fft_size': fft_size,
+        'data_length': (fft_size + (num_segments - 1) * segment_step) * 2,
+        'segment_step': segment_step,
+        'window': np.hanning(fft_size),
+        'psd_norm': 1 / (sample_rate * np.dot(np.hanning(fft_size), np.hanning(fft_size))),
+        'close_ready': threading.Event(),
+        'lock': threading.Lock(),
+        'binary_output': False,
+        'one_shot': False,
+        'file': None,
+        'queue': channel.OutputChannel(capacity=64, policy='drop_oldest'),
+        'batch_output': True,
+        'record_dtype': pyhackrf_sweep.sweep_record_dtype(fft_size),
+        'detector': None,
+        'occupancy': None,
+        'sink': None,
+        'planner': None,
+        'calibration': None,
+        'operacake_ports': None,
+    }
+    return device
+
+
+def claim_slots(num_threads: int) -> bool:
+    '''Claims device slots from num_threads threads at once, every thread must get its own slot.'''
+    barrier = threading.Barrier(num_threads)
+    slots: list[int] = []
+    slots_lock = threading.Lock()
+
+    def claim() -> None:
+        barrier.wait()
+        slot = pyhackrf_sweep.init_signals()
+        with slots_lock:
+            slots.append(slot)
+
+    threads = [threading.Thread(target=claim) for _ in range(num_threads)]
+    # signal handlers can only be installed from the main thread, init_signals reports that on stderr
+    with contextlib.redirect_stderr(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    pyhackrf_sweep.stop_all()
+
+    claimed = [slot for slot in slots if slot >= 0]
+    return len(claimed) == len(set(claimed)) == min(num_threads, 16)
+
+
+def run(num_streams: int, transfers: list[np.ndarray], num_transfers: int, args: argparse.Namespace) -> tuple[float, bool]:
+    devices = []
+    for _ in range(num_streams):
+        device_id = pyhackrf_sweep.init_signals()
+        if device_id < 0:
+            raise RuntimeError('no free device slots')
+        devices.append(make_device(device_id, args.sample_rate * 1_000_000, args.bin_width, args.segments))
+
+    barrier = threading.Barrier(num_streams + 1)
+    valid_length = len(transfers[0])
+
+    def stream(device: pyhackrf.PyHackrfDevice) -> None:
+        barrier.wait()
+        for i in range(num_transfers):
+            pyhackrf_sweep.sweep_callback(device, transfers[i % len(transfers)], valid_length, valid_length)
+
+    collected = [0] * num_streams
+    streaming = threading.Event()
+    streaming.set()
+
+    def read_and_reset() -> None:
+        # the pyhackrf_sweep main loop: take the byte counter and reset it while the callbacks keep adding to it
+        while True:
+            running = streaming.is_set()
+            for i, device in enumerate(devices):
+                with device.device_data['lock']:
+                    collected[i] += device.device_data['accepted_bytes']
+                    device.device_data['accepted_bytes'] = 0
+            if not running:
+                break
+
+    threads = [threading.Thread(target=stream, args=(device,)) for device in devices]
+    reader = threading.Thread(target=read_and_reset)
+    for thread in threads:
+        thread.start()
+    reader.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    streaming.clear()
+    reader.join()
+
+    expected_sweeps = (num_transfers * BLOCKS_PER_TRANSFER - 1) // TUNE_STEPS
+    consistent = all(
+        collected[i] == num_transfers * valid_length and device.device_data['sweep_count'] == expected_sweeps
+        for i, device in enumerate(devices)
+    )
+    pyhackrf_sweep.stop_all()
+    return elapsed, consistent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='python_hackrf free-threading stress test')
+    parser.add_argument('--streams', default='1,2,4,8')
+    parser.add_argument('--transfers', type=int, default=200)
+    parser.add_argument('--bin_width', type=int, default=100_000)
+    parser.add_argument('--segments', type=int, default=1)
+    parser.add_argument('--sample_rate', type=int, default=20, help='sample rate in MHz')
+    args = parser.parse_args()
+
+    gil_enabled = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+    print(f'Python {sys.version.split()[0]}, GIL {"enabled" if gil_enabled else "disabled"}, FFT backend {fft_backend.get_backend().name}')
+
+    # whole number of sweeps, so cycling through the transfers keeps the tune sequence intact
+    transfers = make_transfers(args.sample_rate * 1_000_000, int(np.lcm(BLOCKS_PER_TRANSFER, TUNE_STEPS)) // BLOCKS_PER_TRANSFER, 0)
+    run(1, transfers, 10, args)  # warm up plans and imports
+
+    slots_ok = claim_slots(32)
+    print(f'device slots claimed from 32 threads: {"ok" if slots_ok else "DUPLICATE SLOTS"}')
+    failed = not slots_ok
+
+    base_rate = 0.0
+    for num_streams in (int(value) for value in args.streams.split(',')):
+        elapsed, consistent = run(num_streams, transfers, args.transfers, args)
+        rate = num_streams * args.transfers / elapsed
+        base_rate = base_rate or rate / num_streams
+        mb_per_second = rate * len(transfers[0]) / 1e6
+        print(f'{num_streams} stream(s): {rate:8.1f} transfers/s, {mb_per_second:7.1f} MB/s, speed-up {rate / base_rate:.2f}x, counters {"ok" if consistent else "LOST UPDATES"}')
+        failed |= not consistent
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
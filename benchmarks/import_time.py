@@ -0,0 +1,103 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+Import-time benchmark (python -X importtime).
+
+    python benchmarks/import_time.py [--repeat 5] [--top 10] [--max_ms 150]
+
+Every target is imported in a fresh interpreter `repeat` times and the best cumulative time is reported together
+with the heaviest modules. With --max_ms the script exits with status 1 when `import python_hackrf` or the CLI
+entry point exceeds the budget, so it can run in CI to catch startup regressions.
+'''
+
+import argparse
+import subprocess
+import sys
+import time
+
+TARGETS = (
+    'python_hackrf',
+    'python_hackrf.__main__',
+    'python_hackrf.pyhackrf_tools',
+    'python_hackrf.pyhackrf_tools.pyhackrf_info',
+    'python_hackrf.pyhackrf_tools.pyhackrf_sweep',
+)
+BUDGET_TARGETS = ('python_hackrf', 'python_hackrf.__main__')
+
+
+def import_time(module: str) -> tuple[float, list[tuple[float, str]]]:
+    '''Returns the cumulative import time of module in ms and (cumulative ms, name) of every imported module.'''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f'import {module} failed:\n{result.stderr.strip().splitlines()[-1]}')
+
+    modules = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative) / 1000, name.rstrip()))
+        if name.strip() == module:
+            total = int(cumulative) / 1000
+
+    return total, modules
+
+
+def cli_time() -> float:
+    '''Wall time of `python -m python_hackrf -h` in ms (interpreter startup included).'''
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'python_hackrf', '-h'], capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='python_hackrf import-time benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max_ms', type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for target in TARGETS:
+        try:
+            runs = [import_time(target) for _ in range(args.repeat)]
+        except RuntimeError as ex:
+            print(f'{target}: {ex}')
+            continue
+
+        total, modules = min(runs, key=lambda run: run[0])
+        print(f'{target}: {total:.1f} ms')
+        for cumulative, name in sorted(modules, reverse=True)[:args.top]:
+            print(f'    {cumulative:8.1f} ms {name.strip()}')
+
+        if args.max_ms is not None and target in BUDGET_TARGETS and total > args.max_ms:
+            print(f'    exceeds budget of {args.max_ms:.1f} ms')
+            failed = True
+
+    print(f'python -m python_hackrf -h: {min(cli_time() for _ in range(args.repeat)):.1f} ms wall')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
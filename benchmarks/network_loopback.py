@@ -0,0 +1,153 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+'''
+Loopback test for the network sink, no HackRF required.
+
+    python benchmarks/network_loopback.py [--frames 500] [--bins 1024] [--samples 65536]
+
+Sends spectrum frames over TCP and UDP and IQ frames over TCP from NetworkSink to a NetworkReceiver on 127.0.0.1,
+checks that every frame arrives in order with identical headers and payloads, then drops the TCP connection on the
+receiver side and checks that the sink reconnects exactly once and delivers again. Reports frames/s and MB/s per
+case and exits with 1 on any mismatch.
+'''
+
+import argparse
+import sys
+import time
+from typing import Any
+
+import numpy as np
+
+from python_hackrf.pyhackrf_tools import network
+
+
+def receive(receiver: network.NetworkReceiver, count: int, timeout: float = 5.0) -> list[dict[str, Any]]:
+    frames: list[dict[str, Any]] = []
+    deadline = time.time() + timeout
+    while len(frames) < count and time.time() < deadline:
+        frames.extend(receiver.receive(timeout=.1))
+    return frames
+
+
+def check(name: str, frames: list[dict[str, Any]], sent: list[tuple[float, int, int, np.ndarray[Any, Any]]], elapsed: float) -> bool:
+    ok = len(frames) == len(sent)
+    for index, (frame, (timestamp, start_frequency, stop_frequency, data)) in enumerate(zip(frames, sent)):
+        ok &= (
+            frame['sequence'] == frames[0]['sequence'] + index and
+            frame['timestamp_ns'] == int(timestamp * 1e9) and
+            frame['start_frequency'] == start_frequency and
+            frame['stop_frequency'] == stop_frequency and
+            np.array_equal(frame['data'], data)
+        )
+    size = sum(item[3].nbytes for item in sent)
+    print(f'{name:<16} {len(frames):>6}/{len(sent)} frames {len(sent) / elapsed:>10.1f} frames/s {size / elapsed / 1e6:>8.1f} MB/s {"ok" if ok else "MISMATCH"}')
+    return ok
+
+
+def run_spectra(protocol: str, num_frames: int, num_bins: int) -> bool:
+    receiver = network.NetworkReceiver('127.0.0.1', 0, protocol=protocol)
+    sink = network.NetworkSink('127.0.0.1', receiver.address[1], protocol=protocol)
+    rng = np.random.default_rng(0)
+    sent = [(1_700_000_000 + i * 1e-3, 2_400_000_000 + i * 5_000_000, 2_405_000_000 + i * 5_000_000, rng.standard_normal(num_bins).astype(np.float32)) for i in range(num_frames)]
+
+    start = time.perf_counter()
+    frames: list[dict[str, Any]] = []
+    for item in sent:
+        sink.write_spectrum(*item)
+        if protocol == 'udp':
+            # datagrams are not retransmitted, keep the receiver drained
+            frames.extend(receiver.receive(timeout=0))
+    frames.extend(receive(receiver, num_frames - len(frames)))
+    elapsed = time.perf_counter() - start
+
+    ok = check(f'{protocol} spectra', frames, sent, elapsed)
+    stats = sink.stats()
+    sink.close()
+    receiver.close()
+    return ok and stats['reconnects'] == 0 and stats['dropped_frames'] == 0
+
+
+def run_iq(num_frames: int, num_samples: int) -> bool:
+    receiver = network.NetworkReceiver('127.0.0.1', 0, protocol='tcp')
+    sink = network.NetworkSink('127.0.0.1', receiver.address[1], protocol='tcp')
+    rng = np.random.default_rng(1)
+    sample_rate = 10_000_000
+    sent = []
+    for i in range(num_frames):
+        iq = (rng.standard_normal(num_samples) + 1j * rng.standard_normal(num_samples)).astype(np.complex64)
+        sent.append((1_700_000_000 + i * 1e-2, 100_000_000 - sample_rate // 2, 100_000_000 + sample_rate // 2, iq))
+
+    start = time.perf_counter()
+    for timestamp, _, _, iq in sent:
+        sink.write_iq(timestamp, 100_000_000, sample_rate, iq)
+    frames = receive(receiver, num_frames)
+    elapsed = time.perf_counter() - start
+
+    ok = check('tcp iq', frames, sent, elapsed)
+    sink.close()
+    receiver.close()
+    return ok
+
+
+def run_reconnect(num_bins: int) -> bool:
+    receiver = network.NetworkReceiver('127.0.0.1', 0, protocol='tcp')
+    sink = network.NetworkSink('127.0.0.1', receiver.address[1], protocol='tcp', reconnect_interval=.1)
+    data = np.zeros(num_bins, dtype=np.float32)
+
+    sink.write_spectrum(0.0, 0, 1, data)
+    first = receive(receiver, 1)
+
+    # drop the connection on the receiver side, the sink notices on a later send and connects again
+    receiver._connection.close()  # type: ignore
+    receiver._connection = None
+    frames: list[dict[str, Any]] = []
+    deadline = time.time() + 5.0
+    while not frames and time.time() < deadline:
+        sink.write_spectrum(1.0, 0, 1, data)
+        frames = receiver.receive(timeout=.1)
+
+    stats = sink.stats()
+    sink.close()
+    receiver.close()
+    ok = len(first) == 1 and len(frames) > 0 and stats['reconnects'] == 1
+    print(f'{"tcp reconnect":<16} reconnects {stats["reconnects"]}, {"ok" if ok else "FAILED"}')
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='python_hackrf network sink loopback test')
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--bins', type=int, default=1024)
+    parser.add_argument('--samples', type=int, default=65_536, help='IQ samples per frame')
+    args = parser.parse_args()
+
+    ok = run_spectra('tcp', args.frames, args.bins)
+    ok &= run_spectra('udp', args.frames, args.bins)
+    ok &= run_iq(max(1, args.frames // 10), args.samples)
+    ok &= run_reconnect(args.bins)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
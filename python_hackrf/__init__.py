@@ -1,11 +1,42 @@
 __version__ = '1.5.0'
 
-from python_hackrf.pylibhackrf import pyhackrf  # noqa F401
-from python_hackrf.pyhackrf_tools import (  # noqa F401
-    pyhackrf_operacake,
-    pyhackrf_transfer,
-    pyhackrf_sweep,
-    pyhackrf_scan,
-    pyhackrf_info,
-    utils,
-)
+import importlib
+
+# typing is not imported at runtime, it alone costs more than the rest of the package import
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from python_hackrf.pylibhackrf import pyhackrf  # noqa F401
+    from python_hackrf.pyhackrf_tools import (  # noqa F401
+        pyhackrf_operacake,
+        pyhackrf_transfer,
+        pyhackrf_sweep,
+        pyhackrf_scan,
+        pyhackrf_info,
+        utils,
+    )
+
+# submodules are imported on first attribute access (PEP 562) so that the CLI and scripts only load what they use
+_LAZY_MODULES = {
+    'pyhackrf': 'python_hackrf.pylibhackrf.pyhackrf',
+    'pyhackrf_operacake': 'python_hackrf.pyhackrf_tools.pyhackrf_operacake',
+    'pyhackrf_transfer': 'python_hackrf.pyhackrf_tools.pyhackrf_transfer',
+    'pyhackrf_sweep': 'python_hackrf.pyhackrf_tools.pyhackrf_sweep',
+    'pyhackrf_scan': 'python_hackrf.pyhackrf_tools.pyhackrf_scan',
+    'pyhackrf_info': 'python_hackrf.pyhackrf_tools.pyhackrf_info',
+    'utils': 'python_hackrf.pyhackrf_tools.utils',
+}
+
+__all__ = ['__version__', *_LAZY_MODULES]
+
+
+def __getattr__(name: str) -> object:
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES))
@@ -1,13 +1,7 @@
 import argparse
 import sys
 
-from .pyhackrf_tools import (
-    pyhackrf_info,
-    pyhackrf_operacake,
-    pyhackrf_sweep,
-    pyhackrf_transfer,
-)
-from .pylibhackrf import pyhackrf
+# tools are imported inside the command branches so every command only loads the extensions it needs
 
 
 def main() -> None:
@@ -38,7 +32,7 @@ def main() -> None:
     pyhackrf_operacake_parser.add_argument('-g', '--gpio_test', action='store_true', help='test GPIO functionality of an Opera Cake')
 
     pyhackrf_sweep_parser = subparsers.add_parser(
-        'sweep', help='Command-line spectrum analyzer.', usage='python_hackrf sweep [-h] [-d] [-a] [-f] [-p] [-l] [-g] [-w] [-1] [-N] [-B] [-S] [-s] [-b] [-r]',
+        'sweep', help='Command-line spectrum analyzer.', usage='python_hackrf sweep [-h] [-d] [-a] [-f] [-p] [-l] [-g] [-w] [-1] [-N] [-B] [-S] [-s] [-b] [-r] [--segments] [--overlap] [--detect] [--occupancy] [--occupancy_threshold] [--snapshot_interval] [--sink] [--archive] [--waterfall] [--arrow] [--adaptive] [--replan_interval] [--coverage] [--operacake_ports] [--operacake_address] [--fft_backend] [--fft_threads] [--calibration]',
     )
     pyhackrf_sweep_parser.add_argument('-d', action='store', help='serial number of desired HackRF', metavar='')
     pyhackrf_sweep_parser.add_argument('-a', action='store_true', help='RX RF amplifier. If specified = Enable')
@@ -54,9 +48,27 @@ def main() -> None:
     pyhackrf_sweep_parser.add_argument('-s', action='store', help='sample rate in MHz (2, 4, 6, 8, 10, 12, 14, 16, 18, 20). Default is 20', metavar='', default=20)
     pyhackrf_sweep_parser.add_argument('-b', action='store', help='baseband filter bandwidth in MHz (1.75, 2.5, 3.5, 5.0, 5.5, 6.0, 7.0, 8.0, 9.0, 10.0, 12.0, 14.0, 15.0 20.0, 24.0, 28.0). Default .75 * sample rate', metavar='')
     pyhackrf_sweep_parser.add_argument('-r', action='store', help='<filename> output file', metavar='')
+    pyhackrf_sweep_parser.add_argument('--segments', action='store', help='number of overlapping FFT segments averaged per block (Welch). Default is 1', metavar='', default=1)
+    pyhackrf_sweep_parser.add_argument('--overlap', action='store', help='overlap between averaged segments, 0 - 0.99. Default is 0.5', metavar='', default=0.5)
+    pyhackrf_sweep_parser.add_argument('--detect', action='store', help='<threshold> output only emissions exceeding the adaptive noise floor by threshold dB (first_seen, last_seen, center_frequency, bandwidth, peak_dbfs, floor_dbfs)', metavar='')
+    pyhackrf_sweep_parser.add_argument('--occupancy', action='store', help='<filename> accumulate per-bin duty cycle and power histograms into .npz snapshots. Spectra are written only with -r', metavar='')
+    pyhackrf_sweep_parser.add_argument('--occupancy_threshold', action='store', help='duty cycle threshold in dBfs. Default is -70', metavar='', default=-70)
+    pyhackrf_sweep_parser.add_argument('--snapshot_interval', action='store', help='occupancy snapshot interval in seconds. Default is 60', metavar='', default=60)
+    pyhackrf_sweep_parser.add_argument('--sink', action='store', help='<tcp://host:port | udp://host:port> stream spectra over the network. Spectra are written to the console only with -r', metavar='')
+    pyhackrf_sweep_parser.add_argument('--archive', action='store', help='<filename> write spectra to a compressed archive with bins quantized to 0.01 dB. Cannot be used with --sink, --waterfall or --arrow', metavar='')
+    pyhackrf_sweep_parser.add_argument('--waterfall', action='store', help='<directory> build a waterfall tile pyramid (uint8 .npy and .png tiles) over the -f range with -w bins. Cannot be used with --sink, --archive or --arrow', metavar='')
+    pyhackrf_sweep_parser.add_argument('--arrow', action='store', help='<filename> write spectra as columnar record batches, Parquet for .parquet / .pq, Arrow IPC stream otherwise (requires pyarrow). Cannot be used with --sink, --archive or --waterfall', metavar='')
+    pyhackrf_sweep_parser.add_argument('--adaptive', action='store', help='<threshold> revisit bands with bins above threshold dBfs more often by re-planning the sweep ranges', metavar='')
+    pyhackrf_sweep_parser.add_argument('--replan_interval', action='store', help='adaptive re-planning interval in seconds. Default is 10', metavar='', default=10)
+    pyhackrf_sweep_parser.add_argument('--coverage', action='store', help='share of the full range list swept in every adaptive plan, 0 - 1. Default is 0.25', metavar='', default=0.25)
+    pyhackrf_sweep_parser.add_argument('--operacake_ports', action='store', help='<port,port,...> sweep through Opera Cake ports in time mode, one sweep per port, and tag every record with its port (-B records keep the hackrf_sweep layout without port)', metavar='')
+    pyhackrf_sweep_parser.add_argument('--operacake_address', action='store', help='Opera Cake address for --operacake_ports. Default is 0', metavar='', default=0)
+    pyhackrf_sweep_parser.add_argument('--fft_backend', action='store', help='FFT backend ("pyfftw", "scipy", "numpy"). Default is the first one installed in this order', metavar='')
+    pyhackrf_sweep_parser.add_argument('--fft_threads', action='store', help='number of FFT threads (pyfftw and scipy). Default is 1', metavar='', default=1)
+    pyhackrf_sweep_parser.add_argument('--calibration', action='store', help='<filename> apply per-frequency gain offsets, DC bin interpolation and baseband flattening from a calibration .npz (calibration.SweepCalibration.save)', metavar='')
 
     pyhackrf_transfer_parser = subparsers.add_parser(
-        'transfer', help='Send and receive signals using HackRF. Input/output files consist of complex64 quadrature samples.', usage='python_hackrf transfer [-h] [-d] [-r] [-t] [-f] [-i] [-o] [-m] [-a] [-p] [-l] [-g] [-x] [-s] [-N] [-R] -[b] [-H]',
+        'transfer', help='Send and receive signals using HackRF. Input/output files consist of complex64 quadrature samples.', usage='python_hackrf transfer [-h] [-d] [-r] [-t] [-f] [-i] [-o] [-m] [-a] [-p] [-l] [-g] [-x] [-s] [-N] [-R] -[b] [-H] [--ddc_rate] [--ddc_offset] [--channels] [--sink] [--segment_size] [--playlist] [--events] [--trigger_level] [--pre_trigger] [--post_trigger]',
     )
     pyhackrf_transfer_parser.add_argument('-d', action='store', help='serial number of desired HackRF', metavar='')
     pyhackrf_transfer_parser.add_argument('-r', action='store', help='<filename> receive data into file (use "-" for stdout)', metavar='')
@@ -75,6 +87,16 @@ def main() -> None:
     pyhackrf_transfer_parser.add_argument('-R', action='store_true', help='repeat TX mode. Fefault is off')
     pyhackrf_transfer_parser.add_argument('-b', action='store', help='baseband filter bandwidth in MHz (1.75, 2.5, 3.5, 5.0, 5.5, 6.0, 7.0, 8.0, 9.0, 10.0, 12.0, 14.0, 15.0 20.0, 24.0, 28.0). Default .75 * sample rate', metavar='')
     pyhackrf_transfer_parser.add_argument('-H', action='store_true', help='synchronize RX/TX to external trigger input')
+    pyhackrf_transfer_parser.add_argument('--ddc_rate', action='store', help='RX output sample rate in Hz after digital down-conversion. Must divide the sample rate', metavar='')
+    pyhackrf_transfer_parser.add_argument('--ddc_offset', action='store', help='RX channel center offset from the tuned frequency in Hz for digital down-conversion. Default is 0', metavar='', default=0)
+    pyhackrf_transfer_parser.add_argument('--channels', action='store', help='split RX into N polyphase channels written to <filename>.ch<index> (requires -r)', metavar='')
+    pyhackrf_transfer_parser.add_argument('--sink', action='store', help='<tcp://host:port> stream received IQ over the network', metavar='')
+    pyhackrf_transfer_parser.add_argument('--segment_size', action='store', help='record RX into <filename>.NNNNN.sigmf-data segments of this many samples with <filename>.sigmf-meta metadata (requires -r)', metavar='')
+    pyhackrf_transfer_parser.add_argument('--playlist', action='store', help='<filename> transmit a playlist, one "<complex64 file> [repeat] [gap in samples]" entry per line, without gaps between entries. With -R the playlist loops', metavar='')
+    pyhackrf_transfer_parser.add_argument('--events', action='store', help='<prefix> keep recent RX IQ in a memory ring and write <prefix>.NNNNN.sigmf-data int8 recordings around each trigger', metavar='')
+    pyhackrf_transfer_parser.add_argument('--trigger_level', action='store', help='trigger an event when the stream power reaches this level in dBfs (with --events)', metavar='')
+    pyhackrf_transfer_parser.add_argument('--pre_trigger', action='store', help='seconds recorded before the trigger (with --events). Default is 0.5', metavar='', default=0.5)
+    pyhackrf_transfer_parser.add_argument('--post_trigger', action='store', help='seconds recorded after the trigger (with --events). Default is 0.5', metavar='', default=0.5)
 
     if len(sys.argv) == 1:
         parser.print_help()
@@ -83,12 +105,17 @@ def main() -> None:
     args, _ = parser.parse_known_args()
 
     if args.command == 'info':
+        from .pyhackrf_tools import pyhackrf_info
+
         if args.serial_numbers:
             pyhackrf_info.pyhackrf_serial_numbers_list_info()
             return
         pyhackrf_info.pyhackrf_info()
 
     elif args.command == 'operacake':
+        from .pyhackrf_tools import pyhackrf_operacake
+        from .pylibhackrf import pyhackrf
+
         if sum([args.list, args.mode is not None, args.f is not None, args.t is not None, args.gpio_test, (args.a is not None or args.b is not None)]) == 1:
             if args.list:
                 pyhackrf_operacake.pyhackrf_operacake_info(
@@ -204,6 +231,13 @@ def main() -> None:
                 return
 
     elif args.command == 'sweep':
+        if sum(value is not None for value in (args.sink, args.archive, args.waterfall, args.arrow)) > 1:
+            print('--sink, --archive, --waterfall and --arrow cannot be used together')
+            return
+
+        from .pyhackrf_tools import pyhackrf_sweep
+        from .pylibhackrf import pyhackrf
+
         str_frequencies = args.f.split(',')
         frequencies = []
         for frequency_range in str_frequencies:
@@ -213,6 +247,40 @@ def main() -> None:
             except Exception:
                 pass
 
+        sweep_sink = None
+        if args.sink is not None:
+            from .pyhackrf_tools import network
+            sweep_sink = network.NetworkSink.from_url(args.sink)
+        elif args.archive is not None:
+            from .pyhackrf_tools import archive
+            sweep_sink = archive.SweepArchiveWriter(args.archive)
+        elif args.waterfall is not None:
+            from .pyhackrf_tools import waterfall
+            sweep_sink = waterfall.WaterfallTileBuilder(args.waterfall, min(frequencies) * 1_000_000, max(frequencies) * 1_000_000, int(args.w))
+        elif args.arrow is not None:
+            from .pyhackrf_tools import arrow_sink
+            sweep_sink = arrow_sink.ArrowSink(args.arrow)
+
+        detector = None
+        if args.detect is not None:
+            from .pyhackrf_tools import detection
+            detector = detection.SignalDetector(threshold=float(args.detect))
+
+        occupancy_accumulator = None
+        if args.occupancy is not None:
+            from .pyhackrf_tools import occupancy
+            occupancy_accumulator = occupancy.OccupancyAccumulator(threshold=float(args.occupancy_threshold), snapshot_path=args.occupancy, snapshot_interval=float(args.snapshot_interval))
+
+        sweep_calibration = None
+        if args.calibration is not None:
+            from .pyhackrf_tools import calibration
+            sweep_calibration = calibration.SweepCalibration.from_file(args.calibration)
+
+        sweep_planner = None
+        if args.adaptive is not None:
+            from .pyhackrf_tools import planner
+            sweep_planner = planner.AdaptiveSweepPlanner(threshold=float(args.adaptive), coverage=float(args.coverage), replan_interval=float(args.replan_interval))
+
         pyhackrf_sweep.pyhackrf_sweep(
             frequencies=frequencies,
             sample_rate=int(float(args.s) * 1e6),
@@ -228,10 +296,58 @@ def main() -> None:
             one_shot=args.__dict__.get('1'),  # type: ignore
             num_sweeps=int(args.N) if args.N is not None else None,
             filename=args.r,
+            num_segments=int(args.segments),
+            segment_overlap=float(args.overlap),
+            detector=detector,
+            occupancy=occupancy_accumulator,
+            sink=sweep_sink,
+            planner=sweep_planner,
+            operacake_ports=args.operacake_ports.upper().split(',') if args.operacake_ports is not None else None,
+            operacake_address=int(args.operacake_address),
+            fft_backend=args.fft_backend,
+            fft_workers=int(args.fft_threads),
+            calibration=sweep_calibration,
             print_to_console=True,
         )
 
+        if sweep_sink is not None:
+            sweep_sink.close()
+
     elif args.command == 'transfer':
+        from .pyhackrf_tools import pyhackrf_transfer
+        from .pylibhackrf import pyhackrf
+
+        rx_filename = args.r
+        rx_channelizer = None
+        if args.channels is not None and args.r not in (None, '-'):
+            from .pyhackrf_tools import channelizer
+            rx_channelizer = channelizer.PolyphaseChannelizer(
+                int(args.channels),
+                int(float(args.ddc_rate)) if args.ddc_rate is not None else int(float(args.s) * 1e6),
+            )
+            rx_channelizer.open_files(args.r)
+            rx_filename = None
+
+        rx_sink = None
+        if args.sink is not None:
+            from .pyhackrf_tools import network
+            rx_sink = network.NetworkSink.from_url(args.sink)
+
+        rx_pre_trigger = None
+        if args.events is not None:
+            from .pyhackrf_tools import pretrigger
+            rx_pre_trigger = pretrigger.PreTriggerRecorder(
+                args.events,
+                pre_trigger=float(args.pre_trigger),
+                post_trigger=float(args.post_trigger),
+                threshold=float(args.trigger_level) if args.trigger_level is not None else None,
+            )
+
+        tx_playlist = None
+        if args.playlist is not None:
+            from .pyhackrf_tools import playlist
+            tx_playlist = playlist.load_playlist(args.playlist, loop=args.R)
+
         pyhackrf_transfer.pyhackrf_transfer(
             frequency=int(args.freq_hz),
             sample_rate=int(float(args.s) * 1e6),
@@ -248,11 +364,24 @@ def main() -> None:
             synchronize=args.H,
             num_samples=int(args.N) if args.N is not None else None,
             serial_number=args.d,
-            rx_filename=args.r,
+            rx_filename=rx_filename,
             tx_filename=args.t,
+            ddc_sample_rate=int(float(args.ddc_rate)) if args.ddc_rate is not None else None,
+            ddc_offset=int(float(args.ddc_offset)),
+            channelizer=rx_channelizer,
+            sink=rx_sink,
+            rx_segment_size=int(float(args.segment_size)) if args.segment_size is not None else None,
+            tx_playlist=tx_playlist,
+            pre_trigger=rx_pre_trigger,
             print_to_console=True,
         )
 
+        if rx_sink is not None:
+            rx_sink.close()
+
+        if rx_channelizer is not None:
+            rx_channelizer.close()
+
 
 if __name__ == '__main__':
     main()
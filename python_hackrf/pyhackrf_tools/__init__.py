@@ -1,6 +1,73 @@
-from . import pyhackrf_operacake  # noqa F401
-from . import pyhackrf_transfer  # noqa F401
-from . import pyhackrf_sweep  # noqa F401
-from . import pyhackrf_scan  # noqa F401
-from . import pyhackrf_info  # noqa F401
-from . import utils  # noqa F401
+import importlib
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from . import pyhackrf_operacake  # noqa F401
+    from . import pyhackrf_transfer  # noqa F401
+    from . import pyhackrf_sweep  # noqa F401
+    from . import pyhackrf_scan  # noqa F401
+    from . import pyhackrf_info  # noqa F401
+    from . import utils  # noqa F401
+    from . import detection  # noqa F401
+    from . import occupancy  # noqa F401
+    from . import ddc  # noqa F401
+    from . import channelizer  # noqa F401
+    from . import network  # noqa F401
+    from . import archive  # noqa F401
+    from . import recording  # noqa F401
+    from . import planner  # noqa F401
+    from . import scheduler  # noqa F401
+    from . import fft_backend  # noqa F401
+    from . import channel  # noqa F401
+    from . import analysis  # noqa F401
+    from . import coherent  # noqa F401
+    from . import waterfall  # noqa F401
+    from . import playlist  # noqa F401
+    from . import calibration  # noqa F401
+    from . import pretrigger  # noqa F401
+    from . import kernels  # noqa F401
+    from . import arrow_sink  # noqa F401
+
+# submodules are imported on first attribute access (PEP 562)
+_LAZY_MODULES = (
+    'pyhackrf_operacake',
+    'pyhackrf_transfer',
+    'pyhackrf_sweep',
+    'pyhackrf_scan',
+    'pyhackrf_info',
+    'utils',
+    'detection',
+    'occupancy',
+    'ddc',
+    'channelizer',
+    'network',
+    'archive',
+    'recording',
+    'planner',
+    'scheduler',
+    'fft_backend',
+    'channel',
+    'analysis',
+    'coherent',
+    'waterfall',
+    'playlist',
+    'calibration',
+    'pretrigger',
+    'kernels',
+    'arrow_sink',
+)
+
+__all__ = list(_LAZY_MODULES)
+
+
+def __getattr__(name: str) -> object:
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(f'{__name__}.{name}')
+        globals()[name] = module
+        return module
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES))
@@ -0,0 +1,186 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+from queue import Empty
+from threading import Lock, Thread
+from typing import Any, Callable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from python_hackrf.pyhackrf_tools.channel import OutputChannel
+from python_hackrf.pyhackrf_tools.fft_backend import get_backend
+
+
+class HopAnalyzer:
+    '''
+    Batched spectral analysis of pyhackrf_scan hops on a worker thread.
+    The scan thread only puts hops into a bounded OutputChannel (oldest hops are dropped when the worker falls behind),
+    so retuning is never delayed. The worker collects up to `batch_size` hops of equal length and transforms them at
+    once: Welch PSD with a Hann window of `fft_size` over up to `num_segments` segments with `overlap`, fftshifted so
+    bin 0 is the hop start frequency, in the same dBfs scale as pyhackrf_sweep. Incomplete batches are processed after
+    `flush_interval` seconds.
+    Every batch is a dict with timestamps, hop start frequencies and dbfs (hops, fft_size) plus per hop features:
+    noise_floor (median bin), peak_dbfs, peak_frequency and channel_power (integrated over the hop, dBfs).
+    Batches go to `output` (any object with put()) and/or `callback`; the latest spectrum of every scan step is kept
+    aligned to the scan frequencies and returned by spectrum().
+    '''
+    def __init__(self, fft_size: int = 1024, num_segments: int = 8, overlap: float = 0.5, batch_size: int = 16,
+                 output: object | None = None, callback: Callable[[dict[str, Any]], None] | None = None,
+                 fft_backend: str | None = None, fft_workers: int = 1, max_pending: int = 64,
+                 flush_interval: float = 1.0) -> None:
+        if fft_size < 4:
+            raise ValueError('fft_size must be at least 4')
+        if not 0 <= overlap < 1:
+            raise ValueError('overlap must be in range [0, 1)')
+
+        self.fft_size = int(fft_size)
+        self.num_segments = max(1, int(num_segments))
+        self.segment_step = max(1, int(self.fft_size * (1 - overlap)))
+        self.batch_size = max(1, int(batch_size))
+        self.output = output
+        self.callback = callback
+        self.flush_interval = float(flush_interval)
+        self.fft_backend = fft_backend
+        self.fft_workers = fft_workers
+
+        self.window = np.hanning(self.fft_size)
+        self.sample_rate = 0
+        self.frequencies: list[int] = []
+        self.num_hops = 0
+        self.num_batches = 0
+
+        self._input = OutputChannel(capacity=max_pending, policy='drop_oldest')
+        self._lock = Lock()
+        self._step_index: dict[int, int] = {}
+        self._spectrum = np.empty((0, self.fft_size), dtype=np.float32)
+        self._thread: Thread | None = None
+        self._running = False
+
+    def set_steps(self, frequencies: list[int], sample_rate: int) -> None:
+        '''Called by pyhackrf_scan with its calculated hop start frequencies (Hz).'''
+        with self._lock:
+            self.frequencies = [int(frequency) for frequency in frequencies]
+            self.sample_rate = int(sample_rate)
+            self._step_index = {frequency: index for index, frequency in enumerate(self.frequencies)}
+            self._spectrum = np.full((len(self.frequencies), self.fft_size), np.nan, dtype=np.float32)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''Processes the hops already queued and stops the worker.'''
+        if self._thread is None:
+            return
+        self._running = False
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, timestamp: float, frequency: int, sample_rate: int, iq: np.ndarray[Any, Any]) -> None:
+        '''Queues one hop (start frequency in Hz, complex IQ), never blocks.'''
+        self._input.put((timestamp, int(frequency), int(sample_rate), iq))
+
+    def _run(self) -> None:
+        pending: dict[int, list[tuple[float, int, int, np.ndarray[Any, Any]]]] = {}
+        first_pending = 0.0
+        while self._running or not self._input.empty():
+            try:
+                hop = self._input.get(timeout=.05)
+                if not pending:
+                    first_pending = time.time()
+                group = pending.setdefault(len(hop[3]), [])
+                group.append(hop)
+                if len(group) >= self.batch_size:
+                    self._process(pending.pop(len(hop[3])))
+            except Empty:
+                pass
+
+            if pending and (time.time() - first_pending >= self.flush_interval or not self._running):
+                for group in pending.values():
+                    self._process(group)
+                pending.clear()
+
+    def analyze(self, hops: list[tuple[float, int, int, np.ndarray[Any, Any]]]) -> dict[str, Any]:
+        '''Batched Welch PSD and features for hops of equal length: [(timestamp, start frequency, sample rate, iq), ...].'''
+        sample_rate = hops[0][2]
+        iq = np.stack([hop[3] for hop in hops])
+        if iq.shape[1] < self.fft_size:
+            iq = np.pad(iq, ((0, 0), (0, self.fft_size - iq.shape[1])))
+
+        segments = sliding_window_view(iq, self.fft_size, axis=1)[:, ::self.segment_step][:, :self.num_segments]
+        num_segments = segments.shape[1]
+        backend = get_backend(self.fft_backend, self.fft_workers)
+        fft_out = backend.fft(((segments - segments.mean(axis=2, keepdims=True)) * self.window).reshape(-1, self.fft_size))
+        psd = np.mean((fft_out.real**2 + fft_out.imag**2).reshape(len(hops), num_segments, self.fft_size), axis=1)
+        psd = np.fft.fftshift(psd, axes=1) / (sample_rate * np.dot(self.window, self.window))
+        dbfs = (np.log10(psd + 1e-300) * 10.0).astype(np.float32)
+
+        bin_width = sample_rate / self.fft_size
+        frequencies = np.array([hop[1] for hop in hops], dtype=np.uint64)
+        peak_bins = np.argmax(dbfs, axis=1)
+        return {
+            'timestamps': np.array([hop[0] for hop in hops], dtype=np.float64),
+            'frequencies': frequencies,
+            'sample_rate': sample_rate,
+            'bin_width': bin_width,
+            'dbfs': dbfs,
+            'noise_floor': np.median(dbfs, axis=1),
+            'peak_dbfs': dbfs[np.arange(len(hops)), peak_bins],
+            'peak_frequency': frequencies + (peak_bins * bin_width).astype(np.uint64),
+            'channel_power': (np.log10(np.sum(psd, axis=1) * bin_width + 1e-300) * 10.0).astype(np.float32),
+        }
+
+    def _process(self, hops: list[tuple[float, int, int, np.ndarray[Any, Any]]]) -> None:
+        result = self.analyze(hops)
+        with self._lock:
+            for row, frequency in enumerate(result['frequencies']):
+                index = self._step_index.get(int(frequency))
+                if index is not None:
+                    self._spectrum[index] = result['dbfs'][row]
+            self.num_hops += len(hops)
+            self.num_batches += 1
+
+        if self.output is not None:
+            self.output.put(result)
+        if self.callback is not None:
+            self.callback(result)
+
+    def spectrum(self) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        '''(bin frequencies in Hz, dbfs) over all scan steps in scan order, NaN for steps without a hop yet.'''
+        with self._lock:
+            bin_width = self.sample_rate / self.fft_size
+            offsets = np.arange(self.fft_size) * bin_width
+            frequencies = (np.array(self.frequencies, dtype=np.float64)[:, None] + offsets).ravel()
+            return frequencies, self._spectrum.ravel().copy()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {'hops': self.num_hops, 'batches': self.num_batches, 'dropped': self._input.stats()['dropped']}
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return f'Hop analysis: {stats["hops"]} hops in {stats["batches"]} batches, {stats["dropped"]} dropped\n'
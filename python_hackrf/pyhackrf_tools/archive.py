@@ -0,0 +1,346 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import lzma
+import struct
+import zlib
+from typing import Any
+
+import numpy as np
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+ARCHIVE_MAGIC = b'PHRFSWA2'
+CHUNK_MAGIC = b'PHAC'
+FILE_HEADER = struct.Struct('<8sQ')  # magic, settings length (JSON settings follow the header)
+CHUNK_HEADER = struct.Struct('<4sIIIddQQI')  # magic, payload length, records, bins, time min/max, frequency min/max, payload crc32
+FILE_FOOTER = struct.Struct('<QQ')  # index offset, index length
+RECORD_DTYPE = np.dtype([('timestamp', '<f8'), ('start_frequency', '<u8'), ('stop_frequency', '<u8')])
+CODECS = ('zstd', 'lzma', 'zlib')
+QUANTIZATIONS = ('int16', 'uint8')
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == 'lzma':
+        return lzma.compress(data, preset=1)
+    return zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read this archive')
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'lzma':
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+class SweepArchiveWriter:
+    '''
+    Compressed long-term sweep archive sink (write_spectrum interface).
+    Values are quantized to int16 centi-dB or to uint8 steps of `uint8_step` dB above `uint8_floor`, delta-encoded
+    per bin against the previous record with the same start frequency, and written in independent chunks of up to
+    `records_per_chunk` records compressed with zstd (if installed), lzma or zlib. A chunk index at the end of the file
+    lets SweepArchiveReader decode a time window without reading the whole file. Every chunk also carries its own
+    header, so an archive left without index (crash, kill) is still readable: the reader rebuilds the index by scanning
+    the chunks and stops at the first incomplete one.
+
+    Quantization error bound: |decoded - original| <= 0.005 dB for 'int16' (values clipped to +-327.67 dB),
+    uint8_step / 2 for 'uint8' (values clipped to [uint8_floor, uint8_floor + 255 * uint8_step]), plus the float32
+    rounding of the decoded value (int16: below 0.00501 dB in total).
+    File layout: 16-byte header (magic, settings length), JSON settings, chunks (48-byte chunk header with payload length,
+    records, bins, time and frequency range and payload crc32, then the compressed payload), JSON chunk index,
+    16-byte footer (index offset, index length).
+    '''
+    def __init__(self, filename: str, quantization: str = 'int16', codec: str | None = None, records_per_chunk: int = 4096,
+                 uint8_step: float = 0.5, uint8_floor: float = -140.0) -> None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f'quantization must be one of {QUANTIZATIONS}')
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'zlib'
+        if codec not in CODECS:
+            raise ValueError(f'codec must be one of {CODECS}')
+        if codec == 'zstd' and zstandard is None:
+            raise RuntimeError('zstandard is not installed')
+
+        self.quantization = quantization
+        self.codec = codec
+        self.records_per_chunk = int(records_per_chunk)
+        self.uint8_step = float(uint8_step)
+        self.uint8_floor = float(uint8_floor)
+
+        settings = json.dumps({
+            'quantization': self.quantization,
+            'codec': self.codec,
+            'uint8_step': self.uint8_step,
+            'uint8_floor': self.uint8_floor,
+        }).encode('utf-8')
+        self._file = open(filename, 'wb')
+        self._file.write(FILE_HEADER.pack(ARCHIVE_MAGIC, len(settings)))
+        self._file.write(settings)
+        self._records: list[tuple[float, int, int]] = []
+        self._bins: list[np.ndarray[Any, Any]] = []
+        self._index: list[dict[str, Any]] = []
+
+    def _quantize(self, dbfs: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        dbfs = np.asarray(dbfs, dtype=np.float64)
+        if self.quantization == 'int16':
+            return np.clip(np.rint(dbfs * 100), -32767, 32767).astype(np.int16)
+        return np.clip(np.rint((dbfs - self.uint8_floor) / self.uint8_step), 0, 255).astype(np.uint8)
+
+    def write_spectrum(self, timestamp: float, start_frequency: int, stop_frequency: int, dbfs: np.ndarray[Any, Any]) -> None:
+        if self._bins and len(dbfs) != len(self._bins[0]):
+            self.flush()
+
+        self._records.append((timestamp, start_frequency, stop_frequency))
+        self._bins.append(self._quantize(np.asarray(dbfs)))
+
+        if len(self._records) >= self.records_per_chunk:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._records:
+            return
+
+        records = np.array(self._records, dtype=RECORD_DTYPE)
+        values = np.stack(self._bins)
+
+        # delta against the previous record of the same row (start frequency); wraps around in the integer type
+        deltas = values.copy()
+        previous: dict[int, int] = {}
+        for i, start_frequency in enumerate(records['start_frequency'].tolist()):
+            if start_frequency in previous:
+                deltas[i] = values[i] - values[previous[start_frequency]]
+            previous[start_frequency] = i
+
+        payload = _compress(self.codec, records.tobytes() + deltas.tobytes())
+        chunk = {
+            'offset': self._file.tell() + CHUNK_HEADER.size,
+            'length': len(payload),
+            'records': len(records),
+            'bins': values.shape[1],
+            'time_min': float(records['timestamp'].min()),
+            'time_max': float(records['timestamp'].max()),
+            'frequency_min': int(records['start_frequency'].min()),
+            'frequency_max': int(records['stop_frequency'].max()),
+        }
+        self._index.append(chunk)
+        self._file.write(CHUNK_HEADER.pack(
+            CHUNK_MAGIC, chunk['length'], chunk['records'], chunk['bins'], chunk['time_min'], chunk['time_max'],
+            chunk['frequency_min'], chunk['frequency_max'], zlib.crc32(payload),
+        ))
+        self._file.write(payload)
+        # hand complete chunks to the OS so they survive a killed process
+        self._file.flush()
+        self._records.clear()
+        self._bins.clear()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        self.flush()
+        index = json.dumps({'chunks': self._index}).encode('utf-8')
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(FILE_FOOTER.pack(index_offset, len(index)))
+        self._file.close()
+
+    def __enter__(self) -> 'SweepArchiveWriter':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class SweepArchiveReader:
+    '''
+    Reads archives written by SweepArchiveWriter. Only chunks overlapping the requested window are decompressed.
+    Archives without a valid index (writer killed before close) are indexed by scanning the chunk headers,
+    `recovered` is True in that case.
+    '''
+    def __init__(self, filename: str) -> None:
+        self._file = open(filename, 'rb')
+        header = self._file.read(FILE_HEADER.size)
+        magic, settings_length = FILE_HEADER.unpack(header) if len(header) == FILE_HEADER.size else (b'', 0)
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f'{filename} is not a sweep archive')
+
+        settings = json.loads(self._file.read(settings_length))
+        self.quantization = settings['quantization']
+        self.codec = settings['codec']
+        self.uint8_step = settings['uint8_step']
+        self.uint8_floor = settings['uint8_floor']
+        self._data_offset = FILE_HEADER.size + settings_length
+
+        chunks = self._read_index()
+        self.recovered = chunks is None
+        self.chunks = self._scan_chunks() if chunks is None else chunks
+
+    def _read_index(self) -> list[dict[str, Any]] | None:
+        file_size = self._file.seek(0, 2)
+        if file_size < self._data_offset + FILE_FOOTER.size:
+            return None
+
+        self._file.seek(file_size - FILE_FOOTER.size)
+        index_offset, index_length = FILE_FOOTER.unpack(self._file.read(FILE_FOOTER.size))
+        if index_offset < self._data_offset or index_offset + index_length + FILE_FOOTER.size != file_size:
+            return None
+
+        self._file.seek(index_offset)
+        try:
+            return json.loads(self._file.read(index_length))['chunks']
+        except (ValueError, KeyError):
+            return None
+
+    def _scan_chunks(self) -> list[dict[str, Any]]:
+        chunks = []
+        offset = self._data_offset
+        while True:
+            self._file.seek(offset)
+            header = self._file.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                break
+            magic, length, records, bins, time_min, time_max, frequency_min, frequency_max, crc = CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC:
+                break
+            payload = self._file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+
+            chunks.append({
+                'offset': offset + CHUNK_HEADER.size,
+                'length': length,
+                'records': records,
+                'bins': bins,
+                'time_min': time_min,
+                'time_max': time_max,
+                'frequency_min': frequency_min,
+                'frequency_max': frequency_max,
+            })
+            offset += CHUNK_HEADER.size + length
+
+        return chunks
+
+    def __len__(self) -> int:
+        return sum(chunk['records'] for chunk in self.chunks)
+
+    def _read_chunk(self, chunk: dict[str, Any]) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        self._file.seek(chunk['offset'])
+        data = _decompress(self.codec, self._file.read(chunk['length']))
+        records_size = chunk['records'] * RECORD_DTYPE.itemsize
+        records = np.frombuffer(data[:records_size], dtype=RECORD_DTYPE)
+        deltas = np.frombuffer(data[records_size:], dtype=np.int16 if self.quantization == 'int16' else np.uint8).reshape(chunk['records'], chunk['bins'])
+
+        values = deltas.copy()
+        previous: dict[int, int] = {}
+        for i, start_frequency in enumerate(records['start_frequency'].tolist()):
+            if start_frequency in previous:
+                values[i] += values[previous[start_frequency]]
+            previous[start_frequency] = i
+
+        if self.quantization == 'int16':
+            dbfs = (values.astype(np.float64) / 100).astype(np.float32)
+        else:
+            dbfs = (values.astype(np.float64) * self.uint8_step + self.uint8_floor).astype(np.float32)
+        return records, dbfs
+
+    def read(self, time_start: float | None = None, time_stop: float | None = None,
+             frequency_min: int | None = None, frequency_max: int | None = None) -> list[tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]]:
+        '''
+        Returns (records, dbfs) pairs, one per bin width group, for records with time_start <= timestamp < time_stop
+        overlapping [frequency_min, frequency_max]. records is a structured array (timestamp, start_frequency, stop_frequency),
+        dbfs is float32 of shape (len(records), bins).
+        '''
+        result = []
+        for chunk in self.chunks:
+            if time_start is not None and chunk['time_max'] < time_start:
+                continue
+            if time_stop is not None and chunk['time_min'] >= time_stop:
+                continue
+            if frequency_min is not None and chunk['frequency_max'] < frequency_min:
+                continue
+            if frequency_max is not None and chunk['frequency_min'] > frequency_max:
+                continue
+
+            records, dbfs = self._read_chunk(chunk)
+            mask = np.ones(len(records), dtype=bool)
+            if time_start is not None:
+                mask &= records['timestamp'] >= time_start
+            if time_stop is not None:
+                mask &= records['timestamp'] < time_stop
+            if frequency_min is not None:
+                mask &= records['stop_frequency'] >= frequency_min
+            if frequency_max is not None:
+                mask &= records['start_frequency'] <= frequency_max
+
+            if mask.any():
+                if result and result[-1][1].shape[1] == dbfs.shape[1]:
+                    result[-1] = (np.concatenate((result[-1][0], records[mask])), np.concatenate((result[-1][1], dbfs[mask])))
+                else:
+                    result.append((records[mask], dbfs[mask]))
+
+        return result
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'SweepArchiveReader':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def convert_binary_sweep(input_filename: str, output_filename: str, start_time: float = 0.0, sweep_interval: float = 1.0, **kwargs: Any) -> int:
+    '''
+    Converts binary pyhackrf_sweep/hackrf_sweep output (-B) into an archive. Returns the number of records.
+    -B records carry no time, so timestamps are synthesized: every record of a sweep gets
+    start_time + sweep_index * sweep_interval, a new sweep begins when the start frequency does not increase.
+    '''
+    num_records = 0
+    sweep_index = 0
+    last_start_frequency = None
+    with open(input_filename, 'rb') as file, SweepArchiveWriter(output_filename, **kwargs) as writer:
+        while True:
+            header = file.read(4)
+            if len(header) < 4:
+                break
+            record_length = struct.unpack('<I', header)[0]
+            record = file.read(record_length)
+            if len(record) < record_length:
+                break
+            start_frequency, stop_frequency = struct.unpack('<QQ', record[:16])
+            if last_start_frequency is not None and start_frequency <= last_start_frequency:
+                sweep_index += 1
+            last_start_frequency = start_frequency
+            writer.write_spectrum(start_time + sweep_index * sweep_interval, start_frequency, stop_frequency, np.frombuffer(record[16:], dtype=np.float32))
+            num_records += 1
+
+    return num_records
@@ -0,0 +1,306 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import sys
+from queue import Queue
+from threading import Condition, Thread
+from typing import Any
+
+import numpy as np
+
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.ipc  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:
+    pyarrow = None
+
+FORMATS = ('ipc', 'parquet')
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+
+class ArrowSink:
+    '''
+    Columnar sweep / scan sink (write_spectrum, write_iq and put interfaces) writing Apache Arrow IPC streams or
+    Parquet files, so results can be memory-mapped and queried without parsing. Requires pyarrow.
+    Rows go into preallocated NumPy columns; once a batch holds `rows_per_batch` rows or `batch_bytes` bytes of values
+    the columns are handed to a writer thread and written as one record batch (IPC) or row group (Parquet), so the
+    device callback never serializes or compresses. Up to `max_pending` full batches wait for the writer, after that
+    the caller blocks, so at most (max_pending + 1) * batch_bytes are held (a single larger row gets a batch of its own).
+    Schema: timestamp (timestamp[ns]), start_frequency and stop_frequency (uint64, Hz) and the values as a list of
+    float32: `dbfs` for spectra as a fixed-size list, `iq` (interleaved I/Q) for write_iq hops as a variable-size list,
+    so hops of a HopScheduler may differ in length. The kind (and the spectrum size) is taken from the first row and
+    stored in the schema metadata; rows of another kind or spectrum size raise ValueError.
+    put() accepts pyhackrf_sweep batch_output arrays and HopAnalyzer batches, so the sink can be used as their queue.
+    The format is `format` or, if None, chosen by the file extension ('.parquet' / '.pq' is Parquet, anything else
+    an Arrow IPC stream). `compression` is passed to the writer (IPC: 'lz4' / 'zstd' / None, Parquet: any codec).
+    '''
+    def __init__(self, filename: str, format: str | None = None, rows_per_batch: int = 16_384, batch_bytes: int = 32 * 1024 * 1024,
+                 max_pending: int = 2, compression: str | None = None, metadata: dict[str, str] | None = None) -> None:
+        if pyarrow is None:
+            raise RuntimeError('pyarrow is not installed')
+        if format is None:
+            format = 'parquet' if os.path.splitext(filename)[1].lower() in PARQUET_EXTENSIONS else 'ipc'
+        if format not in FORMATS:
+            raise ValueError(f'format must be one of {FORMATS}')
+        if rows_per_batch < 1 or batch_bytes < 4:
+            raise ValueError('rows_per_batch must be at least 1 and batch_bytes at least 4')
+
+        self.filename = filename
+        self.format = format
+        self.rows_per_batch = int(rows_per_batch)
+        self.batch_bytes = int(batch_bytes)
+        self.max_pending = max(1, int(max_pending))
+        self.compression = compression
+        self.metadata = dict(metadata or {})
+
+        self.kind: str | None = None
+        self.width = 0
+        self.schema: Any = None
+        self.num_rows = 0
+        self.num_batches = 0
+
+        self._columns: tuple[np.ndarray[Any, Any], ...] | None = None
+        self._filled = 0
+        self._filled_values = 0
+        self._free: list[tuple[np.ndarray[Any, Any], ...]] = []
+        self._allocated = 0
+        self._condition = Condition()
+        self._pending: Queue[tuple[tuple[np.ndarray[Any, Any], ...], int, int] | None] = Queue()
+        self._writer: Any = None
+        self._error: Exception | None = None
+        self._closed = False
+
+        self._thread = Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'ArrowSink':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _configure(self, kind: str, width: int) -> None:
+        self.kind = kind
+        self.width = width if kind == 'spectrum' else 0
+        metadata = {**self.metadata, 'kind': kind, 'width': str(self.width)}
+        self.schema = pyarrow.schema([
+            ('timestamp', pyarrow.timestamp('ns')),
+            ('start_frequency', pyarrow.uint64()),
+            ('stop_frequency', pyarrow.uint64()),
+            ('dbfs', pyarrow.list_(pyarrow.float32(), width)) if kind == 'spectrum' else ('iq', pyarrow.list_(pyarrow.float32())),
+        ], metadata=metadata)
+
+    def _get_columns(self, num_values: int) -> tuple[np.ndarray[Any, Any], ...]:
+        # the current batch plus max_pending queued batches, recycled once the writer is done with them;
+        # values are one flat float32 buffer of batch_bytes, or larger for a single row that does not fit into it
+        capacity = max(self.batch_bytes // 4, num_values)
+        with self._condition:
+            while not self._free and self._allocated > self.max_pending:
+                self._condition.wait()
+            if self._free:
+                columns = self._free.pop()
+                if len(columns[3]) >= capacity:
+                    return columns
+            else:
+                self._allocated += 1
+
+        return (
+            np.empty(self.rows_per_batch, dtype=np.int64),
+            np.empty(self.rows_per_batch, dtype=np.uint64),
+            np.empty(self.rows_per_batch, dtype=np.uint64),
+            np.empty(capacity, dtype=np.float32),
+            np.zeros(self.rows_per_batch + 1, dtype=np.int32),
+        )
+
+    def _reserve(self, num_values: int) -> None:
+        '''Makes room for a row of num_values values in the current batch.'''
+        if self._columns is not None and (self._filled == self.rows_per_batch or self._filled_values + num_values > len(self._columns[3])):
+            self.flush()
+        if self._columns is None:
+            self._columns = self._get_columns(num_values)
+            self._filled = 0
+            self._filled_values = 0
+
+    def _check(self, kind: str, width: int) -> None:
+        if self._closed:
+            raise RuntimeError('sink is closed')
+        if self._error is not None:
+            raise RuntimeError(f'writing {self.filename} failed: {self._error}')
+        if self.kind is None:
+            self._configure(kind, width)
+        elif kind != self.kind or (kind == 'spectrum' and width != self.width):
+            raise ValueError(f'{self.filename} holds {self.kind} rows of {self.width} values, got {kind} rows of {width}')
+
+    def _append_row(self, kind: str, timestamp_ns: int, start_frequency: int, stop_frequency: int, values: np.ndarray[Any, Any]) -> None:
+        self._check(kind, len(values))
+        self._reserve(len(values))
+
+        timestamps, starts, stops, flat, offsets = self._columns  # type: ignore
+        timestamps[self._filled] = timestamp_ns
+        starts[self._filled] = start_frequency
+        stops[self._filled] = stop_frequency
+        flat[self._filled_values:self._filled_values + len(values)] = values
+        self._filled += 1
+        self._filled_values += len(values)
+        offsets[self._filled] = self._filled_values
+
+        if self._filled == self.rows_per_batch:
+            self.flush()
+
+    def _append(self, kind: str, timestamp_ns: Any, start_frequency: Any, stop_frequency: Any, values: np.ndarray[Any, Any]) -> None:
+        '''Appends len(values) rows of equal width, scalars are broadcast.'''
+        width = values.shape[1]
+        self._check(kind, width)
+
+        timestamp_ns = np.broadcast_to(timestamp_ns, len(values))
+        start_frequency = np.broadcast_to(start_frequency, len(values))
+        stop_frequency = np.broadcast_to(stop_frequency, len(values))
+
+        position = 0
+        while position < len(values):
+            self._reserve(width)
+
+            timestamps, starts, stops, flat, offsets = self._columns  # type: ignore
+            count = min(len(values) - position, self.rows_per_batch - self._filled, (len(flat) - self._filled_values) // max(width, 1))
+            timestamps[self._filled:self._filled + count] = timestamp_ns[position:position + count]
+            starts[self._filled:self._filled + count] = start_frequency[position:position + count]
+            stops[self._filled:self._filled + count] = stop_frequency[position:position + count]
+            flat[self._filled_values:self._filled_values + count * width] = values[position:position + count].reshape(-1)
+            offsets[self._filled + 1:self._filled + count + 1] = self._filled_values + width * np.arange(1, count + 1)
+            self._filled += count
+            self._filled_values += count * width
+            position += count
+
+            if self._filled == self.rows_per_batch:
+                self.flush()
+
+    def write_spectrum(self, timestamp: float, start_frequency: int, stop_frequency: int, dbfs: np.ndarray[Any, Any]) -> None:
+        self._append_row('spectrum', int(timestamp * 1e9), start_frequency, stop_frequency, dbfs)
+
+    def write_iq(self, timestamp: float, frequency: int, sample_rate: int, iq: np.ndarray[Any, Any]) -> None:
+        self._append_row('iq', int(timestamp * 1e9), frequency - sample_rate // 2, frequency + sample_rate // 2, np.asarray(iq, dtype=np.complex64).view(np.float32))
+
+    def put(self, batch: Any, block: bool = True, timeout: float | None = None) -> bool:
+        '''Queue interface for pyhackrf_sweep batch_output arrays and HopAnalyzer batches.'''
+        if isinstance(batch, np.ndarray) and batch.dtype.names is not None:
+            self._append('spectrum', batch['timestamp_ns'], batch['start_frequency'], batch['stop_frequency'], batch['dbfs'])
+        elif isinstance(batch, dict) and 'dbfs' in batch:
+            frequencies = np.asarray(batch['frequencies'], dtype=np.uint64)
+            self._append('spectrum', (np.asarray(batch['timestamps']) * 1e9).astype(np.int64), frequencies, frequencies + np.uint64(batch['sample_rate']), batch['dbfs'])
+        else:
+            raise ValueError('expected a sweep batch_output array or a HopAnalyzer batch')
+        return True
+
+    def put_nowait(self, batch: Any) -> bool:
+        return self.put(batch, block=False)
+
+    def flush(self) -> None:
+        '''Hands the rows collected so far to the writer thread (a shorter batch / row group).'''
+        if self._columns is None or not self._filled:
+            return
+        self._pending.put((self._columns, self._filled, self._filled_values))
+        self._columns = None
+        self._filled = 0
+        self._filled_values = 0
+
+    def _open(self) -> Any:
+        if self.format == 'parquet':
+            return pyarrow.parquet.ParquetWriter(self.filename, self.schema, compression=self.compression or 'snappy')
+        options = pyarrow.ipc.IpcWriteOptions(compression=self.compression)
+        return pyarrow.ipc.new_stream(self.filename, self.schema, options=options)
+
+    def _write(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+
+            columns, num_rows, num_values = item
+            try:
+                if self._error is None:
+                    timestamps, starts, stops, flat, offsets = columns
+                    # zero-copy views of the NumPy columns, written before the columns are reused
+                    values = pyarrow.array(flat[:num_values])
+                    if self.kind == 'spectrum':
+                        values = pyarrow.FixedSizeListArray.from_arrays(values, self.width)
+                    else:
+                        values = pyarrow.ListArray.from_arrays(pyarrow.array(offsets[:num_rows + 1]), values)
+                    batch = pyarrow.RecordBatch.from_arrays([
+                        pyarrow.array(timestamps[:num_rows], type=pyarrow.timestamp('ns')),
+                        pyarrow.array(starts[:num_rows]),
+                        pyarrow.array(stops[:num_rows]),
+                        values,
+                    ], schema=self.schema)
+                    if self._writer is None:
+                        self._writer = self._open()
+                    self._writer.write_batch(batch)
+                    self.num_rows += num_rows
+                    self.num_batches += 1
+            except Exception as e:
+                self._error = e
+                sys.stderr.write(f'Arrow sink: writing {self.filename} failed: {e}\n')
+
+            with self._condition:
+                self._free.append(columns)
+                self._condition.notify()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'format': self.format,
+            'kind': self.kind,
+            'rows': self.num_rows,
+            'batches': self.num_batches,
+            'pending': self._pending.qsize(),
+        }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return f'Arrow sink ({stats["format"]}): {stats["rows"]} rows in {stats["batches"]} batches written to {self.filename}\n'
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self.flush()
+        self._closed = True
+        self._pending.put(None)
+        self._thread.join()
+
+        if self._writer is None and self.schema is not None and self._error is None:
+            self._writer = self._open()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def read_table(filename: str, memory_map: bool = True) -> Any:
+    '''Reads a file written by ArrowSink into a pyarrow.Table, IPC streams are memory-mapped (zero-copy).'''
+    if pyarrow is None:
+        raise RuntimeError('pyarrow is not installed')
+    if os.path.splitext(filename)[1].lower() in PARQUET_EXTENSIONS:
+        return pyarrow.parquet.read_table(filename, memory_map=memory_map)
+
+    source = pyarrow.memory_map(filename) if memory_map else pyarrow.OSFile(filename)
+    return pyarrow.ipc.open_stream(source).read_all()
@@ -0,0 +1,171 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+
+class SweepCalibration:
+    '''
+    Per tune step corrections for pyhackrf_sweep spectra (calibration).
+    `gain_offsets` (dB, added) are given at absolute `gain_frequencies` (Hz) and interpolated linearly to every bin;
+    `baseband_response` (dB, subtracted) is the receiver response over `baseband_offsets` (Hz from the LO), e.g. the
+    baseband filter roll-off measured with baseband_response_from_spectra(). Both are combined into one correction
+    vector per tune frequency, precomputed by configure() for all steps of the sweep plan (steps added later by an
+    adaptive planner are computed once on first use), so apply() only adds the stored row of every block in place.
+    With `dc_bins` the bins around the LO (LINEAR sweeps only, INTERLEAVED output does not contain the DC bin) are
+    replaced by a straight line between their neighbours.
+    '''
+    def __init__(self, gain_frequencies: np.ndarray[Any, Any] | list[float] | None = None, gain_offsets: np.ndarray[Any, Any] | list[float] | None = None,
+                 dc_bins: int = 0, baseband_offsets: np.ndarray[Any, Any] | list[float] | None = None,
+                 baseband_response: np.ndarray[Any, Any] | list[float] | None = None) -> None:
+        if (gain_frequencies is None) != (gain_offsets is None):
+            raise ValueError('gain_frequencies and gain_offsets must be given together')
+        if (baseband_offsets is None) != (baseband_response is None):
+            raise ValueError('baseband_offsets and baseband_response must be given together')
+        if dc_bins < 0:
+            raise ValueError('dc_bins must not be negative')
+
+        self.gain_frequencies = np.asarray(gain_frequencies, dtype=np.float64) if gain_frequencies is not None else None
+        self.gain_offsets = np.asarray(gain_offsets, dtype=np.float64) if gain_offsets is not None else None
+        self.dc_bins = int(dc_bins)
+        self.baseband_offsets = np.asarray(baseband_offsets, dtype=np.float64) if baseband_offsets is not None else None
+        self.baseband_response = np.asarray(baseband_response, dtype=np.float64) if baseband_response is not None else None
+
+        for x, y in ((self.gain_frequencies, self.gain_offsets), (self.baseband_offsets, self.baseband_response)):
+            if x is not None and (x.shape != y.shape or x.ndim != 1 or not len(x) or np.any(np.diff(x) <= 0)):
+                raise ValueError('calibration points must be non-empty 1D arrays of equal length with increasing frequencies')
+
+        self.sample_rate = 0
+        self.fft_size = 0
+        self.interleaved = False
+        self.lo_offset = 0
+
+        self._additive = self.gain_offsets is not None or self.baseband_response is not None
+        self._offsets = np.empty(0, dtype=np.float64)
+        self._baseband = np.empty(0, dtype=np.float64)
+        self._table = np.empty((0, 0), dtype=np.float64)
+        self._rows: dict[int, int] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_file(cls, filename: str) -> 'SweepCalibration':
+        '''Loads a calibration written by save() (.npz).'''
+        with np.load(filename) as data:
+            return cls(
+                gain_frequencies=data['gain_frequencies'] if 'gain_frequencies' in data.files else None,
+                gain_offsets=data['gain_offsets'] if 'gain_offsets' in data.files else None,
+                dc_bins=int(data['dc_bins']) if 'dc_bins' in data.files else 0,
+                baseband_offsets=data['baseband_offsets'] if 'baseband_offsets' in data.files else None,
+                baseband_response=data['baseband_response'] if 'baseband_response' in data.files else None,
+            )
+
+    def save(self, filename: str) -> None:
+        arrays: dict[str, Any] = {'dc_bins': self.dc_bins}
+        if self.gain_offsets is not None:
+            arrays['gain_frequencies'] = self.gain_frequencies
+            arrays['gain_offsets'] = self.gain_offsets
+        if self.baseband_response is not None:
+            arrays['baseband_offsets'] = self.baseband_offsets
+            arrays['baseband_response'] = self.baseband_response
+        with open(filename, 'wb') as file:
+            np.savez(file, **arrays)
+
+    def configure(self, sample_rate: int, fft_size: int, interleaved: bool, lo_offset: int, frequencies: list[int] | None = None) -> None:
+        '''
+        Called by pyhackrf_sweep with the spectrum layout (fftshifted for LINEAR, natural FFT order for INTERLEAVED),
+        the LO offset from the block header frequency and the tune step frequencies (Hz) to precompute.
+        '''
+        with self._lock:
+            self.sample_rate = int(sample_rate)
+            self.fft_size = int(fft_size)
+            self.interleaved = interleaved
+            self.lo_offset = int(lo_offset)
+            if self.dc_bins and not interleaved:
+                first = self.fft_size // 2 - self.dc_bins // 2
+                if first < 1 or first + self.dc_bins >= self.fft_size:
+                    raise ValueError(f'dc_bins ({self.dc_bins}) must leave a neighbour bin on both sides of the DC bins (fft_size {self.fft_size})')
+            bin_width = self.sample_rate / self.fft_size
+            if interleaved:
+                self._offsets = np.fft.fftfreq(self.fft_size) * self.sample_rate
+            else:
+                self._offsets = (np.arange(self.fft_size) - self.fft_size // 2) * bin_width
+
+            self._baseband = np.zeros(self.fft_size, dtype=np.float64)
+            if self.baseband_response is not None:
+                self._baseband -= np.interp(self._offsets, self.baseband_offsets, self.baseband_response)
+
+            self._table = np.empty((0, self.fft_size), dtype=np.float64)
+            self._rows = {}
+            if frequencies is not None and self._additive:
+                self._add_rows([int(frequency) for frequency in frequencies])
+
+    def correction(self, frequency: int) -> np.ndarray[Any, Any]:
+        '''Correction in dB added to the spectrum of the tune step at `frequency` (Hz).'''
+        correction = self._baseband.copy()
+        if self.gain_offsets is not None:
+            correction += np.interp(frequency + self.lo_offset + self._offsets, self.gain_frequencies, self.gain_offsets)
+        return correction
+
+    def _add_rows(self, frequencies: list[int]) -> None:
+        frequencies = [frequency for frequency in dict.fromkeys(frequencies) if frequency not in self._rows]
+        if not frequencies:
+            return
+        rows = np.stack([self.correction(frequency) for frequency in frequencies])
+        for frequency in frequencies:
+            self._rows[frequency] = len(self._rows)
+        self._table = np.concatenate((self._table, rows))
+
+    def apply(self, spectra: np.ndarray[Any, Any], frequencies: list[int]) -> None:
+        '''Corrects a (blocks, fft_size) array of dBfs spectra in place, `frequencies` are the block tune frequencies.'''
+        if self.dc_bins and not self.interleaved:
+            first = self.fft_size // 2 - self.dc_bins // 2
+            last = first + self.dc_bins
+            left = spectra[:, first - 1:first]
+            right = spectra[:, last:last + 1]
+            spectra[:, first:last] = left + (right - left) * (np.arange(1, self.dc_bins + 1) / (self.dc_bins + 1))
+
+        if self._additive:
+            rows = [self._rows.get(frequency, -1) for frequency in frequencies]
+            if -1 in rows:
+                with self._lock:
+                    self._add_rows(frequencies)
+                rows = [self._rows[frequency] for frequency in frequencies]
+            table = self._table
+            for i, row in enumerate(rows):
+                np.add(spectra[i], table[row], out=spectra[i])
+
+
+def baseband_response_from_spectra(spectra: np.ndarray[Any, Any], sample_rate: int, center_fraction: float = 0.25) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+    '''
+    Estimates the baseband response from fftshifted LINEAR sweep spectra of a flat input (terminated antenna port or
+    noise source): median over all spectra, normalized to 0 dB over the central `center_fraction` of the band.
+    Returns (offsets from the LO in Hz, response in dB) for SweepCalibration.
+    '''
+    spectra = np.asarray(spectra)
+    fft_size = spectra.shape[1]
+    response = np.median(spectra, axis=0)
+    half = max(1, int(fft_size * center_fraction / 2))
+    response = response - np.median(response[fft_size // 2 - half:fft_size // 2 + half])
+    return (np.arange(fft_size) - fft_size // 2) * (sample_rate / fft_size), response
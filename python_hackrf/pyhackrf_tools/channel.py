@@ -0,0 +1,292 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+from collections import deque
+from queue import Empty
+from threading import Condition, Lock
+from typing import Any
+
+import numpy as np
+
+POLICIES = ('block', 'drop_newest', 'drop_oldest', 'downsample')
+ITEM_OVERHEAD = 64  # bytes counted for every item on top of its array payload
+
+
+def item_size(item: Any) -> int:
+    '''Approximate memory held by a queued item: NumPy payloads (also inside dicts, lists and tuples) plus a fixed overhead.'''
+    if isinstance(item, np.ndarray):
+        return item.nbytes + ITEM_OVERHEAD
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return len(item) + ITEM_OVERHEAD
+    if isinstance(item, dict):
+        return sum(item_size(value) for value in item.values()) + ITEM_OVERHEAD
+    if isinstance(item, (list, tuple)):
+        return sum(item_size(value) for value in item) + ITEM_OVERHEAD
+    return ITEM_OVERHEAD
+
+
+class OutputChannel:
+    '''
+    Bounded, queue.Queue compatible channel between a device callback and its consumer.
+    Capacity is given in items (`capacity`), in bytes (`capacity_bytes`, see item_size) or both; 0 / None is unbounded.
+    When the channel is full `policy` decides what happens to a put:
+    'block' waits for space (up to `block_timeout` seconds, then the item is dropped), 'drop_newest' discards the new
+    item, 'drop_oldest' discards queued items until the new one fits, 'downsample' keeps every 2nd item once the channel
+    is half full, every 4th at 3/4 and so on, and drops the newest when it is full.
+    Counters (puts, drops, downsampled items, peak depth and bytes) are available through stats().
+    '''
+    def __init__(self, capacity: int = 0, capacity_bytes: int | None = None, policy: str = 'drop_oldest',
+                 block_timeout: float | None = None) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f'policy must be one of {POLICIES}')
+        if capacity < 0 or (capacity_bytes is not None and capacity_bytes < 0):
+            raise ValueError('capacity must not be negative')
+
+        self.capacity = int(capacity)
+        self.capacity_bytes = int(capacity_bytes) if capacity_bytes else 0
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._items: deque[tuple[Any, int]] = deque()
+        self._bytes = 0
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+
+        self._puts = 0
+        self._dropped = 0
+        self._downsampled = 0
+        self._peak_depth = 0
+        self._peak_bytes = 0
+        self._downsample_counter = 0
+
+    def _fill(self, size: int = 0) -> float:
+        '''Fill level after adding an item of `size` bytes, 1.0 or more means it does not fit.'''
+        fill = 0.0
+        if self.capacity:
+            fill = (len(self._items) + (1 if size else 0)) / self.capacity
+        if self.capacity_bytes:
+            fill = max(fill, (self._bytes + size) / self.capacity_bytes)
+        return fill
+
+    def _fits(self, size: int) -> bool:
+        # a single item larger than capacity_bytes is accepted into an empty channel
+        return not self._items or self._fill(size) <= 1.0
+
+    def _append(self, item: Any, size: int) -> None:
+        self._items.append((item, size))
+        self._bytes += size
+        self._puts += 1
+        self._peak_depth = max(self._peak_depth, len(self._items))
+        self._peak_bytes = max(self._peak_bytes, self._bytes)
+        self._not_empty.notify()
+
+    def _popleft(self) -> Any:
+        item, size = self._items.popleft()
+        self._bytes -= size
+        self._not_full.notify()
+        return item
+
+    def put(self, item: Any, block: bool = True, timeout: float | None = None) -> bool:
+        '''Returns False when the item was dropped. `block` and `timeout` apply to the 'block' policy only.'''
+        size = item_size(item)
+        with self._lock:
+            if self.policy == 'downsample' and self._items:
+                fill = self._fill()
+                if 0.5 <= fill < 1.0:
+                    factor = 1 << int(-np.log2(1.0 - fill))
+                    self._downsample_counter += 1
+                    if self._downsample_counter % factor:
+                        self._downsampled += 1
+                        return False
+                else:
+                    self._downsample_counter = 0
+
+            if not self._fits(size):
+                if self.policy == 'block' and block:
+                    timeout = timeout if timeout is not None else self.block_timeout
+                    deadline = time.monotonic() + timeout if timeout is not None else None
+                    while not self._fits(size):
+                        remaining = deadline - time.monotonic() if deadline is not None else None
+                        if remaining is not None and remaining <= 0:
+                            break
+                        self._not_full.wait(remaining)
+
+                elif self.policy == 'drop_oldest':
+                    while not self._fits(size):
+                        self._popleft()
+                        self._dropped += 1
+
+                if not self._fits(size):
+                    self._dropped += 1
+                    return False
+
+            self._append(item, size)
+            return True
+
+    def put_nowait(self, item: Any) -> bool:
+        return self.put(item, block=False)
+
+    def get(self, block: bool = True, timeout: float | None = None) -> Any:
+        with self._lock:
+            if not block:
+                if not self._items:
+                    raise Empty
+            else:
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                while not self._items:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+
+            return self._popleft()
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        with self._lock:
+            return self._fill() >= 1.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self._not_full.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'depth': len(self._items),
+                'bytes': self._bytes,
+                'puts': self._puts,
+                'dropped': self._dropped,
+                'downsampled': self._downsampled,
+                'peak_depth': self._peak_depth,
+                'peak_bytes': self._peak_bytes,
+            }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return (f'Output channel ({stats["policy"]}): {stats["puts"]} items, {stats["dropped"]} dropped, {stats["downsampled"]} downsampled, '
+                f'peak depth {stats["peak_depth"]} ({stats["peak_bytes"] / 1e6:.1f} MB)\n')
+
+
+class BoundedQueue:
+    '''
+    Bounds a caller-supplied queue.Queue compatible object (e.g. an unbounded queue.Queue) from the producer side,
+    used by the tools when `queue_capacity` is given for a queue that is not an OutputChannel.
+    Capacity is in items, measured with qsize() of the wrapped queue; policies are those of OutputChannel, 'block'
+    polls until there is room or `block_timeout` expires. The consumer keeps reading the wrapped queue directly.
+    '''
+    def __init__(self, queue: Any, capacity: int, policy: str = 'drop_oldest', block_timeout: float | None = None) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f'policy must be one of {POLICIES}')
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+
+        self.queue = queue
+        self.capacity = int(capacity)
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._lock = Lock()
+        self._puts = 0
+        self._dropped = 0
+        self._downsampled = 0
+        self._peak_depth = 0
+        self._downsample_counter = 0
+
+    def put(self, item: Any, block: bool = True, timeout: float | None = None) -> bool:
+        '''Returns False when the item was dropped. `block` and `timeout` apply to the 'block' policy only.'''
+        with self._lock:
+            depth = self.queue.qsize()
+            if self.policy == 'downsample' and depth:
+                fill = depth / self.capacity
+                if 0.5 <= fill < 1.0:
+                    factor = 1 << int(-np.log2(1.0 - fill))
+                    self._downsample_counter += 1
+                    if self._downsample_counter % factor:
+                        self._downsampled += 1
+                        return False
+                else:
+                    self._downsample_counter = 0
+
+            if depth >= self.capacity:
+                if self.policy == 'block' and block:
+                    timeout = timeout if timeout is not None else self.block_timeout
+                    deadline = time.monotonic() + timeout if timeout is not None else None
+                    while depth >= self.capacity and (deadline is None or time.monotonic() < deadline):
+                        time.sleep(.001)
+                        depth = self.queue.qsize()
+
+                elif self.policy == 'drop_oldest':
+                    while depth >= self.capacity:
+                        try:
+                            self.queue.get_nowait()
+                        except Empty:
+                            break
+                        self._dropped += 1
+                        depth -= 1
+
+                if depth >= self.capacity:
+                    self._dropped += 1
+                    return False
+
+            self.queue.put(item)
+            self._puts += 1
+            self._peak_depth = max(self._peak_depth, depth + 1)
+            return True
+
+    def put_nowait(self, item: Any) -> bool:
+        return self.put(item, block=False)
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'depth': self.queue.qsize(),
+                'puts': self._puts,
+                'dropped': self._dropped,
+                'downsampled': self._downsampled,
+                'peak_depth': self._peak_depth,
+            }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return (f'Output queue ({stats["policy"]}, {self.capacity} items): {stats["puts"]} items, {stats["dropped"]} dropped, '
+                f'{stats["downsampled"]} downsampled, peak depth {stats["peak_depth"]}\n')
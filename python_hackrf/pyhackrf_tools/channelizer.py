@@ -0,0 +1,121 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+PROTOTYPE_KAISER_BETA = 6.0
+
+
+class PolyphaseChannelizer:
+    '''
+    Critically sampled polyphase filter bank. Splits a complex stream sampled at `sample_rate` into `num_channels`
+    channels spaced sample_rate / num_channels apart, each decimated by num_channels, with one polyphase filter
+    pass and one FFT per output sample. Channel k is centered at k * sample_rate / num_channels (FFT order).
+    Filter history and decimation phase are carried across calls.
+
+    `sinks` maps channel index to an object with append() (FileBuffer), a binary file object, or a callable
+    taking (channel, data). Only channels present in `sinks` are routed by push().
+    '''
+    def __init__(self, num_channels: int, sample_rate: int, taps_per_channel: int = 8,
+                 sinks: dict[int, Any] | None = None) -> None:
+        if num_channels < 2:
+            raise ValueError('num_channels must be at least 2')
+
+        self.num_channels = int(num_channels)
+        self.sample_rate = int(sample_rate)
+        self.channel_rate = self.sample_rate / self.num_channels
+        self.taps_per_channel = int(taps_per_channel)
+        self.sinks = dict(sinks) if sinks is not None else {}
+
+        num_taps = self.num_channels * self.taps_per_channel
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        taps = np.sinc(n / self.num_channels) * np.kaiser(num_taps, PROTOTYPE_KAISER_BETA)
+        taps = (taps / taps.sum()).astype(np.float32)
+
+        # windows hold x[n - m] in reversed order, so the taps are reversed once here
+        self._reversed_taps = taps[::-1].copy()
+        self._history = np.zeros(num_taps - 1, dtype=np.complex64)
+        self._offset = 0
+        self._owned_files: list[Any] = []
+
+    def channel_frequencies(self, center_frequency: float = 0.0) -> np.ndarray[Any, Any]:
+        return center_frequency + np.fft.fftfreq(self.num_channels, 1 / self.sample_rate)
+
+    def process(self, data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        '''Returns an array of shape (num_channels, num_outputs).'''
+        num_taps = len(self._reversed_taps)
+        if len(data) == 0:
+            return np.empty((self.num_channels, 0), dtype=np.complex64)
+
+        buffer = np.concatenate((self._history, data.astype(np.complex64, copy=False)))
+        num_windows = len(data)
+
+        if self._offset < num_windows:
+            windows = sliding_window_view(buffer, num_taps)[self._offset::self.num_channels]
+            folded = (windows * self._reversed_taps).reshape(len(windows), self.taps_per_channel, self.num_channels).sum(axis=1)
+            # fold index r is m = num_taps - 1 - position, so rotate into phase order before the transform
+            folded = folded[:, ::-1]
+            result = (np.fft.ifft(folded, axis=1) * self.num_channels).astype(np.complex64).T
+        else:
+            result = np.empty((self.num_channels, 0), dtype=np.complex64)
+
+        self._offset += result.shape[1] * self.num_channels - num_windows
+        self._history = buffer[len(buffer) - num_taps + 1:].copy()
+
+        return result
+
+    def push(self, data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        channels = self.process(data)
+        if channels.shape[1]:
+            for channel, sink in self.sinks.items():
+                write_channel(sink, channel, channels[channel])
+        return channels
+
+    def open_files(self, prefix: str, channels: list[int] | None = None) -> None:
+        for channel in (channels if channels is not None else range(self.num_channels)):
+            file = open(f'{prefix}.ch{channel}', 'wb')
+            self._owned_files.append(file)
+            self.sinks[channel] = file
+
+    def close(self) -> None:
+        for file in self._owned_files:
+            file.close()
+        self._owned_files.clear()
+
+    def reset(self) -> None:
+        self._history[:] = 0
+        self._offset = 0
+
+
+def write_channel(sink: Any, channel: int, data: np.ndarray[Any, Any]) -> None:
+    if hasattr(sink, 'append'):
+        sink.append(data)
+    elif hasattr(sink, 'write'):
+        data.tofile(sink)
+    elif isinstance(sink, Callable):
+        sink(channel, data)
+    else:
+        raise TypeError(f'unsupported sink for channel {channel}')
@@ -0,0 +1,233 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import time
+from threading import Condition
+from typing import Any, Iterator
+
+import numpy as np
+
+from python_hackrf import pyhackrf
+
+SLIP_THRESHOLD = 262_144  # samples, four USB transfers
+
+
+class CoherentCapture:
+    '''
+    Sample-aligned receive from several HackRFs armed in hardware sync mode.
+    All devices are opened and tuned with the same settings, put into hw sync mode and started; they begin streaming
+    on the shared trigger input, so sample n of every device was taken at the same instant (the boards must also share
+    a reference clock for phase coherence). Each device streams into its own preallocated complex64 ring of
+    `ring_blocks * block_size` samples and counts its samples since the trigger.
+    read() / blocks() return (sample_index, (iq_0, ..., iq_n-1)) with `block_size` samples from the same sample index
+    of every device, in the order of `serial_numbers`.
+    Every device's lag is its sample counter minus wall time since its first transfer * sample rate; a device whose lag
+    exceeds the smallest lag of all devices by more than `slip_threshold` samples has dropped samples and is reported
+    as a slip (comparing devices cancels host clock drift). Alignment after a slip is lost until the capture is
+    restarted. If the consumer is slower than the stream the oldest ring data is overwritten, the reader skips ahead
+    (still aligned) and the event is counted as an overrun.
+    '''
+    def __init__(self, serial_numbers: list[str], frequency: int, sample_rate: int = 10_000_000,
+                 baseband_filter_bandwidth: int | None = None, lna_gain: int = 16, vga_gain: int = 20,
+                 amp_enable: bool = False, block_size: int = 262_144, ring_blocks: int = 32,
+                 slip_threshold: int = SLIP_THRESHOLD, print_to_console: bool = True) -> None:
+        if len(serial_numbers) < 2:
+            raise ValueError('specify at least two serial numbers')
+        if len(set(serial_numbers)) != len(serial_numbers):
+            raise ValueError('serial numbers must be unique')
+        if ring_blocks < 2:
+            raise ValueError('ring_blocks must be at least 2')
+
+        self.serial_numbers = list(serial_numbers)
+        self.frequency = int(frequency)
+        self.sample_rate = int(sample_rate)
+        self.baseband_filter_bandwidth = baseband_filter_bandwidth if baseband_filter_bandwidth is not None else pyhackrf.pyhackrf_compute_baseband_filter_bw(int(self.sample_rate * .75))
+        self.lna_gain = lna_gain
+        self.vga_gain = vga_gain
+        self.amp_enable = amp_enable
+        self.block_size = int(block_size)
+        self.ring_size = self.block_size * int(ring_blocks)
+        self.slip_threshold = int(slip_threshold)
+        self.print_to_console = print_to_console
+
+        num_devices = len(self.serial_numbers)
+        self._rings = [np.empty(self.ring_size, dtype=np.complex64) for _ in range(num_devices)]
+        self._written = [0] * num_devices
+        self._first_transfer = [0.0] * num_devices
+        self._lag = [0] * num_devices
+        self._slips: list[dict[str, Any]] = []
+        self._reported_lag = [0] * num_devices
+        self._condition = Condition()
+        self._devices: list[Any] = []
+        self._read_index = 0
+        self._num_blocks = 0
+        self._overruns = 0
+        self._max_transfer = 0
+        self._running = False
+        self._initialized = False
+
+    def __enter__(self) -> 'CoherentCapture':
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def _callback(self, index: int) -> Any:
+        ring = self._rings[index]
+        ring_size = self.ring_size
+        divider = 1 / 128
+
+        def rx_callback(device: Any, buffer: np.ndarray[Any, Any], buffer_length: int, valid_length: int) -> int:
+            if not self._running:
+                return -1
+
+            now = time.time()
+            num_samples = valid_length // 2
+            position = self._written[index] % ring_size
+            first = min(num_samples, ring_size - position)
+            ring[position:position + first] = buffer[:first * 2:2] * divider + 1j * buffer[1:first * 2:2] * divider
+            if first < num_samples:
+                ring[:num_samples - first] = buffer[first * 2:valid_length:2] * divider + 1j * buffer[first * 2 + 1:valid_length:2] * divider
+
+            with self._condition:
+                if not self._first_transfer[index]:
+                    self._first_transfer[index] = now - num_samples / self.sample_rate
+                self._written[index] += num_samples
+                self._max_transfer = max(self._max_transfer, num_samples)
+
+                self._lag[index] = int((now - self._first_transfer[index]) * self.sample_rate) - self._written[index]
+                if all(self._first_transfer):
+                    lag = self._lag[index] - min(self._lag)
+                    if lag - self._reported_lag[index] > self.slip_threshold:
+                        self._slips.append({'serial_number': self.serial_numbers[index], 'sample_index': self._written[index], 'lost_samples': lag - self._reported_lag[index], 'timestamp': now})
+                        self._reported_lag[index] = lag
+                        if self.print_to_console:
+                            sys.stderr.write(f'Slip on {self.serial_numbers[index]}: ~{lag} samples behind the other devices at sample {self._written[index]}\n')
+
+                self._condition.notify_all()
+            return 0
+
+        return rx_callback
+
+    def start(self) -> None:
+        pyhackrf.pyhackrf_init()
+        self._initialized = True
+        try:
+            for index, serial_number in enumerate(self.serial_numbers):
+                device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+                self._devices.append(device)
+                device.pyhackrf_set_sample_rate(self.sample_rate)
+                device.pyhackrf_set_baseband_filter_bandwidth(self.baseband_filter_bandwidth)
+                device.pyhackrf_set_freq(self.frequency)
+                device.pyhackrf_set_lna_gain(self.lna_gain)
+                device.pyhackrf_set_vga_gain(self.vga_gain)
+                device.pyhackrf_set_amp_enable(self.amp_enable)
+                device.pyhackrf_set_hw_sync_mode(True)
+                device.set_rx_callback(self._callback(index))
+
+            self._running = True
+            for device in self._devices:
+                device.pyhackrf_start_rx()
+
+        except Exception:
+            self.stop()
+            raise
+
+        if self.print_to_console:
+            sys.stderr.write(f'Armed {len(self._devices)} devices in hw sync mode, waiting for trigger...\n')
+
+    def stop(self) -> None:
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+
+        for device in self._devices:
+            try:
+                device.pyhackrf_stop_rx()
+            except Exception as e:
+                sys.stderr.write(f'{e}\n')
+            try:
+                device.pyhackrf_set_hw_sync_mode(False)
+                device.pyhackrf_close()
+            except Exception as e:
+                sys.stderr.write(f'{e}\n')
+
+        self._devices = []
+        if self._initialized:
+            self._initialized = False
+            pyhackrf.pyhackrf_exit()
+
+    def read(self, timeout: float | None = None) -> tuple[int, tuple[np.ndarray[Any, Any], ...]] | None:
+        '''Next aligned block from all devices, None on timeout or after stop().'''
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                while min(self._written) < self._read_index + self.block_size:
+                    remaining = deadline - time.time() if deadline is not None else None
+                    if not self._running or (remaining is not None and remaining <= 0):
+                        return None
+                    self._condition.wait(remaining)
+
+                # the oldest sample in a ring is overwritten by the transfer after its newest one, keep one transfer of margin
+                overwritten = max(self._written) + self._max_transfer - self.ring_size
+                if overwritten <= self._read_index:
+                    break
+
+                # skip past the overwritten samples, then wait again: a lagging device may not have reached the new index
+                self._overruns += 1
+                self._read_index += -(-(overwritten - self._read_index) // self.block_size) * self.block_size
+
+            sample_index = self._read_index
+            position = sample_index % self.ring_size
+            blocks = []
+            for ring in self._rings:
+                if position + self.block_size <= self.ring_size:
+                    blocks.append(ring[position:position + self.block_size].copy())
+                else:
+                    blocks.append(np.concatenate((ring[position:], ring[:position + self.block_size - self.ring_size])))
+
+            self._read_index += self.block_size
+            self._num_blocks += 1
+            return sample_index, tuple(blocks)
+
+    def blocks(self, timeout: float | None = None) -> Iterator[tuple[int, tuple[np.ndarray[Any, Any], ...]]]:
+        while True:
+            block = self.read(timeout)
+            if block is None:
+                return
+            yield block
+
+    def slips(self) -> list[dict[str, Any]]:
+        with self._condition:
+            return list(self._slips)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {
+                'blocks': self._num_blocks,
+                'overruns': self._overruns,
+                'read_index': self._read_index,
+                'samples': dict(zip(self.serial_numbers, self._written)),
+                'slips': len(self._slips),
+            }
@@ -0,0 +1,151 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from typing import Any
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MAX_STAGE_DECIMATION = 8
+STOPBAND_ATTENUATION = 80  # dB
+
+
+def design_lowpass(cutoff: float, transition: float, attenuation: float = STOPBAND_ATTENUATION) -> np.ndarray[Any, Any]:
+    '''Kaiser windowed-sinc lowpass. cutoff and transition width are in cycles/sample, DC gain is 1.'''
+    num_taps = int(np.ceil((attenuation - 7.95) / (2.285 * 2 * np.pi * transition))) | 1
+    beta = 0.1102 * (attenuation - 8.7)
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, beta)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+def decimation_stages(decimation: int, max_stage: int = MAX_STAGE_DECIMATION) -> list[int]:
+    factors = []
+    remaining = decimation
+    factor = 2
+    while remaining > 1:
+        while remaining % factor == 0:
+            factors.append(factor)
+            remaining //= factor
+        factor += 1
+        if factor * factor > remaining and remaining > 1:
+            factors.append(remaining)
+            break
+
+    # largest decimation first, merging small factors while they fit in one stage
+    stages: list[int] = []
+    for factor in sorted(factors, reverse=True):
+        if stages and stages[-1] * factor <= max_stage:
+            stages[-1] *= factor
+        else:
+            stages.append(factor)
+
+    return stages
+
+
+class FIRDecimator:
+    '''
+    Stateful FIR decimator. Only the retained outputs are computed and the filter history and
+    decimation phase are carried between calls, so consecutive transfers form one continuous stream.
+    '''
+    def __init__(self, taps: np.ndarray[Any, Any], decimation: int) -> None:
+        self.taps = np.asarray(taps, dtype=np.float32)
+        self.decimation = int(decimation)
+        self._reversed_taps = self.taps[::-1].copy()
+        self._history = np.zeros(len(self.taps) - 1, dtype=np.complex64)
+        self._offset = 0
+
+    def process(self, data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        if len(data) == 0:
+            return np.array([], dtype=np.complex64)
+
+        buffer = np.concatenate((self._history, data.astype(np.complex64, copy=False)))
+        num_windows = len(data)
+
+        result: np.ndarray[Any, Any]
+        if self._offset < num_windows:
+            windows = sliding_window_view(buffer, len(self.taps))[self._offset::self.decimation]
+            result = (windows @ self._reversed_taps).astype(np.complex64, copy=False)
+        else:
+            result = np.array([], dtype=np.complex64)
+
+        self._offset += len(result) * self.decimation - num_windows
+        if len(self._history):
+            self._history = buffer[-len(self._history):].copy()
+
+        return result
+
+    def reset(self) -> None:
+        self._history[:] = 0
+        self._offset = 0
+
+
+class DigitalDownConverter:
+    '''
+    NCO frequency shift followed by a multi-stage FIR decimator.
+    Moves `center_offset` Hz (relative to the tuned frequency) to DC and reduces the sample rate from `sample_rate`
+    to `output_rate`, which must divide the input rate. `bandwidth` is the passband kept around the new center
+    (default 0.8 * output_rate). Phase and filter state are carried across calls.
+    '''
+    def __init__(self, sample_rate: int, output_rate: int, center_offset: float = 0.0, bandwidth: float | None = None) -> None:
+        if output_rate <= 0 or sample_rate % output_rate:
+            raise ValueError(f'output_rate must divide sample_rate ({sample_rate} Hz)')
+        if abs(center_offset) >= sample_rate / 2:
+            raise ValueError('center_offset must be within the captured bandwidth')
+        if bandwidth is not None and not 0 < bandwidth < output_rate:
+            raise ValueError('bandwidth must be less than output_rate')
+
+        self.sample_rate = int(sample_rate)
+        self.output_rate = int(output_rate)
+        self.center_offset = float(center_offset)
+        self.bandwidth = float(bandwidth) if bandwidth is not None else .8 * output_rate
+        self.decimation = self.sample_rate // self.output_rate
+
+        self._phase = 0.0
+        self._phase_step = -2 * np.pi * self.center_offset / self.sample_rate
+
+        self.stages = []
+        stage_rate = self.sample_rate
+        for stage_decimation in decimation_stages(self.decimation):
+            # keep the final passband, reject only what would alias into it
+            transition = (stage_rate / stage_decimation - self.bandwidth) / stage_rate
+            self.stages.append(FIRDecimator(design_lowpass(.5 / stage_decimation, transition), stage_decimation))
+            stage_rate //= stage_decimation
+
+    def process(self, data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        if len(data) == 0:
+            return np.array([], dtype=np.complex64)
+
+        if self.center_offset:
+            phases = self._phase + self._phase_step * np.arange(len(data))
+            data = data * np.exp(1j * phases).astype(np.complex64)
+            self._phase = float((self._phase + self._phase_step * len(data)) % (2 * np.pi))
+
+        for stage in self.stages:
+            data = stage.process(data)
+
+        return data.astype(np.complex64, copy=False)
+
+    def reset(self) -> None:
+        self._phase = 0.0
+        for stage in self.stages:
+            stage.reset()
@@ -0,0 +1,163 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import struct
+from typing import Any
+
+import numpy as np
+
+EVENT_STRUCT = struct.Struct('<ddQQff')  # first_seen, last_seen, center_frequency, bandwidth, peak_dbfs, floor_dbfs
+
+
+class SignalDetector:
+    '''
+    Streaming emission detector for sweep spectra.
+    Tracks a per-bin noise floor with a streaming quantile estimator, marks bins that exceed the floor by `threshold` dB
+    and groups adjacent marked bins into emissions. Emissions are followed across sweeps and reported once
+    as compact event records when they disappear for more than `hold_sweeps` sweeps.
+    '''
+    def __init__(self, threshold: float = 10.0, quantile: float = 0.5, floor_step: float = 0.25,
+                 hold_sweeps: int = 1, min_bins: int = 1, warmup_sweeps: int = 10) -> None:
+        if not 0 < quantile < 1:
+            raise ValueError('quantile must be in range (0, 1)')
+
+        self.threshold = float(threshold)
+        self.quantile = float(quantile)
+        self.floor_step = float(floor_step)
+        self.hold_sweeps = int(hold_sweeps)
+        self.min_bins = max(1, int(min_bins))
+        self.warmup_sweeps = int(warmup_sweeps)
+
+        self._floors: dict[int, np.ndarray[Any, Any]] = {}
+        self._updates: dict[int, int] = {}
+        self._active: dict[int, list[dict[str, Any]]] = {}
+
+    def noise_floor(self, start_frequency: int) -> np.ndarray[Any, Any] | None:
+        floor = self._floors.get(start_frequency)
+        return None if floor is None else floor.copy()
+
+    def update(self, timestamp: float, start_frequency: int, bin_width: float, dbfs: np.ndarray[Any, Any]) -> list[dict[str, Any]]:
+        floor = self._floors.get(start_frequency)
+        if floor is None or len(floor) != len(dbfs):
+            self._floors[start_frequency] = dbfs.astype(np.float32)
+            self._updates[start_frequency] = 1
+            self._active[start_frequency] = []
+            return []
+
+        # frugal streaming quantile: step up with probability q, down with 1 - q
+        above_floor = dbfs > floor
+        floor += np.where(above_floor, self.floor_step * self.quantile, -self.floor_step * (1 - self.quantile)).astype(np.float32)
+        self._updates[start_frequency] += 1
+
+        if self._updates[start_frequency] <= self.warmup_sweeps:
+            return []
+
+        mask = np.empty(len(dbfs) + 2, dtype=np.int8)
+        mask[0] = mask[-1] = 0
+        np.greater(dbfs, floor + self.threshold, out=mask[1:-1], casting='unsafe')
+        edges = np.flatnonzero(np.diff(mask))
+        starts, stops = edges[0::2], edges[1::2]
+
+        active = self._active[start_frequency]
+        matched = [False] * len(active)
+        for start, stop in zip(starts, stops, strict=True):
+            if stop - start < self.min_bins:
+                continue
+
+            peak_index = start + int(np.argmax(dbfs[start:stop]))
+            low = start_frequency + start * bin_width
+            high = start_frequency + stop * bin_width
+            peak_dbfs = float(dbfs[peak_index])
+            floor_dbfs = float(np.median(floor[start:stop]))
+
+            for i, emission in enumerate(active):
+                if emission['low'] < high and low < emission['high']:
+                    emission['low'] = min(emission['low'], low)
+                    emission['high'] = max(emission['high'], high)
+                    if peak_dbfs > emission['peak_dbfs']:
+                        emission['peak_dbfs'] = peak_dbfs
+                        emission['floor_dbfs'] = floor_dbfs
+                    emission['last_seen'] = timestamp
+                    emission['missed'] = 0
+                    matched[i] = True
+                    break
+            else:
+                active.append({
+                    'low': low,
+                    'high': high,
+                    'peak_dbfs': peak_dbfs,
+                    'floor_dbfs': floor_dbfs,
+                    'first_seen': timestamp,
+                    'last_seen': timestamp,
+                    'missed': 0,
+                })
+                matched.append(True)
+
+        events = []
+        remaining = []
+        for emission, is_matched in zip(active, matched, strict=True):
+            if not is_matched:
+                emission['missed'] += 1
+                if emission['missed'] > self.hold_sweeps:
+                    events.append(self._event(emission))
+                    continue
+            remaining.append(emission)
+
+        self._active[start_frequency] = remaining
+        return events
+
+    def flush(self) -> list[dict[str, Any]]:
+        events = [self._event(emission) for active in self._active.values() for emission in active]
+        for active in self._active.values():
+            active.clear()
+        return events
+
+    def reset(self) -> None:
+        self._floors.clear()
+        self._updates.clear()
+        self._active.clear()
+
+    @staticmethod
+    def _event(emission: dict[str, Any]) -> dict[str, Any]:
+        return {
+            'center_frequency': int((emission['low'] + emission['high']) / 2),
+            'bandwidth': int(emission['high'] - emission['low']),
+            'peak_dbfs': emission['peak_dbfs'],
+            'floor_dbfs': emission['floor_dbfs'],
+            'first_seen': emission['first_seen'],
+            'last_seen': emission['last_seen'],
+        }
+
+
+def pack_event(event: dict[str, Any]) -> bytes:
+    return EVENT_STRUCT.pack(
+        event['first_seen'],
+        event['last_seen'],
+        event['center_frequency'],
+        event['bandwidth'],
+        event['peak_dbfs'],
+        event['floor_dbfs'],
+    )
+
+
+def format_event(event: dict[str, Any]) -> str:
+    return f'{event["first_seen"]:.6f}, {event["last_seen"]:.6f}, {event["center_frequency"]}, {event["bandwidth"]}, {event["peak_dbfs"]:.2f}, {event["floor_dbfs"]:.2f}\n'
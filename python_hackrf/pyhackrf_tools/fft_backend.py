@@ -0,0 +1,176 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import importlib
+import os
+import struct
+import threading
+from typing import Any
+
+import numpy as np
+
+BACKENDS = ('pyfftw', 'scipy', 'numpy')
+BACKEND_MODULES = {'pyfftw': 'pyfftw', 'scipy': 'scipy.fft', 'numpy': 'numpy.fft'}
+WISDOM_FILENAME = 'fftw_wisdom.bin'
+
+_backends: dict[tuple[str | None, int], 'FFTBackend'] = {}
+_backends_lock = threading.Lock()
+
+
+def default_cache_dir() -> str:
+    cache_dir = os.environ.get('PYTHON_HACKRF_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'python_hackrf')
+
+
+def available_backends() -> list[str]:
+    result = []
+    for name in BACKENDS:
+        try:
+            importlib.import_module(BACKEND_MODULES[name])
+            result.append(name)
+        except ImportError:
+            pass
+    return result
+
+
+class FFTBackend:
+    '''
+    FFT along the last axis with an explicitly selected backend ('pyfftw', 'scipy' or 'numpy'; None picks the first
+    one available in that order). The backend library is imported when the object is created, not at module import.
+
+    pyfftw: FFTW plans are built once per (fft_size, dtype, batch) and per thread, run with `workers` threads, and
+    FFTW wisdom is loaded from and saved to `wisdom_dir`, so MEASURE planning is paid once per machine. The returned
+    array is the plan's output buffer and is overwritten by the next call with the same key from the same thread.
+    scipy: uses its internal plan cache with `workers` threads. numpy: single-threaded.
+    '''
+    def __init__(self, name: str | None = None, workers: int = 1, wisdom_dir: str | None = None,
+                 planner_effort: str = 'FFTW_MEASURE') -> None:
+        if name is None:
+            # first backend that imports, the ones after it are never loaded
+            for candidate in BACKENDS:
+                try:
+                    module = importlib.import_module(BACKEND_MODULES[candidate])
+                except ImportError:
+                    continue
+                name = candidate
+                break
+        elif name in BACKENDS:
+            module = importlib.import_module(BACKEND_MODULES[name])
+        else:
+            raise ValueError(f'fft backend must be one of {BACKENDS}')
+
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.planner_effort = planner_effort
+        self.wisdom_dir = wisdom_dir if wisdom_dir is not None else default_cache_dir()
+
+        self._module = module
+        self._local = threading.local()
+        self._new_plans = False
+
+        if name == 'pyfftw':
+            importlib.import_module('pyfftw.builders')
+            self.load_wisdom()
+
+    def _plans(self) -> dict[tuple[int, str, int], Any]:
+        plans = getattr(self._local, 'plans', None)
+        if plans is None:
+            plans = self._local.plans = {}
+        return plans
+
+    def plan(self, shape: tuple[int, ...], dtype: Any) -> Any:
+        '''Returns the cached FFTW plan for shape (batch, fft_size) or (fft_size,), building it on first use.'''
+        key = (shape[-1], np.dtype(dtype).str, shape[0] if len(shape) > 1 else 1)
+        plans = self._plans()
+        plan = plans.get(key)
+        if plan is None:
+            array = self._module.empty_aligned(shape, dtype=dtype)
+            plan = self._module.builders.fft(array, axis=-1, threads=self.workers, planner_effort=self.planner_effort)
+            plans[key] = plan
+            self._new_plans = True
+        return plan
+
+    def prepare(self, shape: tuple[int, ...], dtype: Any) -> None:
+        '''
+        Plans shape in the calling thread (pyfftw only). Plans are per thread, but the wisdom gathered here is shared,
+        so a thread that later plans the same shape (the libusb callback thread) finds it without measuring again.
+        '''
+        if self.name == 'pyfftw':
+            self.plan(shape, dtype)
+
+    def fft(self, data: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        if self.name == 'pyfftw':
+            return self.plan(data.shape, data.dtype)(data)
+        if self.name == 'scipy':
+            return self._module.fft(data, axis=-1, workers=self.workers)
+        return self._module.fft(data, axis=-1)
+
+    def fftshift(self, data: np.ndarray[Any, Any], axes: Any = None) -> np.ndarray[Any, Any]:
+        return np.fft.fftshift(data, axes=axes)
+
+    def num_plans(self) -> int:
+        return len(self._plans())
+
+    @property
+    def wisdom_path(self) -> str:
+        return os.path.join(self.wisdom_dir, WISDOM_FILENAME)
+
+    def load_wisdom(self) -> bool:
+        if self.name != 'pyfftw' or not os.path.exists(self.wisdom_path):
+            return False
+
+        wisdom = []
+        with open(self.wisdom_path, 'rb') as file:
+            data = file.read()
+        position = 0
+        while position < len(data):
+            length = struct.unpack_from('<I', data, position)[0]
+            wisdom.append(data[position + 4:position + 4 + length])
+            position += 4 + length
+
+        self._module.import_wisdom(tuple(wisdom))
+        return True
+
+    def save_wisdom(self) -> bool:
+        '''Writes FFTW wisdom to the cache directory if new plans were built since the last save.'''
+        if self.name != 'pyfftw' or not self._new_plans:
+            return False
+
+        os.makedirs(self.wisdom_dir, exist_ok=True)
+        temp_path = f'{self.wisdom_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            for wisdom in self._module.export_wisdom():
+                file.write(struct.pack('<I', len(wisdom)) + wisdom)
+        os.replace(temp_path, self.wisdom_path)
+        self._new_plans = False
+        return True
+
+
+def get_backend(name: str | None = None, workers: int = 1) -> FFTBackend:
+    '''Shared backend instance per (name, workers), so plans survive between pyhackrf_sweep calls.'''
+    with _backends_lock:
+        backend = _backends.get((name, workers))
+        if backend is None:
+            backend = _backends[(name, workers)] = FFTBackend(name, workers)
+        return backend
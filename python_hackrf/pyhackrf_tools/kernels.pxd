@@ -0,0 +1,32 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# distutils: language = c++
+# cython: language_level = 3str
+# cython: freethreading_compatible = True
+from libc.stdint cimport int8_t, int16_t, uint64_t
+
+cpdef Py_ssize_t int8_to_complex64(const int8_t[::1] source, float complex[::1] out) noexcept nogil
+cpdef Py_ssize_t complex64_to_int8(const float complex[::1] source, int8_t[::1] out, bint dither = *) noexcept nogil
+cpdef Py_ssize_t int8_to_int16(const int8_t[::1] source, int16_t[::1] out) noexcept nogil
+cpdef uint64_t int8_sum_of_squares(const int8_t[::1] source) noexcept nogil
@@ -0,0 +1,13 @@
+import numpy as np
+
+def int8_to_complex64(source: np.ndarray, out: np.ndarray) -> int:
+    ...
+
+def complex64_to_int8(source: np.ndarray, out: np.ndarray, dither: bool = False) -> int:
+    ...
+
+def int8_to_int16(source: np.ndarray, out: np.ndarray) -> int:
+    ...
+
+def int8_sum_of_squares(source: np.ndarray) -> int:
+    ...
@@ -0,0 +1,131 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# distutils: language = c++
+# cython: language_level = 3str
+# cython: freethreading_compatible = True
+from libc.stdint cimport int8_t, int16_t, uint32_t, uint64_t
+from libcpp.atomic cimport atomic
+cimport cython
+
+# sample conversions shared by the tools, all of them run without the GIL and write into caller supplied arrays
+
+# every complex64_to_int8 call with dither takes its own seed, so concurrent streams never share generator state
+cdef atomic[uint64_t] dither_seed
+
+
+cdef inline uint32_t hash32(uint32_t value) noexcept nogil:
+    # counter based generator (lowbias32), the dither loop has no carried state and vectorizes
+    value ^= value >> 16
+    value *= 0x7FEB352DU
+    value ^= value >> 15
+    value *= 0x846CA68BU
+    value ^= value >> 16
+    return value
+
+
+cdef inline int8_t to_int8(float value) noexcept nogil:
+    # round to nearest and clip to the int8 range (NaN ends up at -128), branch free so the loops vectorize
+    value = value + <float> 128.5
+    value = value if value > 0 else 0
+    value = value if value < 255 else 255
+    return <int8_t> (<int> value - 128)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef Py_ssize_t int8_to_complex64(const int8_t[::1] source, float complex[::1] out) noexcept nogil:
+    cdef Py_ssize_t num_samples = min(source.shape[0] // 2, out.shape[0])
+    cdef Py_ssize_t i
+    if num_samples <= 0:
+        return 0
+
+    cdef const int8_t *values = &source[0]
+    cdef float *destination = <float *> &out[0]
+    for i in range(num_samples * 2):
+        destination[i] = values[i] * <float> (1 / 128)
+
+    return num_samples
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef Py_ssize_t complex64_to_int8(const float complex[::1] source, int8_t[::1] out, bint dither = False) noexcept nogil:
+    cdef Py_ssize_t num_samples = min(source.shape[0], out.shape[0] // 2)
+    cdef Py_ssize_t i
+    cdef uint32_t seed
+    cdef uint32_t random
+    if num_samples <= 0:
+        return 0
+
+    cdef const float *values = <const float *> &source[0]
+    cdef int8_t *destination = &out[0]
+    if not dither:
+        for i in range(num_samples * 2):
+            destination[i] = to_int8(values[i] * <float> 128)
+        return num_samples
+
+    # triangular dither of +-1 LSB: difference of the two 16 bit halves of one hash
+    seed = hash32(<uint32_t> dither_seed.fetch_add(1))
+    for i in range(num_samples * 2):
+        random = hash32(seed + <uint32_t> i)
+        destination[i] = to_int8(values[i] * <float> 128 + (<float> (<int> (random & 0xFFFF) - <int> (random >> 16))) * <float> (1 / 65536))
+
+    return num_samples
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef Py_ssize_t int8_to_int16(const int8_t[::1] source, int16_t[::1] out) noexcept nogil:
+    cdef Py_ssize_t num_values = min(source.shape[0], out.shape[0])
+    cdef Py_ssize_t i
+    if num_values <= 0:
+        return 0
+
+    cdef const int8_t *values = &source[0]
+    cdef int16_t *destination = &out[0]
+    for i in range(num_values):
+        destination[i] = values[i]
+
+    return num_values
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef uint64_t int8_sum_of_squares(const int8_t[::1] source) noexcept nogil:
+    cdef Py_ssize_t i, j, stop
+    cdef uint32_t partial
+    cdef uint64_t total = 0
+    if source.shape[0] <= 0:
+        return 0
+
+    # 32 bit partial sums over blocks of 65536 values (at most 2^30), so the inner loop vectorizes
+    cdef const int8_t *values = &source[0]
+    for j in range(0, source.shape[0], 65536):
+        stop = min(j + 65536, source.shape[0])
+        partial = 0
+        for i in range(j, stop):
+            partial += values[i] * values[i]
+        total += partial
+
+    return total
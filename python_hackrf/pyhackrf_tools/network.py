@@ -0,0 +1,296 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import socket
+import struct
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from threading import Condition, Thread
+from typing import Any
+from urllib.parse import urlparse
+
+import numpy as np
+
+FRAME_MAGIC = b'PHRF'
+FRAME_VERSION = 1
+FRAME_KIND_SPECTRUM = 1  # float32 dBfs bins
+FRAME_KIND_IQ = 2  # complex64 samples
+# magic, version, kind, reserved, sequence, timestamp_ns, start_frequency, stop_frequency, count, payload_length
+FRAME_HEADER = struct.Struct('<4sBBHQqQQII')
+FRAME_DTYPES = {FRAME_KIND_SPECTRUM: np.float32, FRAME_KIND_IQ: np.complex64}
+MAX_DATAGRAM_SIZE = 65_000
+UDP_RECEIVE_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def encode_frame(kind: int, sequence: int, timestamp: float, start_frequency: int, stop_frequency: int, data: np.ndarray[Any, Any]) -> bytes:
+    payload = np.ascontiguousarray(data, dtype=FRAME_DTYPES[kind]).tobytes()
+    return FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, kind, 0, sequence, int(timestamp * 1e9),
+        int(start_frequency), int(stop_frequency), len(data), len(payload),
+    ) + payload
+
+
+def decode_frames(data: bytes | bytearray | memoryview) -> tuple[list[dict[str, Any]], int]:
+    '''Decodes all complete frames in data. Returns the frames and the number of bytes consumed.'''
+    frames = []
+    position = 0
+    view = memoryview(data)
+    while len(view) - position >= FRAME_HEADER.size:
+        magic, version, kind, _, sequence, timestamp_ns, start_frequency, stop_frequency, count, payload_length = FRAME_HEADER.unpack_from(view, position)
+        if magic != FRAME_MAGIC or version != FRAME_VERSION:
+            raise ValueError('invalid frame header')
+
+        frame_end = position + FRAME_HEADER.size + payload_length
+        if frame_end > len(view):
+            break
+
+        frames.append({
+            'kind': kind,
+            'sequence': sequence,
+            'timestamp_ns': timestamp_ns,
+            'start_frequency': start_frequency,
+            'stop_frequency': stop_frequency,
+            'data': np.frombuffer(view[position + FRAME_HEADER.size:frame_end], dtype=FRAME_DTYPES[kind], count=count).copy(),
+        })
+        position = frame_end
+
+    return frames, position
+
+
+class NetworkSink:
+    '''
+    Streams sweep spectra and IQ to a remote host with compact binary framing.
+    Frames are queued by the caller thread and sent by a background thread that coalesces small frames
+    into large sends (TCP) or datagrams (UDP). The send queue is bounded by max_queue_bytes; when the peer
+    is slow or disconnected new frames are dropped and counted. TCP connections are re-established automatically.
+    '''
+    def __init__(self, host: str, port: int, protocol: str = 'tcp', max_queue_bytes: int = 64 * 1024 * 1024,
+                 batch_bytes: int = 256 * 1024, reconnect_interval: float = 1.0) -> None:
+        if protocol not in {'tcp', 'udp'}:
+            raise ValueError('protocol must be tcp or udp')
+
+        self.host = host
+        self.port = int(port)
+        self.protocol = protocol
+        self.max_queue_bytes = int(max_queue_bytes)
+        self.batch_bytes = int(batch_bytes) if protocol == 'tcp' else min(int(batch_bytes), MAX_DATAGRAM_SIZE)
+        self.reconnect_interval = float(reconnect_interval)
+
+        self._frames: deque[bytes] = deque()
+        self._queued_bytes = 0
+        self._sequence = 0
+        self._condition = Condition()
+        self._socket: socket.socket | None = None
+        self._connected = False  # a connection was established before, later connects count as reconnects
+        self._run_available = True
+
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.dropped_frames = 0
+        self.dropped_bytes = 0
+        self.peak_queue_bytes = 0
+        self.reconnects = 0
+
+        self._send_thread = Thread(target=self._send, daemon=True)
+        self._send_thread.start()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> 'NetworkSink':
+        '''tcp://host:port or udp://host:port'''
+        parsed = urlparse(url)
+        if parsed.hostname is None or parsed.port is None:
+            raise ValueError(f'invalid sink url: {url}')
+        return cls(parsed.hostname, parsed.port, protocol=parsed.scheme or 'tcp', **kwargs)
+
+    def write_spectrum(self, timestamp: float, start_frequency: int, stop_frequency: int, dbfs: np.ndarray[Any, Any]) -> None:
+        self._put(FRAME_KIND_SPECTRUM, timestamp, start_frequency, stop_frequency, dbfs)
+
+    def write_iq(self, timestamp: float, frequency: int, sample_rate: int, iq: np.ndarray[Any, Any]) -> None:
+        if self.protocol == 'udp':
+            # IQ blocks do not fit into datagrams and UDP loss would break sample continuity
+            raise RuntimeError('IQ streaming requires tcp')
+        self._put(FRAME_KIND_IQ, timestamp, frequency - sample_rate // 2, frequency + sample_rate // 2, iq)
+
+    def _put(self, kind: int, timestamp: float, start_frequency: int, stop_frequency: int, data: np.ndarray[Any, Any]) -> None:
+        with self._condition:
+            frame = encode_frame(kind, self._sequence, timestamp, start_frequency, stop_frequency, data)
+            self._sequence += 1
+
+            if self._queued_bytes + len(frame) > self.max_queue_bytes or (self.protocol == 'udp' and len(frame) > MAX_DATAGRAM_SIZE):
+                self.dropped_frames += 1
+                self.dropped_bytes += len(frame)
+                return
+
+            self._frames.append(frame)
+            self._queued_bytes += len(frame)
+            self.peak_queue_bytes = max(self.peak_queue_bytes, self._queued_bytes)
+            self._condition.notify()
+
+    def _connect(self) -> socket.socket | None:
+        try:
+            if self.protocol == 'tcp':
+                sock = socket.create_connection((self.host, self.port), timeout=self.reconnect_interval)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.settimeout(None)
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.connect((self.host, self.port))
+            return sock
+        except OSError:
+            return None
+
+    def _next_batch(self) -> tuple[bytes, int] | None:
+        with self._condition:
+            while not self._frames and self._run_available:
+                self._condition.wait()
+            if not self._frames:
+                return None
+
+            batch = bytearray(self._frames.popleft())
+            num_frames = 1
+            while self._frames and len(batch) + len(self._frames[0]) <= self.batch_bytes:
+                batch += self._frames.popleft()
+                num_frames += 1
+
+            self._queued_bytes -= len(batch)
+            return bytes(batch), num_frames
+
+    def _send(self) -> None:
+        batch = None
+        num_frames = 0
+        while True:
+            if batch is None:
+                next_batch = self._next_batch()
+                if next_batch is None:
+                    break
+                batch, num_frames = next_batch
+
+            if self._socket is None:
+                self._socket = self._connect()
+                if self._socket is None:
+                    if not self._run_available:
+                        break
+                    time.sleep(self.reconnect_interval)
+                    continue
+                if self._connected:
+                    self.reconnects += 1
+                self._connected = True
+
+            try:
+                self._socket.sendall(batch)
+                self.sent_bytes += len(batch)
+                self.sent_frames += num_frames
+                batch = None
+            except OSError:
+                self._socket.close()
+                self._socket = None
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            return {
+                'sent_frames': self.sent_frames,
+                'sent_bytes': self.sent_bytes,
+                'dropped_frames': self.dropped_frames,
+                'dropped_bytes': self.dropped_bytes,
+                'queued_bytes': self._queued_bytes,
+                'peak_queue_bytes': self.peak_queue_bytes,
+                'reconnects': self.reconnects,
+            }
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        with self._condition:
+            self._run_available = False
+            self._condition.notify_all()
+
+        self._send_thread.join(timeout)
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except Exception as er:
+                sys.stderr.write(f'Exception during close: {er}\n')
+            self._socket = None
+
+
+class NetworkReceiver:
+    '''
+    Receives frames sent by NetworkSink and decodes them straight into NumPy arrays.
+    For TCP it listens and serves one sender at a time, accepting a new connection after a disconnect.
+    '''
+    def __init__(self, host: str = '0.0.0.0', port: int = 0, protocol: str = 'tcp', recv_size: int = 1024 * 1024) -> None:
+        if protocol not in {'tcp', 'udp'}:
+            raise ValueError('protocol must be tcp or udp')
+
+        self.protocol = protocol
+        self.recv_size = int(recv_size)
+        self._connection: socket.socket | None = None
+        self._buffer = bytearray()
+
+        if protocol == 'tcp':
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind((host, port))
+            self._socket.listen(1)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER_SIZE)
+            self._socket.bind((host, port))
+
+        self.address = self._socket.getsockname()
+
+    def receive(self, timeout: float | None = None) -> list[dict[str, Any]]:
+        '''Returns the frames received by one recv call ([] on timeout or disconnect).'''
+        try:
+            if self.protocol == 'udp':
+                self._socket.settimeout(timeout)
+                return decode_frames(self._socket.recv(MAX_DATAGRAM_SIZE))[0]
+
+            if self._connection is None:
+                self._socket.settimeout(timeout)
+                self._connection, _ = self._socket.accept()
+                self._buffer.clear()
+
+            self._connection.settimeout(timeout)
+            chunk = self._connection.recv(self.recv_size)
+        except (TimeoutError, BlockingIOError):
+            return []
+
+        if not chunk:
+            self._connection.close()
+            self._connection = None
+            return []
+
+        self._buffer += chunk
+        frames, consumed = decode_frames(self._buffer)
+        del self._buffer[:consumed]
+        return frames
+
+    def frames(self, timeout: float | None = None) -> Iterator[dict[str, Any]]:
+        while True:
+            yield from self.receive(timeout)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self._socket.close()
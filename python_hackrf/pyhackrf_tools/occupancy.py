@@ -0,0 +1,132 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import time
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+
+class OccupancyAccumulator:
+    '''
+    Constant-memory spectrum occupancy statistics for long-running sweeps.
+    For every frequency bin keeps the number of sweeps above `threshold` (duty cycle) and a histogram of power
+    in fixed dB buckets. All counters are uint32 arrays sized to the frequency grid and updated in place,
+    so memory does not depend on run length. Snapshots are written periodically as .npz files.
+    '''
+    def __init__(self, threshold: float = -70.0, hist_min: float = -140.0, hist_max: float = 0.0, hist_step: float = 1.0,
+                 snapshot_path: str | None = None, snapshot_interval: float = 60.0) -> None:
+        if hist_max <= hist_min or hist_step <= 0:
+            raise ValueError('hist_max must be greater than hist_min and hist_step must be positive')
+
+        self.threshold = float(threshold)
+        self.hist_min = float(hist_min)
+        self.hist_step = float(hist_step)
+        self.num_buckets = int(np.ceil((hist_max - hist_min) / hist_step))
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = float(snapshot_interval)
+
+        self._rows: dict[int, tuple[float, np.ndarray[Any, Any], np.ndarray[Any, Any]]] = {}
+        self._sweeps: dict[int, int] = {}
+        self._last_snapshot = time.time()
+        self._lock = Lock()
+
+    def update(self, start_frequency: int, bin_width: float, dbfs: np.ndarray[Any, Any]) -> None:
+        with self._lock:
+            row = self._rows.get(start_frequency)
+            if row is None or len(row[1]) != len(dbfs):
+                row = (
+                    bin_width,
+                    np.zeros(len(dbfs), dtype=np.uint32),
+                    np.zeros((len(dbfs), self.num_buckets), dtype=np.uint32),
+                )
+                self._rows[start_frequency] = row
+                self._sweeps[start_frequency] = 0
+
+            _, counts, histogram = row
+            np.add(counts, 1, out=counts, where=dbfs > self.threshold)
+
+            buckets = ((dbfs - self.hist_min) / self.hist_step).astype(np.intp)
+            np.clip(buckets, 0, self.num_buckets - 1, out=buckets)
+            histogram[np.arange(len(dbfs)), buckets] += 1
+
+            self._sweeps[start_frequency] += 1
+
+    def result(self) -> dict[str, np.ndarray[Any, Any]]:
+        with self._lock:
+            start_frequencies = sorted(self._rows)
+            if not start_frequencies:
+                return {
+                    'frequencies': np.array([], dtype=np.float64),
+                    'sweeps': np.array([], dtype=np.uint32),
+                    'counts': np.array([], dtype=np.uint32),
+                    'duty_cycle': np.array([], dtype=np.float32),
+                    'histogram': np.zeros((0, self.num_buckets), dtype=np.uint32),
+                    'bucket_edges': self.bucket_edges(),
+                }
+
+            frequencies = np.concatenate([start_frequency + (np.arange(len(self._rows[start_frequency][1])) + .5) * self._rows[start_frequency][0] for start_frequency in start_frequencies])
+            sweeps = np.concatenate([np.full(len(self._rows[start_frequency][1]), self._sweeps[start_frequency], dtype=np.uint32) for start_frequency in start_frequencies])
+            counts = np.concatenate([self._rows[start_frequency][1] for start_frequency in start_frequencies])
+            histogram = np.concatenate([self._rows[start_frequency][2] for start_frequency in start_frequencies])
+
+        return {
+            'frequencies': frequencies,
+            'sweeps': sweeps,
+            'counts': counts,
+            'duty_cycle': (counts / np.maximum(sweeps, 1)).astype(np.float32),
+            'histogram': histogram,
+            'bucket_edges': self.bucket_edges(),
+        }
+
+    def bucket_edges(self) -> np.ndarray[Any, Any]:
+        return self.hist_min + np.arange(self.num_buckets + 1) * self.hist_step
+
+    def snapshot(self, path: str | None = None) -> None:
+        path = path if path is not None else self.snapshot_path
+        if path is None:
+            return
+
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as file:
+            np.savez(file, threshold=self.threshold, **self.result())
+        os.replace(temp_path, path)
+        self._last_snapshot = time.time()
+
+    def maybe_snapshot(self) -> bool:
+        if self.snapshot_path is None or time.time() - self._last_snapshot < self.snapshot_interval:
+            return False
+
+        self.snapshot()
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._sweeps.clear()
+
+
+def load_occupancy(path: str) -> dict[str, np.ndarray[Any, Any]]:
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
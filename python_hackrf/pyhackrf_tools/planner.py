@@ -0,0 +1,178 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import time
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+from python_hackrf import pyhackrf
+
+
+class AdaptiveSweepPlanner:
+    '''
+    Rebuilds the sweep range list from per tune step activity so that active bands are revisited more often.
+    Activity of a step is an exponential average of the fraction of its bins above `threshold` dBfs; steps with
+    activity >= `hot_activity` form hot bands. Every plan starts with a coverage slice holding `coverage` of all
+    tune steps (rotated, so the whole spectrum is swept at least once every ceil(1 / coverage) plans) and fills the
+    remaining range slots with hot bands, repeated up to `max_repeats` times in order of activity.
+    All ranges stay on the original tune step grid. The first plan is the original range list.
+    '''
+    def __init__(self, threshold: float = -70.0, hot_activity: float = 0.05, coverage: float = 0.25,
+                 replan_interval: float = 10.0, max_repeats: int = 4, max_ranges: int = pyhackrf.PY_MAX_SWEEP_RANGES,
+                 smoothing: float = 0.2) -> None:
+        if not 0 < coverage <= 1:
+            raise ValueError('coverage must be in range (0, 1]')
+
+        self.threshold = float(threshold)
+        self.hot_activity = float(hot_activity)
+        self.coverage = float(coverage)
+        self.replan_interval = float(replan_interval)
+        self.max_repeats = max(1, int(max_repeats))
+        self.max_ranges = min(int(max_ranges), pyhackrf.PY_MAX_SWEEP_RANGES)
+        self.smoothing = float(smoothing)
+
+        self.tune_step = 0
+        self.frequencies: list[int] = []
+        self.num_plans = 0
+        self._step_starts = np.array([], dtype=np.int64)
+        self._step_index: dict[int, int] = {}
+        self._activity = np.array([], dtype=np.float64)
+        self._last_visit = np.array([], dtype=np.float64)
+        self._revisit = np.array([], dtype=np.float64)
+        self._plan: list[int] = []
+        self._bands: list[dict[str, Any]] = []
+        self._last_plan = time.time()
+        self._lock = Lock()
+
+    def set_ranges(self, frequencies: list[int], tune_step: int) -> None:
+        '''frequencies are [min, max, ...] in MHz aligned to tune_step (MHz), as passed to pyhackrf_init_sweep.'''
+        with self._lock:
+            self.frequencies = [int(frequency) for frequency in frequencies]
+            self.tune_step = int(tune_step)
+            step_starts = []
+            for i in range(len(self.frequencies) // 2):
+                step_starts.extend(range(self.frequencies[2 * i], self.frequencies[2 * i + 1], self.tune_step))
+
+            self._step_starts = np.array(step_starts, dtype=np.int64)
+            self._step_index = {int(start * 1e6): index for index, start in enumerate(step_starts)}
+            self._activity = np.zeros(len(step_starts), dtype=np.float64)
+            self._last_visit = np.zeros(len(step_starts), dtype=np.float64)
+            self._revisit = np.zeros(len(step_starts), dtype=np.float64)
+            self._plan = list(self.frequencies)
+            self._bands = [{'start': self.frequencies[2 * i], 'stop': self.frequencies[2 * i + 1], 'hot': False, 'repeats': 1} for i in range(len(self.frequencies) // 2)]
+            self._last_plan = time.time()
+            self.num_plans = 0
+
+    def update(self, timestamp: float, frequency: int, dbfs: np.ndarray[Any, Any]) -> None:
+        index = self._step_index.get(int(frequency))
+        if index is None or not len(dbfs):
+            return
+
+        active = np.count_nonzero(dbfs > self.threshold) / len(dbfs)
+        with self._lock:
+            self._activity[index] += self.smoothing * (active - self._activity[index])
+            if self._last_visit[index]:
+                interval = timestamp - self._last_visit[index]
+                if interval > 0:
+                    self._revisit[index] = interval if not self._revisit[index] else self._revisit[index] + self.smoothing * (interval - self._revisit[index])
+            self._last_visit[index] = timestamp
+
+    def due(self) -> bool:
+        return len(self._step_starts) > 0 and time.time() - self._last_plan >= self.replan_interval
+
+    def _runs(self, indices: list[int]) -> list[tuple[int, int]]:
+        '''Splits sorted step indices into contiguous frequency runs (first, last).'''
+        runs: list[tuple[int, int]] = []
+        for index in indices:
+            if runs and index == runs[-1][1] + 1 and self._step_starts[index] == self._step_starts[index - 1] + self.tune_step:
+                runs[-1] = (runs[-1][0], index)
+            else:
+                runs.append((index, index))
+        return runs
+
+    def plan(self) -> list[int]:
+        '''Builds the next range list [min, max, ...] in MHz.'''
+        with self._lock:
+            num_steps = len(self._step_starts)
+            if not num_steps:
+                return list(self._plan)
+
+            # no more chunks than tune steps and balanced bounds, so every coverage slice holds at least one step
+            num_chunks = min(math.ceil(1 / self.coverage), num_steps)
+            chunk = self.num_plans % num_chunks
+            coverage_runs = self._runs(list(range(chunk * num_steps // num_chunks, (chunk + 1) * num_steps // num_chunks)))
+
+            hot_runs = self._runs([int(index) for index in np.flatnonzero(self._activity >= self.hot_activity)])
+            slots = max(0, self.max_ranges - len(coverage_runs))
+            hot_runs.sort(key=lambda run: self._activity[run[0]:run[1] + 1].mean(), reverse=True)
+            hot_runs = hot_runs[:slots]
+
+            repeats = [1] * len(hot_runs)
+            remaining = slots - len(hot_runs)
+            while remaining > 0 and hot_runs and min(repeats) < self.max_repeats:
+                for i in range(len(hot_runs)):
+                    if remaining and repeats[i] < self.max_repeats:
+                        repeats[i] += 1
+                        remaining -= 1
+
+            order = sorted(range(len(hot_runs)), key=lambda i: hot_runs[i][0])
+            ranges = list(coverage_runs)
+            for round_index in range(max(repeats, default=0)):
+                ranges.extend(hot_runs[i] for i in order if repeats[i] > round_index)
+
+            self._plan = []
+            for first, last in ranges:
+                self._plan.extend((int(self._step_starts[first]), int(self._step_starts[last]) + self.tune_step))
+
+            self._bands = [{'start': int(self._step_starts[first]), 'stop': int(self._step_starts[last]) + self.tune_step, 'hot': False, 'repeats': 1} for first, last in coverage_runs]
+            self._bands += [{'start': int(self._step_starts[hot_runs[i][0]]), 'stop': int(self._step_starts[hot_runs[i][1]]) + self.tune_step, 'hot': True, 'repeats': repeats[i]} for i in order]
+
+            self.num_plans += 1
+            self._last_plan = time.time()
+            return list(self._plan)
+
+    def report(self) -> list[dict[str, Any]]:
+        '''Effective revisit interval (seconds, averaged over tune steps) and activity of every band in the current plan.'''
+        with self._lock:
+            result = []
+            for band in self._bands:
+                indices = [self._step_index[int(start * 1e6)] for start in range(band['start'], band['stop'], self.tune_step)]
+                revisit = self._revisit[indices]
+                result.append({
+                    'start_frequency': int(band['start'] * 1e6),
+                    'stop_frequency': int(band['stop'] * 1e6),
+                    'hot': band['hot'],
+                    'repeats': band['repeats'],
+                    'activity': float(self._activity[indices].mean()),
+                    'revisit_interval': float(revisit[revisit > 0].mean()) if np.any(revisit > 0) else None,
+                })
+            return result
+
+    def format_report(self) -> str:
+        lines = []
+        for band in self.report():
+            revisit = f'{band["revisit_interval"]:.3f} s' if band['revisit_interval'] is not None else 'n/a'
+            lines.append(f'{"hot" if band["hot"] else "coverage"} {band["start_frequency"] / 1e6:.0f}-{band["stop_frequency"] / 1e6:.0f} MHz x{band["repeats"]}: activity {band["activity"] * 100:.1f}%, revisit {revisit}')
+        return '\n'.join(lines) + '\n'
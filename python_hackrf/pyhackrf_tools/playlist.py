@@ -0,0 +1,205 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+from collections import deque
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+
+def to_tx_samples(waveform: np.ndarray[Any, Any] | str) -> np.ndarray[Any, Any]:
+    '''Converts complex samples (or a complex64 file) to the interleaved int8 I/Q layout of the TX buffer.'''
+    if isinstance(waveform, str):
+        waveform = np.fromfile(waveform, dtype=np.complex64)
+
+    waveform = np.asarray(waveform)
+    if waveform.dtype == np.int8:
+        if len(waveform) % 2:
+            raise ValueError('interleaved int8 waveform must have an even length')
+        return np.ascontiguousarray(waveform)
+
+    scaled = np.ascontiguousarray(waveform, dtype=np.complex64).view(np.float32) * 128
+    return np.clip(scaled, -128, 127).astype(np.int8)
+
+
+class TxPlaylist:
+    '''
+    Gapless TX playlist for pyhackrf_transfer (tx_playlist).
+    Waveforms are converted to interleaved int8 once, when they are enqueued, and fill() copies them straight into the
+    TX buffer, switching from one entry to the next at sample granularity inside the same transfer. Every entry is
+    played `repeat` times (0 is forever, until skip() or clear()) and each repetition is followed by `gap` zero samples.
+    With `loop` finished entries are put back at the end of the playlist.
+    The playlist ends when it runs empty; with `keep_alive` zeros are sent instead until close() is called, so entries
+    enqueued later still join the running stream. enqueue(), skip(), clear() and close() are thread-safe.
+    '''
+    def __init__(self, loop: bool = False, keep_alive: bool = False) -> None:
+        self.loop = loop
+        self.keep_alive = keep_alive
+
+        self._entries: deque[dict[str, Any]] = deque()
+        self._lock = Lock()
+        self._next_id = 0
+        self._position = 0
+        self._plays = 0
+        self._closed = False
+        self._finished = False
+
+        self._samples_sent = 0
+        self._idle_samples = 0
+        self._entries_played = 0
+
+    def enqueue(self, waveform: np.ndarray[Any, Any] | str, repeat: int = 1, gap: int = 0, name: str | None = None) -> int:
+        '''Appends a waveform (complex array, interleaved int8 array or complex64 filename) and returns its id.'''
+        if repeat < 0 or gap < 0:
+            raise ValueError('repeat and gap must not be negative')
+
+        samples = to_tx_samples(waveform)
+        if not len(samples) and not gap:
+            raise ValueError('waveform is empty')
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('playlist is closed')
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries.append({
+                'id': entry_id,
+                'name': name if name is not None else (waveform if isinstance(waveform, str) else f'waveform {entry_id}'),
+                'samples': samples,
+                'repeat': int(repeat),
+                'gap': int(gap),
+            })
+            return entry_id
+
+    def _next_entry(self) -> None:
+        entry = self._entries.popleft()
+        self._position = 0
+        self._plays = 0
+        self._entries_played += 1
+        if self.loop:
+            self._entries.append(entry)
+
+    def fill(self, buffer: np.ndarray[Any, Any], num_samples: int) -> int:
+        '''
+        Writes up to `num_samples` samples into the int8 TX buffer and returns how many were written.
+        Less than `num_samples` means the playlist has ended.
+        '''
+        written = 0
+        with self._lock:
+            while written < num_samples:
+                if not self._entries:
+                    if self.keep_alive and not self._closed:
+                        buffer[written * 2:num_samples * 2] = 0
+                        self._idle_samples += num_samples - written
+                        written = num_samples
+                    else:
+                        self._finished = True
+                    break
+
+                entry = self._entries[0]
+                samples = entry['samples']
+                length = len(samples) // 2
+
+                if self._position < length:
+                    count = min(num_samples - written, length - self._position)
+                    buffer[written * 2:(written + count) * 2] = samples[self._position * 2:(self._position + count) * 2]
+                else:
+                    count = min(num_samples - written, length + entry['gap'] - self._position)
+                    buffer[written * 2:(written + count) * 2] = 0
+
+                written += count
+                self._position += count
+
+                if self._position == length + entry['gap']:
+                    self._position = 0
+                    self._plays += 1
+                    if entry['repeat'] and self._plays >= entry['repeat']:
+                        self._next_entry()
+
+            self._samples_sent += written
+        return written
+
+    def skip(self) -> None:
+        '''Moves on to the next entry at the next fill().'''
+        with self._lock:
+            if self._entries:
+                self._next_entry()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._position = 0
+            self._plays = 0
+
+    def close(self) -> None:
+        '''No more entries will be enqueued, the playlist ends when the queued entries are played.'''
+        with self._lock:
+            self._closed = True
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def pending(self) -> list[dict[str, Any]]:
+        '''Queued entries, the first one is playing: id, name, length in samples, repeat and gap.'''
+        with self._lock:
+            return [{'id': entry['id'], 'name': entry['name'], 'length': len(entry['samples']) // 2, 'repeat': entry['repeat'], 'gap': entry['gap']} for entry in self._entries]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'samples_sent': self._samples_sent,
+                'idle_samples': self._idle_samples,
+                'entries_played': self._entries_played,
+                'pending': len(self._entries),
+                'current': self._entries[0]['id'] if self._entries else None,
+                'current_plays': self._plays,
+            }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return f'TX playlist: {stats["entries_played"]} entries played, {stats["samples_sent"]} samples sent ({stats["idle_samples"]} idle), {stats["pending"]} pending\n'
+
+
+def load_playlist(filename: str, **kwargs: Any) -> TxPlaylist:
+    '''
+    Reads a playlist file with one entry per line: <complex64 filename> [repeat] [gap in samples].
+    Relative filenames are resolved against the playlist directory, lines starting with # are ignored.
+    '''
+    playlist = TxPlaylist(**kwargs)
+    directory = os.path.dirname(os.path.abspath(filename))
+    with open(filename, 'r') as file:
+        for line in file:
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            path = fields[0] if os.path.isabs(fields[0]) else os.path.join(directory, fields[0])
+            playlist.enqueue(
+                path,
+                repeat=int(fields[1]) if len(fields) > 1 else 1,
+                gap=int(float(fields[2])) if len(fields) > 2 else 0,
+                name=fields[0],
+            )
+    return playlist
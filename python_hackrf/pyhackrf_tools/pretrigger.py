@@ -0,0 +1,258 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import sys
+import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Any, Callable
+
+import numpy as np
+
+from python_hackrf.pyhackrf_tools.recording import DATA_EXTENSION, META_EXTENSION, SIGMF_VERSION, _datetime
+
+OUTPUT_DTYPES = {'int8': 'ci8', 'complex64': 'cf32_le'}
+MAX_TRANSFER_SAMPLES = 131072  # PY_BYTES_PER_BLOCK * 16 blocks per transfer // 2
+
+
+class PreTriggerRecorder:
+    '''
+    Event recorder for pyhackrf_transfer (pre_trigger): keeps the last samples of raw int8 IQ in a fixed ring and writes
+    `pre_trigger` seconds before plus `post_trigger` seconds after every trigger to <prefix>.<event>.sigmf-data with a
+    .sigmf-meta file (the trigger is an annotation). Memory is fixed at start() and nothing is written while quiet.
+    Triggers: trigger() from any thread, the stream power over `detect_size` samples reaching `threshold` dBfs, or
+    `trigger_callback(iq_int8, sample_index)` returning True for a transfer. A trigger inside the post-trigger window of
+    the current event extends it up to `pre_trigger + post_trigger` seconds, longer activity continues in the next event.
+    The device callback only copies into the ring; events are cut and written by a writer thread once their last sample
+    has arrived, `ring_margin` seconds of extra ring give it time before the oldest samples are overwritten. The ring also
+    holds two maximum transfers on top: the one that completes an event and the next one the writer has to race.
+    '''
+    def __init__(self, prefix: str, pre_trigger: float = 0.5, post_trigger: float = 0.5, threshold: float | None = None,
+                 detect_size: int = 4096, trigger_callback: Callable[[np.ndarray[Any, Any], int], bool] | None = None,
+                 output_dtype: str = 'int8', ring_margin: float = 0.25, print_to_console: bool = True) -> None:
+        if pre_trigger < 0 or post_trigger < 0 or pre_trigger + post_trigger <= 0:
+            raise ValueError('pre_trigger and post_trigger must not be negative and not both zero')
+        if output_dtype not in OUTPUT_DTYPES:
+            raise ValueError(f'output_dtype must be one of {tuple(OUTPUT_DTYPES)}')
+
+        self.prefix = prefix
+        self.pre_trigger = float(pre_trigger)
+        self.post_trigger = float(post_trigger)
+        self.threshold = threshold
+        self.detect_size = max(1, int(detect_size))
+        self.trigger_callback = trigger_callback
+        self.output_dtype = output_dtype
+        self.ring_margin = float(ring_margin)
+        self.print_to_console = print_to_console
+
+        self.sample_rate = 0
+        self.frequency = 0
+        self.metadata: dict[str, Any] = {}
+
+        self._ring = np.empty(0, dtype=np.int8)
+        self._capacity = 0
+        self._pre_samples = 0
+        self._post_samples = 0
+        self._written = 0
+        self._max_transfer = 0
+        self._first_time = 0.0
+        self._events: deque[dict[str, Any]] = deque()
+        self._num_events = 0
+        self._num_written = 0
+        self._truncated = 0
+        self._condition = Condition()
+        self._thread: Thread | None = None
+        self._running = False
+
+    def start(self, sample_rate: int, frequency: int, metadata: dict[str, Any] | None = None) -> None:
+        '''Called by pyhackrf_transfer before streaming: allocates the ring and starts the writer thread.'''
+        self.sample_rate = int(sample_rate)
+        self.frequency = int(frequency)
+        self.metadata = dict(metadata) if metadata is not None else {}
+
+        self._pre_samples = int(self.pre_trigger * self.sample_rate)
+        self._post_samples = int(self.post_trigger * self.sample_rate)
+        self._capacity = self._pre_samples + self._post_samples + int(self.ring_margin * self.sample_rate) + 2 * MAX_TRANSFER_SAMPLES
+        self._ring = np.zeros(self._capacity * 2, dtype=np.int8)
+        self._written = 0
+        self._first_time = 0.0
+
+        self._running = True
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def push(self, data: np.ndarray[Any, Any]) -> None:
+        '''Appends one transfer of interleaved int8 IQ, called from the device callback.'''
+        num_samples = len(data) // 2
+        if not num_samples or not self._capacity:
+            return
+
+        # a transfer longer than the ring only leaves its newest samples
+        skip = max(0, num_samples - self._capacity)
+        position = ((self._written + skip) % self._capacity) * 2
+        length = (num_samples - skip) * 2
+        first = min(length, len(self._ring) - position)
+        self._ring[position:position + first] = data[skip * 2:skip * 2 + first]
+        if first < length:
+            self._ring[:length - first] = data[skip * 2 + first:num_samples * 2]
+
+        sample_index = self._written
+        triggers = []
+        if self.threshold is not None:
+            num_blocks = num_samples // self.detect_size
+            if num_blocks:
+                power = np.sum(data[:num_blocks * self.detect_size * 2].astype(np.int32).reshape(num_blocks, -1) ** 2, axis=1)
+                level = 10 * np.log10(power / (self.detect_size * 128 ** 2) + 1e-20)
+                above = np.flatnonzero(level >= self.threshold)
+                if len(above):
+                    triggers.append((sample_index + int(above[0]) * self.detect_size, 'threshold', float(level[above[0]])))
+        if self.trigger_callback is not None and self.trigger_callback(data[:num_samples * 2], sample_index):
+            triggers.append((sample_index, 'callback', None))
+
+        with self._condition:
+            if not self._first_time:
+                self._first_time = time.time() - num_samples / self.sample_rate
+            self._written += num_samples
+            self._max_transfer = max(self._max_transfer, num_samples)
+            for index, reason, level in triggers:
+                self._add_event(index, reason, level)
+            self._condition.notify_all()
+
+    def trigger(self, reason: str = 'api') -> None:
+        '''Triggers at the newest received sample. Thread-safe.'''
+        with self._condition:
+            self._add_event(self._written, reason, None)
+            self._condition.notify_all()
+
+    def _add_event(self, index: int, reason: str, level: float | None) -> None:
+        max_length = self._pre_samples + self._post_samples
+        if self._events and index < self._events[-1]['end']:
+            event = self._events[-1]
+            end = index + self._post_samples
+            limit = event['start'] + max_length
+            if end <= limit:
+                event['end'] = max(event['end'], end)
+                return
+            event['end'] = limit
+            start = limit
+        else:
+            start = max(0, index - self._pre_samples, self._events[-1]['end'] if self._events else 0)
+            end = index + self._post_samples
+
+        self._events.append({'index': self._num_events, 'start': start, 'trigger': index, 'end': max(end, start + 1), 'reason': reason, 'level': level})
+        self._num_events += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and not (self._events and self._events[0]['end'] <= self._written):
+                    self._condition.wait(.1)
+                if not self._events:
+                    return
+                event = self._events.popleft()
+                written = self._written
+
+            self._write_event(event, min(event['end'], written))
+
+    def _copy(self, start: int, end: int) -> np.ndarray[Any, Any]:
+        position = (start % self._capacity) * 2
+        length = (end - start) * 2
+        if position + length <= len(self._ring):
+            return self._ring[position:position + length].copy()
+        return np.concatenate((self._ring[position:], self._ring[:position + length - len(self._ring)]))
+
+    def _write_event(self, event: dict[str, Any], end: int) -> None:
+        with self._condition:
+            # the oldest samples are overwritten by the transfer after the newest one, keep one transfer of margin
+            oldest = self._written + self._max_transfer - self._capacity
+        start = max(event['start'], oldest)
+        if end <= start:
+            self._truncated += 1
+            return
+
+        data = self._copy(start, end)
+        with self._condition:
+            oldest = self._written + self._max_transfer - self._capacity
+        if oldest > start:
+            data = data[(oldest - start) * 2:]
+            start = oldest
+        if start > event['start']:
+            self._truncated += 1
+
+        filename = f'{self.prefix}.{event["index"]:05d}'
+        with open(filename + DATA_EXTENSION, 'wb') as file:
+            if self.output_dtype == 'complex64':
+                (data.astype(np.float32) / 128).tofile(file)
+            else:
+                data.tofile(file)
+
+        annotation: dict[str, Any] = {
+            'core:sample_start': max(0, event['trigger'] - start),
+            'core:sample_count': end - max(start, event['trigger']),
+            'core:label': f'trigger ({event["reason"]})',
+        }
+        if event['level'] is not None:
+            annotation['pyhackrf:level_dbfs'] = round(event['level'], 2)
+
+        meta = {
+            'global': {
+                'core:datatype': OUTPUT_DTYPES[self.output_dtype],
+                'core:sample_rate': self.sample_rate,
+                'core:version': SIGMF_VERSION,
+                'core:recorder': 'python_hackrf',
+                **self.metadata,
+            },
+            'captures': [{'core:sample_start': 0, 'core:frequency': self.frequency, 'core:datetime': _datetime(self._first_time + start / self.sample_rate)}],
+            'annotations': [annotation],
+        }
+        with open(filename + META_EXTENSION, 'w') as file:
+            json.dump(meta, file, indent=2)
+
+        self._num_written += 1
+        if self.print_to_console:
+            sys.stderr.write(f'Event {event["index"]} ({event["reason"]}): {(end - start) / self.sample_rate:.3f} seconds written to {filename}{DATA_EXTENSION}\n')
+
+    def stop(self) -> None:
+        '''Writes pending events with the samples received so far and stops the writer.'''
+        if self._thread is None:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {
+                'samples': self._written,
+                'events': self._num_events,
+                'written': self._num_written,
+                'truncated': self._truncated,
+                'pending': len(self._events),
+                'ring_seconds': self._capacity / self.sample_rate if self.sample_rate else 0.0,
+            }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return f'Pre-trigger recorder: {stats["events"]} events, {stats["written"]} written, {stats["truncated"]} truncated, {stats["ring_seconds"]:.2f} s ring\n'
@@ -20,8 +20,65 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+from typing import Any
+
 from python_hackrf import pyhackrf
 
+PROBE_WORKERS = 8
+
+
+def probe_device(device_list: pyhackrf.PyHackRFDeviceList, index: int) -> dict[str, Any]:
+    '''
+    Opens the device at `index` of an already fetched device list and reads its static facts. pyhackrf serializes opening
+    and closing (libhackrf keeps open devices in an unguarded global array), the reads run without the GIL in parallel
+    with other probes.
+    '''
+    serial_number = device_list.serial_numbers[index]
+    device = pyhackrf.pyhackrf_device_list_open(device_list, index)
+    try:
+        board_id, board_id_name = device.pyhackrf_board_id_read()
+        board_rev, board_rev_name = device.pyhackrf_board_rev_read()
+        read_partid_serialno = device.pyhackrf_board_partid_serialno_read()
+        operacakes = [(address, device.pyhackrf_get_operacake_mode(address)) for address in device.pyhackrf_get_operacake_boards()]
+        return {
+            'serial_number': serial_number,
+            'board_id': board_id,
+            'board_id_name': board_id_name,
+            'board_rev': board_rev,
+            'board_rev_name': board_rev_name,
+            'firmware_version': device.pyhackrf_version_string_read(),
+            'usb_api_version': device.pyhackrf_usb_api_version_read(),
+            'part_id': read_partid_serialno[0],
+            'operacakes': operacakes,
+        }
+    finally:
+        device.pyhackrf_close()
+
+
+def probe_devices(device_list: pyhackrf.PyHackRFDeviceList, indices: list[int] | None = None, max_workers: int = PROBE_WORKERS) -> list[dict[str, Any]]:
+    '''
+    Probes the devices at `indices` of the device list (all of them by default) concurrently. A device that cannot be
+    opened (e.g. in use) gets an entry with an `error` key.
+    '''
+    serial_numbers = device_list.serial_numbers
+    if indices is None:
+        indices = list(range(len(serial_numbers)))
+
+    def probe(index: int) -> dict[str, Any]:
+        try:
+            return probe_device(device_list, index)
+        except Exception as e:
+            return {'serial_number': serial_numbers[index], 'error': str(e)}
+
+    if len(indices) < 2 or max_workers < 2:
+        return [probe(index) for index in indices]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(indices))) as executor:
+        return list(executor.map(probe, indices))
+
 
 def pyhackrf_info(print_to_console: bool = True, initialize: bool = True) -> str | None:
     if initialize:
@@ -33,34 +90,32 @@ def pyhackrf_info(print_to_console: bool = True, initialize: bool = True) -> str
     print_info += f'libhackrf version: {pyhackrf.pyhackrf_library_release()} ({pyhackrf.pyhackrf_library_version()})\n'
 
     if device_list.device_count > 0:
-        for i in range(device_list.device_count):
+        for i, info in enumerate(probe_devices(device_list)):
             print_info += 'Found HackRF:\n'
-            device = pyhackrf.pyhackrf_open_by_serial(device_list.serial_numbers[i])
-            if device:
-                board_id, board_id_name = device.pyhackrf_board_id_read()
-                board_rev, board_rev_name = device.pyhackrf_board_rev_read()
-                read_partid_serialno = device.pyhackrf_board_partid_serialno_read()
+            if 'error' in info:
                 print_info += f'Index: {i}\n'
-                print_info += f'Serial number: {device_list.serial_numbers[i]}\n'
-                print_info += f'Board ID Number: {board_id} ({board_id_name})\n'
-                print_info += f'Firmware Version: {device.pyhackrf_version_string_read()} ({device.pyhackrf_usb_api_version_read()})\n'
-                print_info += f'Part ID Number: 0x{read_partid_serialno[0][0]:08x} 0x{read_partid_serialno[0][1]:08x}\n'
-                if board_rev not in {0xFE, 0xFF}:
-                    print_info += f'Hardware Revision: {board_rev_name}\n'
-                    if board_rev > 0:
-                        if (board_rev & 0x80):
-                            print_info += 'Hardware appears to have been manufactured by Great Scott Gadgets.\n'
-                        else:
-                            print_info += 'Hardware does not appear to have been manufactured by Great Scott Gadgets.\n'
-                else:
-                    print_info += f'{board_rev_name}\n'
-
-                operacake_boards = device.pyhackrf_get_operacake_boards()
-                for operacake_board_address in operacake_boards:
-                    mode = device.pyhackrf_get_operacake_mode(operacake_board_address)
-                    print_info += f'Opera Cake found, address: {operacake_board_address} | switching mode: {mode}'
-
-                device.pyhackrf_close()
+                print_info += f'Serial number: {info["serial_number"]}\n'
+                print_info += f'{info["error"]}\n'
+                continue
+
+            board_rev = info['board_rev']
+            print_info += f'Index: {i}\n'
+            print_info += f'Serial number: {info["serial_number"]}\n'
+            print_info += f'Board ID Number: {info["board_id"]} ({info["board_id_name"]})\n'
+            print_info += f'Firmware Version: {info["firmware_version"]} ({info["usb_api_version"]})\n'
+            print_info += f'Part ID Number: 0x{info["part_id"][0]:08x} 0x{info["part_id"][1]:08x}\n'
+            if board_rev not in {0xFE, 0xFF}:
+                print_info += f'Hardware Revision: {info["board_rev_name"]}\n'
+                if board_rev > 0:
+                    if (board_rev & 0x80):
+                        print_info += 'Hardware appears to have been manufactured by Great Scott Gadgets.\n'
+                    else:
+                        print_info += 'Hardware does not appear to have been manufactured by Great Scott Gadgets.\n'
+            else:
+                print_info += f'{info["board_rev_name"]}\n'
+
+            for operacake_board_address, mode in info['operacakes']:
+                print_info += f'Opera Cake found, address: {operacake_board_address} | switching mode: {mode}\n'
     else:
         print_info += 'No HackRF boards found.'
 
@@ -92,3 +147,134 @@ def pyhackrf_serial_numbers_list_info(print_to_console: bool = True, initialize:
         return None
 
     return device_count, serial_numbers
+
+
+class DeviceInventory:
+    '''
+    Cached inventory of connected HackRFs.
+    Static facts of every device (board id and revision, firmware and USB API version, part id, Opera Cake boards) are
+    read once per serial number, with new devices probed concurrently, and queries are answered from the cache without
+    touching USB. refresh() enumerates the USB device list (no device is opened), drops unplugged devices and probes
+    only new ones; a device that could not be opened (usually because it is streaming) is retried on the next refresh.
+    start() refreshes every `poll_interval` seconds on a background thread to follow hotplug. Thread-safe.
+    '''
+    def __init__(self, max_workers: int = PROBE_WORKERS, poll_interval: float = 2.0, initialize: bool = True) -> None:
+        self.max_workers = int(max_workers)
+        self.poll_interval = float(poll_interval)
+        self.initialize = initialize
+
+        self._devices: dict[str, dict[str, Any]] = {}
+        self._errors: dict[str, str] = {}
+        self._serial_numbers: list[str] = []
+        self._lock = Lock()
+        self._refresh_lock = Lock()
+        self._refreshed = False
+        self._last_refresh = 0.0
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+        if self.initialize:
+            pyhackrf.pyhackrf_init()
+
+    def __enter__(self) -> 'DeviceInventory':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def refresh(self, force: bool = False) -> bool:
+        '''Re-reads the USB device list and probes devices not in the cache. Returns True when the inventory changed.'''
+        with self._refresh_lock:
+            device_list = pyhackrf.pyhackrf_device_list()
+            serial_numbers = device_list.serial_numbers
+
+            with self._lock:
+                changed = serial_numbers != self._serial_numbers
+                if force:
+                    self._devices.clear()
+                for serial_number in set(self._devices) - set(serial_numbers):
+                    del self._devices[serial_number]
+                to_probe = [index for index, serial_number in enumerate(serial_numbers) if serial_number not in self._devices]
+
+            results = probe_devices(device_list, to_probe, self.max_workers) if to_probe else []
+            del device_list
+
+            with self._lock:
+                self._errors = {}
+                for info in results:
+                    if 'error' in info:
+                        self._errors[info['serial_number']] = info['error']
+                    else:
+                        self._devices[info['serial_number']] = info
+                        changed = True
+                self._serial_numbers = serial_numbers
+                self._refreshed = True
+                self._last_refresh = time.time()
+
+            return changed
+
+    def _ensure(self) -> None:
+        if not self._refreshed:
+            self.refresh()
+
+    def serial_numbers(self) -> list[str]:
+        self._ensure()
+        with self._lock:
+            return list(self._serial_numbers)
+
+    def get(self, serial_number: str) -> dict[str, Any] | None:
+        '''Cached facts of one device, None if it is unknown or could not be probed yet.'''
+        self._ensure()
+        with self._lock:
+            return self._devices.get(serial_number)
+
+    def devices(self) -> list[dict[str, Any]]:
+        '''Cached facts of all probed devices in USB enumeration order.'''
+        self._ensure()
+        with self._lock:
+            return [self._devices[serial_number] for serial_number in self._serial_numbers if serial_number in self._devices]
+
+    def find(self, **facts: Any) -> list[str]:
+        '''Serial numbers of devices whose facts match, e.g. find(board_id_name='HackRF One').'''
+        return [info['serial_number'] for info in self.devices() if all(info.get(key) == value for key, value in facts.items())]
+
+    def errors(self) -> dict[str, str]:
+        '''Devices that could not be probed on the last refresh.'''
+        with self._lock:
+            return dict(self._errors)
+
+    def invalidate(self, serial_number: str | None = None) -> None:
+        '''Drops one device (or all) from the cache, it is probed again on the next refresh.'''
+        with self._lock:
+            if serial_number is None:
+                self._devices.clear()
+                self._refreshed = False
+            else:
+                self._devices.pop(serial_number, None)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(0.0, self._last_refresh + self.poll_interval - time.time())):
+            try:
+                self.refresh()
+            except Exception:
+                self._last_refresh = time.time()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+        if self.initialize:
+            self.initialize = False
+            pyhackrf.pyhackrf_exit()
@@ -1,10 +1,15 @@
+from python_hackrf.pyhackrf_tools.channelizer import PolyphaseChannelizer
+from python_hackrf.pyhackrf_tools.scheduler import HopScheduler
+from python_hackrf.pyhackrf_tools.analysis import HopAnalyzer
+
 def stop_all() -> None:
     ...
 
 def stop_sdr(serialno: str) -> None:
     ...
 
-def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object, sample_rate: int = 20_000_000, baseband_filter_bandwidth: int | None = None,
+def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object | None, sample_rate: int = 20_000_000, baseband_filter_bandwidth: int | None = None,
                   lna_gain: int = 16, vga_gain: int = 20, amp_enable: bool = False, antenna_enable: bool = False, serial_number: str | None = None,
-                  print_to_console: bool = True) -> None:
+                  channelizer: PolyphaseChannelizer | None = None, sink: object | None = None, scheduler: HopScheduler | None = None, analyzer: HopAnalyzer | None = None,
+                  queue_capacity: int = 0, queue_policy: str = 'drop_oldest', print_to_console: bool = True) -> None:
     ...
@@ -25,6 +25,8 @@
 # cython: freethreading_compatible = True
 from libc.stdint cimport uint64_t, uint32_t, uint8_t
 from python_hackrf.pylibhackrf cimport pyhackrf as c_pyhackrf
+from python_hackrf.pyhackrf_tools cimport kernels
+from python_hackrf.pyhackrf_tools import channel
 from python_hackrf import pyhackrf
 from libcpp.atomic cimport atomic
 cimport numpy as cnp
@@ -55,9 +57,12 @@ def sigint_callback_handler(sig, frame, sdr_id):
 def init_signals() -> int:
     global working_sdrs
 
+    # claims a free slot atomically, so concurrent pyhackrf_* calls from several threads never share a device_id
+    cdef uint8_t expected
     sdr_id = -1
     for i in range(16):
-        if working_sdrs[i].load() == 0:
+        expected = 0
+        if working_sdrs[i].compare_exchange_strong(expected, 1):
             sdr_id = i
             break
 
@@ -81,8 +86,9 @@ def stop_all() -> None:
 
 def stop_sdr(serialno: str) -> None:
     global sdr_ids, working_sdrs
-    if serialno in sdr_ids:
-        working_sdrs[sdr_ids[serialno]].store(0)
+    sdr_id = sdr_ids.get(serialno)
+    if sdr_id is not None:
+        working_sdrs[sdr_id].store(0)
 
 
 cpdef int rx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t, ndim=1] buffer, int buffer_length, int valid_length):
@@ -90,7 +96,6 @@ cpdef int rx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
 
     cdef dict device_data = device.device_data
     cdef uint8_t device_id = device_data['device_id']
-    cdef double divider = 1 / 128
 
     if not working_sdrs[device_id].load():
         device_data['close_ready'].set()
@@ -99,12 +104,13 @@ cpdef int rx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
 
     cdef uint64_t to_read = valid_length
     if device_data['num_samples'] > 0:
-        device_data['accepted_bytes'] += valid_length
+        with device_data['lock']:
+            device_data['accepted_bytes'] += valid_length
 
         if (to_read > device_data['num_samples'] * 2):
             to_read = device_data['num_samples'] * 2
 
-        device_data['buffer'][device_data['samples_per_scan'] - device_data['num_samples']: device_data['samples_per_scan'] - device_data['num_samples'] + (to_read // 2)] = (buffer[:to_read:2] * divider + 1j * buffer[1:to_read:2] * divider).astype(np.complex64)
+        kernels.int8_to_complex64(buffer[:to_read], device_data['buffer'][device_data['samples_per_scan'] - device_data['num_samples']:])
         device_data['num_samples'] -= (to_read // 2)
 
         if device_data['num_samples'] == 0:
@@ -115,23 +121,30 @@ cpdef int rx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
     return 0
 
 
-def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object, sample_rate: int = 20_000_000, baseband_filter_bandwidth: int | None = None,
+def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object | None, sample_rate: int = 20_000_000, baseband_filter_bandwidth: int | None = None,
                   lna_gain: int = 16, vga_gain: int = 20, amp_enable: bool = False, antenna_enable: bool = False, serial_number: str | None = None,
-                  print_to_console: bool = True) -> None:
+                  channelizer: object | None = None, sink: object | None = None, scheduler: object | None = None, analyzer: object | None = None,
+                  queue_capacity: int = 0, queue_policy: str = 'drop_oldest', print_to_console: bool = True) -> None:
 
     global working_sdrs, sdr_ids
 
-    cdef uint8_t device_id = init_signals()
-    cdef c_pyhackrf.PyHackrfDevice device
+    cdef int sdr_id = init_signals()
+    if sdr_id < 0:
+        raise RuntimeError('all 16 device slots are in use')
 
-    pyhackrf.pyhackrf_init()
+    cdef uint8_t device_id = sdr_id
+    cdef c_pyhackrf.PyHackrfDevice device
 
-    if serial_number is None:
-        device = pyhackrf.pyhackrf_open()
-    else:
-        device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+    try:
+        pyhackrf.pyhackrf_init()
+        if serial_number is None:
+            device = pyhackrf.pyhackrf_open()
+        else:
+            device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+    except Exception:
+        working_sdrs[device_id].store(0)
+        raise
 
-    working_sdrs[device_id].store(1)
     sdr_ids[device.serialno] = device_id
 
     sample_rate = int(sample_rate) if int(sample_rate) in AVAILABLE_SAMPLING_RATES else 20_000_000
@@ -168,6 +181,10 @@ def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object,
             sys.stderr.write('call pyhackrf_set_antenna_enable(True)\n')
         device.pyhackrf_set_antenna_enable(True)
 
+    if queue is not None and queue_capacity and not isinstance(queue, channel.OutputChannel):
+        # bound a caller-supplied queue.Queue from the producer side, OutputChannel queues carry their own bound
+        queue = channel.BoundedQueue(queue, queue_capacity, queue_policy)
+
     num_ranges = len(frequencies) // 2
     calculated_frequencies = []
     if pyhackrf.PY_MAX_SWEEP_RANGES < num_ranges:
@@ -196,15 +213,33 @@ def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object,
         if print_to_console:
             sys.stderr.write(f'Scaning from {frequencies[2 * i] / 1e6} MHz to {frequencies[2 * i + 1] / 1e6} MHz\n')
 
-    cdef cnp.ndarray buffer = np.empty(samples_per_scan, dtype=np.complex64)
+    cdef uint32_t tune_step = 0
+    cdef uint32_t tune_steps = len(calculated_frequencies)
+    cdef uint64_t hop_frequency = calculated_frequencies[tune_step]
+    cdef uint64_t hop_samples = samples_per_scan
+    cdef uint64_t hop_count = 0
+
+    if scheduler is not None:
+        scheduler.set_steps(calculated_frequencies, sample_rate, samples_per_scan)
+        hop_frequency, hop_samples = scheduler.next_hop(time.time(), None)
+
+    if analyzer is not None:
+        analyzer.set_steps(calculated_frequencies, sample_rate)
+        analyzer.start()
+
+    # one buffer per dwell length, hops with the same dwell reuse it
+    cdef dict buffers = {hop_samples: np.empty(hop_samples, dtype=np.complex64)}
+    cdef cnp.ndarray buffer = buffers[hop_samples]
     cdef dict device_data = {
         'device_id': device_id,
 
         'accepted_bytes': 0,
 
-        'samples_per_scan': samples_per_scan,
-        'num_samples': samples_per_scan,
+        'samples_per_scan': hop_samples,
+        'num_samples': hop_samples,
         'close_ready': threading.Event(),
+        # guards counters updated by the libusb callback thread and read/reset by this thread
+        'lock': threading.Lock(),
         'hop_ready': threading.Event(),
         
         'buffer': buffer,
@@ -220,11 +255,9 @@ def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object,
     cdef double scan_rate = 0
     cdef double time_now = 0
     cdef uint64_t scan_count = 0
-    cdef uint32_t tune_step = 0
-    cdef uint32_t tune_steps = len(calculated_frequencies)
     cdef double delay = float(os.environ.get('pyhackrf_scan_await_time', 0.0002))
 
-    device.pyhackrf_set_freq(calculated_frequencies[tune_step] + offset)
+    device.pyhackrf_set_freq(hop_frequency + offset)
     device.pyhackrf_start_rx()
 
     while device.pyhackrf_is_streaming() and working_sdrs[device_id].load():
@@ -236,33 +269,63 @@ def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object,
                 scan_rate = scan_count / (time_now - time_start)
                 sys.stderr.write(f'{scan_count} total scans completed, {round(scan_rate, 2)} scans/second\n')
 
-            if device_data['accepted_bytes'] == 0:
+            with device_data['lock']:
+                accepted_bytes = device_data['accepted_bytes']
+                device_data['accepted_bytes'] = 0
+
+            if accepted_bytes == 0:
                 if print_to_console:
                     sys.stderr.write('Couldn\'t transfer any data for one second.\n')
                 break
-
-            device_data['accepted_bytes'] = 0
             time_prev = time_now
 
         if device_data['hop_ready'].wait():
             device_data['hop_ready'].clear()
             device.pyhackrf_stop_rx()
 
-            queue.put({
-                'start_frequency': calculated_frequencies[tune_step],
-                'stop_frequency': calculated_frequencies[tune_step] + sample_rate,
+            hop = {
+                'start_frequency': hop_frequency,
+                'stop_frequency': hop_frequency + sample_rate,
                 'raw_iq': buffer.copy(),
                 'timestamp': timestamp,
-            })
+            }
 
-            tune_step = (tune_step + 1) % tune_steps
-            device.pyhackrf_set_freq(calculated_frequencies[tune_step] + offset)
-            time.sleep(delay)
+            if channelizer is not None:
+                # hops are not contiguous, every hop starts with a clean filter state
+                channelizer.reset()
+                hop['channels'] = channelizer.process(hop['raw_iq'])
+
+            if sink is not None:
+                sink.write_iq(timestamp, hop_frequency + offset, sample_rate, hop['raw_iq'])
+
+            if analyzer is not None:
+                analyzer.submit(timestamp, hop_frequency, sample_rate, hop['raw_iq'])
 
-            if tune_step == 0:
-                scan_count += 1
+            if queue is not None:
+                queue.put(hop)
 
-            device_data['num_samples'] = samples_per_scan
+            hop_count += 1
+            if scheduler is not None:
+                hop_frequency, hop_samples = scheduler.next_hop(time.time(), hop_frequency)
+                if hop_samples not in buffers:
+                    buffers[hop_samples] = np.empty(hop_samples, dtype=np.complex64)
+                buffer = buffers[hop_samples]
+                device_data['buffer'] = buffer
+                device_data['samples_per_scan'] = hop_samples
+
+                if hop_count % max(1, scheduler.num_hops()) == 0:
+                    scan_count += 1
+            else:
+                tune_step = (tune_step + 1) % tune_steps
+                hop_frequency = calculated_frequencies[tune_step]
+
+                if tune_step == 0:
+                    scan_count += 1
+
+            device.pyhackrf_set_freq(hop_frequency + offset)
+            time.sleep(delay)
+
+            device_data['num_samples'] = hop_samples
 
             timestamp = time.time()
             device.pyhackrf_start_rx()
@@ -281,6 +344,19 @@ def pyhackrf_scan(frequencies: list[int], samples_per_scan: int, queue: object,
     if print_to_console:
         sys.stderr.write(f'Total scans: {scan_count} in {time_now - time_start:.5f} seconds ({scan_rate :.2f} scans/second)\n')
 
+    if scheduler is not None and print_to_console:
+        for band in scheduler.stats():
+            revisit = f'{band["revisit_interval"]:.3f} s' if band['revisit_interval'] is not None else 'n/a'
+            sys.stderr.write(f'band {band["band"]}: {band["hops"]} hops, {band["visits"]} visits, revisit {revisit}\n')
+
+    if hasattr(queue, 'format_stats') and print_to_console:
+        sys.stderr.write(queue.format_stats())
+
+    if analyzer is not None:
+        analyzer.stop()
+        if print_to_console:
+            sys.stderr.write(analyzer.format_stats())
+
     working_sdrs[device_id].store(0)
     device_data['close_ready'].wait()
     sdr_ids.pop(device.serialno, None)
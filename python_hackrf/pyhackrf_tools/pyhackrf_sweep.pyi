@@ -1,4 +1,14 @@
+import numpy as np
+
 from python_hackrf import pyhackrf
+from python_hackrf.pyhackrf_tools.detection import SignalDetector
+from python_hackrf.pyhackrf_tools.occupancy import OccupancyAccumulator
+from python_hackrf.pyhackrf_tools.planner import AdaptiveSweepPlanner
+from python_hackrf.pyhackrf_tools.fft_backend import FFTBackend
+from python_hackrf.pyhackrf_tools.calibration import SweepCalibration
+
+def sweep_record_dtype(num_bins: int, port: bool = False) -> np.dtype:
+    ...
 
 def stop_all() -> None:
     ...
@@ -11,5 +21,9 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
                    sweep_style: pyhackrf.py_sweep_style = pyhackrf.py_sweep_style.INTERLEAVED, serial_number: str | None = None,
                    binary_output: bool = False, one_shot: bool = False, num_sweeps: int | None = None,
                    filename: str | None = None, queue: object | None = None,
-                   print_to_console: bool = True) -> None:
+                   num_segments: int = 1, segment_overlap: float = 0.5, detector: SignalDetector | None = None,
+                   occupancy: OccupancyAccumulator | None = None, sink: object | None = None, planner: AdaptiveSweepPlanner | None = None,
+                   operacake_ports: list[str] | None = None, operacake_address: int = 0, operacake_samples_per_step: int = 24576,
+                   fft_backend: str | FFTBackend | None = None, fft_workers: int = 1, batch_output: bool = False, calibration: SweepCalibration | None = None,
+                   queue_capacity: int = 0, queue_policy: str = 'drop_oldest', print_to_console: bool = True) -> None:
     ...
@@ -23,16 +23,11 @@
 # distutils: language = c++
 # cython: language_level = 3str
 # cython: freethreading_compatible = True
-try:
-    from pyfftw.interfaces.numpy_fft import fft, fftshift  # type: ignore
-except ImportError:
-    try:
-        from scipy.fft import fft, fftshift  # type: ignore
-    except ImportError:
-        from numpy.fft import fft, fftshift  # type: ignore
-
 from libc.stdint cimport uint64_t, uint32_t, uint8_t
 from python_hackrf.pylibhackrf cimport pyhackrf as c_pyhackrf
+from python_hackrf.pyhackrf_tools cimport kernels
+from numpy.lib.stride_tricks import sliding_window_view
+from python_hackrf.pyhackrf_tools import channel, detection, fft_backend as fft_backends
 from python_hackrf import pyhackrf
 from libcpp.atomic cimport atomic
 cimport numpy as cnp
@@ -58,11 +53,24 @@ AVAILABLE_SAMPLING_RATES = (2_000_000, 4_000_000, 6_000_000, 8_000_000, 10_000_0
 AVAILABLE_BASEBAND_FILTER_BANDWIDTHS = (1_750_000, 2_500_000, 3_500_000, 5_000_000, 5_500_000, 6_000_000, 7_000_000, 8_000_000, 9_000_000, 10_000_000, 12_000_000, 14_000_000, 15_000_000, 20_000_000, 24_000_000, 28_000_000)
 INTERLEAVED_OFFSET_RATIO = 0.375
 LINEAR_OFFSET_RATIO = 0.5
+BLOCK_HEADER_SIZE = 16  # bytes reserved for the block header (0x7f 0x7f + uint64 frequency)
+MAX_BLOCK_SAMPLES = 8184  # (PY_BYTES_PER_BLOCK - BLOCK_HEADER_SIZE) // 2
+# samples clocked per tune step: the captured block plus the blocks the firmware discards after retuning
+OPERACAKE_SAMPLES_PER_STEP = 3 * 8192
 
 cdef atomic[uint8_t] working_sdrs[16]
 cdef dict sdr_ids = {}
 
 
+def sweep_record_dtype(num_bins: int, port: bool = False) -> np.dtype:
+    '''Structured record put on the queue in batch_output mode, one row per spectrum (port is a uint8 Opera Cake port index).'''
+    fields = [('timestamp_ns', np.int64), ('start_frequency', np.uint64), ('stop_frequency', np.uint64)]
+    if port:
+        fields.append(('port', np.uint8))
+    fields.append(('dbfs', np.float32, (num_bins,)))
+    return np.dtype(fields)
+
+
 def sigint_callback_handler(sig, frame, sdr_id):
     global working_sdrs
     working_sdrs[sdr_id].store(0)
@@ -71,9 +79,12 @@ def sigint_callback_handler(sig, frame, sdr_id):
 def init_signals() -> int:
     global working_sdrs
 
+    # claims a free slot atomically, so concurrent pyhackrf_* calls from several threads never share a device_id
+    cdef uint8_t expected
     sdr_id = -1
     for i in range(16):
-        if working_sdrs[i].load() == 0:
+        expected = 0
+        if working_sdrs[i].compare_exchange_strong(expected, 1):
             sdr_id = i
             break
 
@@ -97,8 +108,35 @@ def stop_all() -> None:
 
 def stop_sdr(serialno: str) -> None:
     global sdr_ids, working_sdrs
-    if serialno in sdr_ids:
-        working_sdrs[sdr_ids[serialno]].store(0)
+    sdr_id = sdr_ids.get(serialno)
+    if sdr_id is not None:
+        working_sdrs[sdr_id].store(0)
+
+
+cdef uint64_t last_start_step(list frequencies, double tune_step):
+    # position of the last tune step inside one pass that retunes to the first range start again (0 if there is none);
+    # plans that repeat a range reach the start frequency mid-pass, only a return after this position ends the pass
+    cdef uint64_t start_frequency = int(frequencies[0] * 1e6)
+    cdef uint64_t position = 0
+    cdef uint64_t last = 0
+    for i in range(len(frequencies) // 2):
+        for step in range(int((frequencies[2 * i + 1] - frequencies[2 * i]) // tune_step)):
+            if position and int((frequencies[2 * i] + step * tune_step) * 1e6) == start_frequency:
+                last = position
+            position += 1
+    return last
+
+
+cdef void write_events(dict device_data, list events):
+    for event in events:
+        if device_data['queue'] is not None:
+            device_data['queue'].put(event)
+        elif device_data['file'] is None:
+            continue
+        elif device_data['binary_output']:
+            device_data['file'].write(detection.pack_event(event))
+        else:
+            device_data['file'].write(detection.format_event(event))
 
 
 @cython.boundscheck(False)
@@ -106,22 +144,37 @@ def stop_sdr(serialno: str) -> None:
 cpdef int sweep_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t, ndim=1] buffer, int buffer_length, int valid_length):
     global working_sdrs
 
-    cdef str time_str = datetime.datetime.now().strftime('%Y-%m-%d, %H:%M:%S.%f')
+    cdef double timestamp = time.time()
+    cdef str time_str = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d, %H:%M:%S.%f')
 
     cdef dict device_data = device.device_data
-    cdef uint32_t data_length = device_data['fft_size'] * 2
+    cdef uint32_t data_length = device_data['data_length']
+    cdef uint32_t segment_step = device_data['segment_step']
     cdef object sweep_style = device_data['sweep_style']
     cdef uint32_t sample_rate = device_data['sample_rate']
     cdef uint32_t fft_size = device_data['fft_size']
     cdef cnp.ndarray window = device_data['window']
     cdef double psd_norm = device_data['psd_norm']
     cdef uint8_t device_id = device_data['device_id']
-    cdef double divider = 1 / 128
+    cdef object fft_backend = device_data['fft_backend']
 
     cdef uint64_t start_frequency = device_data['start_frequency']
+    cdef object detector = device_data['detector']
+    cdef object occupancy = device_data['occupancy']
+    cdef object sink = device_data['sink']
+    cdef object planner = device_data['planner']
+    cdef object calibration = device_data['calibration']
+    cdef list operacake_ports = device_data['operacake_ports']
+    cdef object records = None
+    cdef uint32_t num_records = 0
+    cdef object port = None
+    cdef str port_str = ''
+    cdef list events
 
     cdef cnp.ndarray fft_out
+    cdef cnp.ndarray segments
     cdef cnp.ndarray raw_iq
+    cdef cnp.ndarray spectra
     cdef cnp.ndarray dbfs
 
     cdef uint32_t fft_1_start = 1 + (fft_size * 5) // 8
@@ -133,49 +186,115 @@ cpdef int sweep_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_
     cdef uint64_t frequency = 0
     cdef uint32_t index = 0
     cdef uint32_t i, j
+    cdef bint stopping = False
+    cdef list block_indices = []
+    cdef list block_frequencies = []
+    cdef list block_ports = []
 
+    # pass 1: parse headers and sweep state, collect the blocks to transform
     for j in range(PY_BLOCKS_PER_TRANSFER):
+        index = j * pyhackrf.PY_BYTES_PER_BLOCK
         if buffer[index] == 127 and buffer[index + 1] == 127:
             frequency = np.frombuffer(buffer[index + 2:index + 10].tobytes(), dtype=np.uint64)[0]
         else:
-            index += pyhackrf.PY_BYTES_PER_BLOCK
             continue
 
         if frequency == start_frequency:
-            if device_data['sweep_started']:
+            if not device_data['sweep_started']:
+                device_data['sweep_started'] = True
+                device_data['sweep_step'] = 0
+            elif device_data['sweep_step'] > device_data['last_start_step']:
                 device_data['sweep_count'] += 1
+                device_data['sweep_step'] = 0
                 if (
                     device_data['one_shot'] or
                     device_data['num_sweeps'] == device_data['sweep_count']
                 ):
                     working_sdrs[device_id].store(0)
-            else:
-                device_data['sweep_started'] = True
 
         if not working_sdrs[device_id].load():
-            device_data['close_ready'].set()
-            return -1
+            stopping = True
+            break
 
         if not device_data['sweep_started']:
-            index += pyhackrf.PY_BYTES_PER_BLOCK
             continue
 
+        if operacake_ports is not None:
+            # Opera Cake time mode dwells one full pass on every port, starting with the first pass of the stream;
+            # the port follows the pass count, so dropped transfers inside a pass do not shift it
+            port = operacake_ports[device_data['sweep_count'] % len(operacake_ports)]
+
+        device_data['sweep_step'] += 1
+
         if FREQ_MAX_HZ < frequency:
-            index += pyhackrf.PY_BYTES_PER_BLOCK
             continue
 
-        index += (pyhackrf.PY_BYTES_PER_BLOCK - data_length)
-
-        raw_iq = buffer[index:index + data_length:2] * divider + 1j * buffer[index + 1:index + data_length:2] * divider
-        fft_out = fft((raw_iq - raw_iq.mean()) * window)
-        dbfs = np.log10((fft_out.real**2 + fft_out.imag**2) * psd_norm + 1e-300) * 10.0
+        block_indices.append(j)
+        block_frequencies.append(frequency)
+        block_ports.append(port)
+
+    if block_indices:
+        # Welch over every collected block at once: overlapping windowed segments, one batched FFT, averaged power.
+        # The batch is always a full transfer (unused blocks zeroed), so the FFT plan prepared at start is the only one
+        raw_iq = np.empty((PY_BLOCKS_PER_TRANSFER, data_length // 2), dtype=np.complex64)
+        for i in range(len(block_indices)):
+            index = (block_indices[i] + 1) * pyhackrf.PY_BYTES_PER_BLOCK
+            kernels.int8_to_complex64(buffer[index - data_length:index], raw_iq[i])
+        raw_iq[len(block_indices):] = 0
+        segments = sliding_window_view(raw_iq, fft_size, axis=1)[:, ::segment_step]
+        fft_out = fft_backend.fft(((segments - segments.mean(axis=2, keepdims=True)) * window).reshape(-1, fft_size))
+        fft_out = fft_out.reshape(PY_BLOCKS_PER_TRANSFER, -1, fft_size)[:len(block_indices)]
+        spectra = np.log10(np.mean(fft_out.real**2 + fft_out.imag**2, axis=1) * psd_norm + 1e-300) * 10.0
 
         if sweep_style == pyhackrf.py_sweep_style.LINEAR:
-            dbfs = fftshift(dbfs)
+            spectra = fft_backend.fftshift(spectra, axes=1)
+
+        if calibration is not None:
+            # correction vectors are precomputed per tune step, each block gets its row added in place
+            calibration.apply(spectra, block_frequencies)
+
+    # pass 2: output
+    for j in range(len(block_indices)):
+        frequency = block_frequencies[j]
+        port = block_ports[j]
+        port_str = f'{port}, ' if port is not None else ''
+        dbfs = spectra[j]
+
+        if planner is not None:
+            if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
+                planner.update(timestamp, frequency, np.concatenate((dbfs[fft_1_start:fft_1_stop], dbfs[fft_2_start:fft_2_stop])))
+            else:
+                planner.update(timestamp, frequency, dbfs)
 
-        index += data_length
+        if occupancy is not None:
+            if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
+                occupancy.update(frequency, sample_rate / fft_size, dbfs[fft_1_start:fft_1_stop])
+                occupancy.update(frequency + sample_rate // 2, sample_rate / fft_size, dbfs[fft_2_start:fft_2_stop])
+            else:
+                occupancy.update(frequency, sample_rate / fft_size, dbfs)
+
+        if sink is not None:
+            if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
+                sink.write_spectrum(timestamp, frequency, frequency + sample_rate // 4, dbfs[fft_1_start:fft_1_stop])
+                sink.write_spectrum(timestamp, frequency + sample_rate // 2, frequency + (sample_rate * 3) // 4, dbfs[fft_2_start:fft_2_stop])
+            else:
+                sink.write_spectrum(timestamp, frequency, frequency + sample_rate, dbfs)
+
+        if detector is not None:
+            if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
+                events = detector.update(timestamp, frequency, sample_rate / fft_size, dbfs[fft_1_start:fft_1_stop])
+                events += detector.update(timestamp, frequency + sample_rate // 2, sample_rate / fft_size, dbfs[fft_2_start:fft_2_stop])
+            else:
+                events = detector.update(timestamp, frequency, sample_rate / fft_size, dbfs)
+
+            write_events(device_data, events)
 
-        if device_data['binary_output']:
+        elif device_data['file'] is None and device_data['queue'] is None:
+            # spectra go only to occupancy statistics or the sink
+            pass
+
+        elif device_data['binary_output']:
+            # hackrf_sweep record layout, the Opera Cake port is not part of it
             if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
                 record_length = 16 + (fft_size // 4) * 4
                 line = struct.pack('I', record_length)
@@ -196,6 +315,30 @@ cpdef int sweep_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_
 
             device_data['file'].write(line)
 
+        elif device_data['queue'] is not None and device_data['batch_output']:
+            # one structured array per transfer, put once after the loop
+            if records is None:
+                records = np.empty(len(block_indices) * (2 if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED else 1), dtype=device_data['record_dtype'])
+                records['timestamp_ns'] = int(timestamp * 1e9)
+
+            if port is not None:
+                records['port'][num_records:num_records + (2 if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED else 1)] = pyhackrf.py_operacake_ports[port]
+
+            if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
+                records['start_frequency'][num_records] = frequency
+                records['stop_frequency'][num_records] = frequency + sample_rate // 4
+                records['dbfs'][num_records] = dbfs[fft_1_start:fft_1_stop]
+                records['start_frequency'][num_records + 1] = frequency + sample_rate // 2
+                records['stop_frequency'][num_records + 1] = frequency + (sample_rate * 3) // 4
+                records['dbfs'][num_records + 1] = dbfs[fft_2_start:fft_2_stop]
+                num_records += 2
+
+            else:
+                records['start_frequency'][num_records] = frequency
+                records['stop_frequency'][num_records] = frequency + sample_rate
+                records['dbfs'][num_records] = dbfs
+                num_records += 1
+
         elif device_data['queue'] is not None:
             if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
                 device_data['queue'].put({
@@ -203,12 +346,14 @@ cpdef int sweep_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_
                     'start_frequency': frequency,
                     'stop_frequency': frequency + sample_rate // 4,
                     'dbfs': dbfs[fft_1_start:fft_1_stop].astype(np.float32),
+                    'port': port,
                 })
                 device_data['queue'].put({
                     'timestamp': time_str,
                     'start_frequency': frequency + sample_rate // 2,
                     'stop_frequency': frequency + (sample_rate * 3) // 4,
                     'dbfs': dbfs[fft_2_start:fft_2_stop].astype(np.float32),
+                    'port': port,
                 })
 
             else:
@@ -217,27 +362,36 @@ cpdef int sweep_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_
                     'start_frequency': frequency,
                     'stop_frequency': frequency + sample_rate,
                     'dbfs': dbfs.astype(np.float32),
+                    'port': port,
                 })
 
         else:
             if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED:
-                line = f'{time_str}, {frequency}, {frequency + sample_rate // 4}, {sample_rate / fft_size}, {fft_size}, '
+                line = f'{time_str}, {frequency}, {frequency + sample_rate // 4}, {sample_rate / fft_size}, {fft_size}, {port_str}'
                 for value in dbfs[fft_1_start:fft_1_stop]:
                     line += f'{value:.10f}, '
-                line += f'\n{time_str}, {frequency + sample_rate // 2}, {frequency + (sample_rate * 3) // 4}, {sample_rate / fft_size}, {fft_size}, '
+                line += f'\n{time_str}, {frequency + sample_rate // 2}, {frequency + (sample_rate * 3) // 4}, {sample_rate / fft_size}, {fft_size}, {port_str}'
                 for value in dbfs[fft_2_start:fft_2_stop]:
                     line += f'{value:.10f}, '
                 line = line[:len(line) - 2] + '\n'
 
             else:
-                line = f'{time_str}, {frequency}, {frequency + sample_rate}, {sample_rate / fft_size}, {fft_size}, '
+                line = f'{time_str}, {frequency}, {frequency + sample_rate}, {sample_rate / fft_size}, {fft_size}, {port_str}'
                 for i in range(len(dbfs)):
                     line += f'{dbfs[i]:.2f}, '
                 line = line[:len(line) - 2] + '\n'
 
             device_data['file'].write(line)
 
-    device_data['accepted_bytes'] += valid_length
+    if records is not None:
+        device_data['queue'].put(records)
+
+    if stopping:
+        device_data['close_ready'].set()
+        return -1
+
+    with device_data['lock']:
+        device_data['accepted_bytes'] += valid_length
 
     return 0
 
@@ -247,22 +401,32 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
                    sweep_style: pyhackrf.py_sweep_style = pyhackrf.py_sweep_style.INTERLEAVED, serial_number: str | None = None,
                    binary_output: bool = False, one_shot: bool = False, num_sweeps: int | None = None,
                    filename: str | None = None, queue: object | None = None,
-                   print_to_console: bool = True) -> None:
+                   num_segments: int = 1, segment_overlap: float = 0.5, detector: object | None = None,
+                   occupancy: object | None = None, sink: object | None = None, planner: object | None = None,
+                   operacake_ports: list[str] | None = None, operacake_address: int = 0, operacake_samples_per_step: int = OPERACAKE_SAMPLES_PER_STEP,
+                   fft_backend: str | object | None = None, fft_workers: int = 1, batch_output: bool = False, calibration: object | None = None,
+                   queue_capacity: int = 0, queue_policy: str = 'drop_oldest', print_to_console: bool = True) -> None:
 
     global working_sdrs, sdr_ids
 
-    cdef uint8_t device_id = init_signals()
+    cdef int sdr_id = init_signals()
+    if sdr_id < 0:
+        raise RuntimeError('all 16 device slots are in use')
+
+    cdef uint8_t device_id = sdr_id
     cdef c_pyhackrf.PyHackrfDevice device
     cdef uint32_t offset = 0
 
-    pyhackrf.pyhackrf_init()
-
-    if serial_number is None:
-        device = pyhackrf.pyhackrf_open()
-    else:
-        device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+    try:
+        pyhackrf.pyhackrf_init()
+        if serial_number is None:
+            device = pyhackrf.pyhackrf_open()
+        else:
+            device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+    except Exception:
+        working_sdrs[device_id].store(0)
+        raise
 
-    working_sdrs[device_id].store(1)
     sdr_ids[device.serialno] = device_id
 
     sample_rate = int(sample_rate) if int(sample_rate) in AVAILABLE_SAMPLING_RATES else 20_000_000
@@ -311,7 +475,12 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
             sys.stderr.write('call pyhackrf_set_antenna_enable(True)\n')
         device.pyhackrf_set_antenna_enable(True)
 
+    if queue is not None and queue_capacity and not isinstance(queue, channel.OutputChannel):
+        # bound a caller-supplied queue.Queue from the producer side, OutputChannel queues carry their own bound
+        queue = channel.BoundedQueue(queue, queue_capacity, queue_policy)
+
     num_ranges = len(frequencies) // 2
+    steps_per_sweep = 0
     if pyhackrf.PY_MAX_SWEEP_RANGES < num_ranges:
         RuntimeError(f'specify a maximum of {pyhackrf.PY_MAX_SWEEP_RANGES} frequency ranges')
 
@@ -324,6 +493,7 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
 
         step_count = 1 + (frequencies[2 * i + 1] - frequencies[2 * i] - 1) // TUNE_STEP
         frequencies[2 * i + 1] = int(frequencies[2 * i] + step_count * TUNE_STEP)
+        steps_per_sweep += int(step_count)
 
         if frequencies[2 * i] < FREQ_MIN_MHZ:
             raise RuntimeError(f'min frequency must must be greater than {FREQ_MIN_MHZ} MHz.')
@@ -342,8 +512,58 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
     while ((fft_size + 4) % 8):
         fft_size += 1
 
+    if not 0 <= segment_overlap < 1:
+        raise RuntimeError('segment_overlap must be in range [0, 1)')
+
+    num_segments = max(1, int(num_segments))
+    segment_step = max(1, int(fft_size * (1 - segment_overlap)))
+    max_segments = 1 + (MAX_BLOCK_SAMPLES - fft_size) // segment_step
+    if num_segments > max_segments:
+        if print_to_console:
+            sys.stderr.write(f'Warning: only {max_segments} segments fit in one block, num_segments reduced\n')
+        num_segments = max_segments
+
+    if planner is not None:
+        planner.set_ranges(frequencies[:num_ranges * 2], int(TUNE_STEP))
+
+    if operacake_ports is not None:
+        if planner is not None:
+            raise RuntimeError('operacake_ports cannot be used with an adaptive planner')
+        if not 0 < len(operacake_ports) <= pyhackrf.PY_HACKRF_OPERACAKE_MAX_DWELL_TIMES:
+            raise RuntimeError(f'specify 1 to {pyhackrf.PY_HACKRF_OPERACAKE_MAX_DWELL_TIMES} Opera Cake ports')
+        for port in operacake_ports:
+            if port not in pyhackrf.py_operacake_ports.__members__:
+                raise RuntimeError(f'invalid Opera Cake port: {port}')
+
+        # one full sweep pass per port
+        dwell = steps_per_sweep * operacake_samples_per_step
+        if print_to_console:
+            sys.stderr.write(f'Opera Cake {operacake_address}: time mode, {dwell} samples ({steps_per_sweep} steps) per port {", ".join(operacake_ports)}\n')
+        device.pyhackrf_set_operacake_dwell_times([(dwell, port) for port in operacake_ports])
+        device.pyhackrf_set_operacake_mode(operacake_address, pyhackrf.py_operacake_switching_mode.OPERACAKE_MODE_TIME)
+
+    if calibration is not None:
+        calibration.configure(
+            sample_rate, fft_size, sweep_style == pyhackrf.py_sweep_style.INTERLEAVED, offset,
+            [int((frequencies[2 * i] + step * TUNE_STEP) * 1e6) for i in range(num_ranges) for step in range(int((frequencies[2 * i + 1] - frequencies[2 * i]) // TUNE_STEP))],
+        )
+
+    if print_to_console and num_segments > 1:
+        sys.stderr.write(f'Averaging {num_segments} segments per block ({segment_overlap * 100:.0f}% overlap)\n')
+
+    # the backend library (pyfftw / scipy) is imported here, on first use, not at module import
+    if fft_backend is None or isinstance(fft_backend, str):
+        fft_backend = fft_backends.get_backend(fft_backend, fft_workers)
+
+    if print_to_console:
+        sys.stderr.write(f'FFT backend: {fft_backend.name}, {fft_backend.workers} worker(s)\n')
+
+    # plan the one batch shape the callback uses now, so FFTW never measures inside the libusb callback
+    fft_backend.prepare((PY_BLOCKS_PER_TRANSFER * num_segments, fft_size), np.complex128)
+
     cdef dict device_data = {
         'device_id': device_id,
+        'fft_backend': fft_backend,
 
         'sweep_style': sweep_style,
         'sample_rate': sample_rate,
@@ -354,17 +574,37 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
         'num_sweeps': num_sweeps,
 
         'start_frequency': int(frequencies[0] * 1e6),
+        # tune steps since the current pass started, a pass ends on the start frequency after last_start_step
+        'sweep_step': 0,
+        'last_start_step': last_start_step(frequencies[:num_ranges * 2], TUNE_STEP),
         'fft_size': fft_size,
+        'data_length': (fft_size + (num_segments - 1) * segment_step) * 2,
+        'segment_step': segment_step,
         'window': np.hanning(fft_size),
         'psd_norm': 1 / (sample_rate * np.dot(np.hanning(fft_size), np.hanning(fft_size))),
         'close_ready': threading.Event(),
+        # guards counters updated by the libusb callback thread and read/reset by this thread
+        'lock': threading.Lock(),
 
         'binary_output': binary_output,
         'one_shot': one_shot,
-        'file': open(filename, 'w' if not binary_output else 'wb') if filename is not None else (sys.stdout.buffer if binary_output else sys.stdout),
-        'queue': queue
+        'file': None,
+        'queue': queue,
+        'batch_output': batch_output,
+        'record_dtype': sweep_record_dtype(fft_size // 4 if sweep_style == pyhackrf.py_sweep_style.INTERLEAVED else fft_size, operacake_ports is not None),
+        'detector': detector,
+        'occupancy': occupancy,
+        'sink': sink,
+        'planner': planner,
+        'calibration': calibration,
+        'operacake_ports': list(operacake_ports) if operacake_ports is not None else None,
     }
 
+    if filename is not None:
+        device_data['file'] = open(filename, 'w' if not binary_output else 'wb')
+    elif (occupancy is None and sink is None) or queue is not None:
+        device_data['file'] = sys.stdout.buffer if binary_output else sys.stdout
+
     device.device_data = device_data
 
     device.pyhackrf_init_sweep(frequencies, num_ranges, pyhackrf.PY_BYTES_PER_BLOCK, int(TUNE_STEP * 1e6), offset, sweep_style)
@@ -385,16 +625,33 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
                 sweep_rate = device_data['sweep_count'] / (time_now - time_start)
                 sys.stderr.write(f'{device_data["sweep_count"]} total sweeps completed, {round(sweep_rate, 2)} sweeps/second\n')
 
-            if device_data['accepted_bytes'] == 0:
+            with device_data['lock']:
+                accepted_bytes = device_data['accepted_bytes']
+                device_data['accepted_bytes'] = 0
+
+            if accepted_bytes == 0:
                 if print_to_console:
                     sys.stderr.write('Couldn\'t transfer any data for one second.\n')
                 break
-
-            device_data['accepted_bytes'] = 0
             time_prev = time_now
 
-    if filename is not None:
-        device_data['file'].close()
+            if occupancy is not None:
+                occupancy.maybe_snapshot()
+
+            if planner is not None and planner.due():
+                # re-plan without closing the device: stop streaming, load the new range list, restart
+                plan = planner.plan()
+                if not plan:
+                    # nothing to sweep, keep the current plan running
+                    continue
+                device.pyhackrf_stop_rx()
+                device_data['start_frequency'] = int(plan[0] * 1e6)
+                device_data['last_start_step'] = last_start_step(plan, TUNE_STEP)
+                device_data['sweep_started'] = False
+                device.pyhackrf_init_sweep(plan, len(plan) // 2, pyhackrf.PY_BYTES_PER_BLOCK, int(TUNE_STEP * 1e6), offset, sweep_style)
+                device.pyhackrf_start_rx_sweep()
+                if print_to_console:
+                    sys.stderr.write(f'Adaptive plan {planner.num_plans}: {", ".join(f"{plan[2 * i]}-{plan[2 * i + 1]}" for i in range(len(plan) // 2))} MHz\n')
 
     if print_to_console:
         if not working_sdrs[device_id].load():
@@ -414,6 +671,32 @@ def pyhackrf_sweep(frequencies: list[int] | None = None, sample_rate: int = 20_0
     device_data['close_ready'].wait()
     sdr_ids.pop(device.serialno, None)
 
+    if detector is not None:
+        write_events(device_data, detector.flush())
+
+    if occupancy is not None:
+        occupancy.snapshot()
+
+    try:
+        fft_backend.save_wisdom()
+    except OSError as e:
+        sys.stderr.write(f'Warning: could not save FFT wisdom: {e}\n')
+
+    if planner is not None and print_to_console:
+        sys.stderr.write(planner.format_report())
+
+    if hasattr(queue, 'format_stats') and print_to_console:
+        sys.stderr.write(queue.format_stats())
+
+    if filename is not None:
+        device_data['file'].close()
+
+    if operacake_ports is not None:
+        try:
+            device.pyhackrf_set_operacake_mode(operacake_address, pyhackrf.py_operacake_switching_mode.OPERACAKE_MODE_MANUAL)
+        except Exception as e:
+            sys.stderr.write(f'{e}\n')
+
     if antenna_enable:
         try:
             device.pyhackrf_set_antenna_enable(False)
@@ -1,4 +1,7 @@
 from python_hackrf import pyhackrf
+from python_hackrf.pyhackrf_tools.channelizer import PolyphaseChannelizer
+from python_hackrf.pyhackrf_tools.playlist import TxPlaylist
+from python_hackrf.pyhackrf_tools.pretrigger import PreTriggerRecorder
 
 def stop_all() -> None:
     ...
@@ -10,5 +13,7 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
                       rx_lna_gain: int = 16, rx_vga_gain: int = 20, tx_vga_gain: int = 0, amp_enable: bool = False, antenna_enable: bool = False,
                       repeat_tx: bool = False, synchronize: bool = False, num_samples: int | None = None, serial_number: str | None = None,
                       rx_filename: str | None = None, tx_filename: str | None = None, rx_buffer: object | None = None, tx_buffer: object | None = None,
-                      print_to_console: bool = True) -> None:
+                      ddc_sample_rate: int | None = None, ddc_offset: int = 0, channelizer: PolyphaseChannelizer | None = None,
+                      sink: object | None = None, rx_segment_size: int | None = None, tx_playlist: TxPlaylist | None = None, pre_trigger: PreTriggerRecorder | None = None,
+                      tx_dither: bool = False, print_to_console: bool = True) -> None:
     ...
@@ -24,7 +24,9 @@
 # cython: language_level = 3str
 # cython: freethreading_compatible = True
 from python_hackrf.pylibhackrf cimport pyhackrf as c_pyhackrf
+from python_hackrf.pyhackrf_tools cimport kernels
 from libc.stdint cimport uint64_t, uint8_t
+from python_hackrf.pyhackrf_tools import ddc, recording
 from python_hackrf import pyhackrf
 from libcpp.atomic cimport atomic
 from libcpp cimport bool as c_bool
@@ -65,9 +67,12 @@ def sigint_callback_handler(sig, frame, sdr_id):
 def init_signals() -> int:
     global working_sdrs
 
+    # claims a free slot atomically, so concurrent pyhackrf_* calls from several threads never share a device_id
+    cdef uint8_t expected
     sdr_id = -1
     for i in range(16):
-        if working_sdrs[i].load() == 0:
+        expected = 0
+        if working_sdrs[i].compare_exchange_strong(expected, 1):
             sdr_id = i
             break
 
@@ -91,8 +96,9 @@ def stop_all() -> None:
 
 def stop_sdr(serialno: str) -> None:
     global sdr_ids, working_sdrs
-    if serialno in sdr_ids:
-        working_sdrs[sdr_ids[serialno]].store(0)
+    sdr_id = sdr_ids.get(serialno)
+    if sdr_id is not None:
+        working_sdrs[sdr_id].store(0)
 
 
 @cython.boundscheck(False)
@@ -107,8 +113,10 @@ cpdef int rx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
         device_data['close_ready'].set()
         return -1
 
-    device_data['byte_count'] += valid_length
-    device_data['stream_power'] += np.sum(buffer[:valid_length].astype(np.int32) ** 2)
+    cdef uint64_t power = kernels.int8_sum_of_squares(buffer[:valid_length])
+    with device_data['lock']:
+        device_data['byte_count'] += valid_length
+        device_data['stream_power'] += power
 
     cdef uint64_t to_read = valid_length
     if device_data['num_samples']:
@@ -116,12 +124,31 @@ cpdef int rx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
             to_read = device_data['num_samples'] * 2
         device_data['num_samples'] -= (to_read // 2)
 
-    cdef cnp.ndarray accepted_data = (buffer[:to_read:2] / 128 + 1j * buffer[1:to_read:2] / 128).astype(np.complex64)
+    cdef cnp.ndarray accepted_data
 
-    if device_data['rx_buffer'] is not None:
-        device_data['rx_buffer'].append(accepted_data)
-    else:
-        accepted_data.tofile(device_data['rx_file'])
+    if device_data['pre_trigger'] is not None:
+        # raw int8 IQ goes into the pre-trigger ring, events are written by the recorder thread
+        device_data['pre_trigger'].push(buffer[:to_read])
+
+    if device_data['iq_output']:
+        accepted_data = np.empty(to_read // 2, dtype=np.complex64)
+        kernels.int8_to_complex64(buffer[:to_read], accepted_data)
+
+        if device_data['ddc'] is not None:
+            accepted_data = device_data['ddc'].process(accepted_data)
+
+        if device_data['channelizer'] is not None:
+            device_data['channelizer'].push(accepted_data)
+
+        if device_data['sink'] is not None:
+            device_data['sink'].write_iq(time.time(), device_data['rx_frequency'], device_data['rx_sample_rate'], accepted_data)
+
+        if device_data['rx_buffer'] is not None:
+            device_data['rx_buffer'].append(accepted_data)
+        elif device_data['rx_recorder'] is not None:
+            device_data['rx_recorder'].append(accepted_data)
+        elif device_data['rx_file'] is not None:
+            accepted_data.tofile(device_data['rx_file'])
 
     if device_data['num_samples'] == 0:
         working_sdrs[device_id].store(0)
@@ -149,13 +176,35 @@ cpdef int tx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
     cdef uint64_t writed = 0
     cdef bytes raw_data
     cdef cnp.ndarray sent_data
-    cdef cnp.ndarray scaled_data
     if device_data['num_samples']:
         if (to_write > device_data['num_samples']):
             to_write = device_data['num_samples']
         device_data['num_samples'] -= to_write
 
-    if device_data['tx_buffer'] is not None:
+    if device_data['tx_playlist'] is not None:
+        # waveforms are preconverted to int8, entries are spliced at sample granularity
+        writed = device_data['tx_playlist'].fill(buffer, to_write)
+        if writed == 0:
+            # playlist is finished
+            device_data['tx_complete'] = True
+            device_data['close_ready'].set()
+            valid_length = 0
+            return -1
+
+        # limit samples
+        if device_data['num_samples'] == 0:
+            device_data['tx_complete'] = True
+            working_sdrs[device_id].store(0)
+            device_data['close_ready'].set()
+
+        # end of playlist, the flush callback stops streaming once the last samples are sent
+        elif writed < to_write:
+            device_data['tx_complete'] = True
+
+        valid_length = writed * 2
+        return 0
+
+    elif device_data['tx_buffer'] is not None:
 
         sent_data = device_data['tx_buffer'].get_chunk(to_write, ring=device_data['repeat_tx'])
 
@@ -169,9 +218,7 @@ cpdef int tx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
             valid_length = 0
             return -1
 
-        scaled_data = (sent_data.view(np.float32) * 128).astype(np.int8)
-        buffer[0:writed * 2:2] = scaled_data[0::2]
-        buffer[1:writed * 2:2] = scaled_data[1::2]
+        kernels.complex64_to_int8(sent_data, buffer, device_data['tx_dither'])
 
         # limit samples
         if device_data['num_samples'] == 0:
@@ -196,9 +243,7 @@ cpdef int tx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
             writed = 0
 
         sent_data = np.frombuffer(raw_data, dtype=np.complex64)
-        scaled_data = (sent_data.view(np.float32) * 128).astype(np.int8)
-        buffer[0:writed * 2:2] = scaled_data[0::2]
-        buffer[1:writed * 2:2] = scaled_data[1::2]
+        kernels.complex64_to_int8(sent_data, buffer, device_data['tx_dither'])
 
         # limit samples
         if device_data['num_samples'] == 0:
@@ -235,9 +280,7 @@ cpdef int tx_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cnp.int8_t,
                 return 0
 
             sent_data = np.frombuffer(raw_data, dtype=np.complex64)
-            scaled_data = (sent_data.view(np.float32) * 128).astype(np.int8)
-            buffer[writed * 2:(writed + rewrited) * 2:2] = scaled_data[0::2]
-            buffer[writed * 2 + 1:(writed + rewrited) * 2:2] = scaled_data[1::2]
+            kernels.complex64_to_int8(sent_data, buffer[writed * 2:], device_data['tx_dither'])
 
             writed += rewrited
 
@@ -258,8 +301,10 @@ cpdef void tx_complete_callback(c_pyhackrf.PyHackrfDevice device, cnp.ndarray[cn
         device_data['close_ready'].set()
         return
 
-    device_data['byte_count'] += valid_length
-    device_data['stream_power'] += np.sum(buffer[:valid_length].astype(np.int32) ** 2)
+    cdef uint64_t power = kernels.int8_sum_of_squares(buffer[:valid_length])
+    with device_data['lock']:
+        device_data['byte_count'] += valid_length
+        device_data['stream_power'] += power
 
 
 cpdef void flush_callback(c_pyhackrf.PyHackrfDevice device, c_bool success):
@@ -279,20 +324,28 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
                       rx_lna_gain: int = 16, rx_vga_gain: int = 20, tx_vga_gain: int = 0, amp_enable: bool = False, antenna_enable: bool = False,
                       repeat_tx: bool = False, synchronize: bool = False, num_samples: int | None = None, serial_number: str | None = None,
                       rx_filename: str | None = None, tx_filename: str | None = None, rx_buffer: object | None = None, tx_buffer: object | None = None,
-                      print_to_console: bool = True) -> None:
+                      ddc_sample_rate: int | None = None, ddc_offset: int = 0, channelizer: object | None = None,
+                      sink: object | None = None, rx_segment_size: int | None = None, tx_playlist: object | None = None, pre_trigger: object | None = None,
+                      tx_dither: bool = False, print_to_console: bool = True) -> None:
 
     global working_sdrs, sdr_ids
 
-    cdef uint8_t device_id = init_signals()
-    cdef c_pyhackrf.PyHackrfDevice device
-    pyhackrf.pyhackrf_init()
+    cdef int sdr_id = init_signals()
+    if sdr_id < 0:
+        raise RuntimeError('all 16 device slots are in use')
 
-    if serial_number is None:
-        device = pyhackrf.pyhackrf_open()
-    else:
-        device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+    cdef uint8_t device_id = sdr_id
+    cdef c_pyhackrf.PyHackrfDevice device
+    try:
+        pyhackrf.pyhackrf_init()
+        if serial_number is None:
+            device = pyhackrf.pyhackrf_open()
+        else:
+            device = pyhackrf.pyhackrf_open_by_serial(serial_number)
+    except Exception:
+        working_sdrs[device_id].store(0)
+        raise
 
-    working_sdrs[device_id].store(1)
     sdr_ids[device.serialno] = device_id
 
     sample_rate = int(sample_rate) if sample_rate and int(sample_rate) in AVAILABLE_SAMPLING_RATES else 10_000_000
@@ -303,7 +356,10 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
     if num_samples and num_samples >= SAMPLES_TO_XFER_MAX:
         raise RuntimeError(f'num_samples must be less than {SAMPLES_TO_XFER_MAX}')
 
-    if (rx_buffer is not None or rx_filename is not None) and (tx_buffer is not None or tx_filename is not None):
+    cdef bint rx_mode = rx_buffer is not None or rx_filename is not None or channelizer is not None or sink is not None or pre_trigger is not None
+    cdef bint tx_mode = tx_buffer is not None or tx_filename is not None or tx_playlist is not None
+
+    if rx_mode and tx_mode:
         raise RuntimeError('HackRF cannot receive and send IQ samples at the same time.')
 
     if i_frequency is not None or lo_frequency is not None:
@@ -375,20 +431,59 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
             sys.stderr.write('call pyhackrf_set_amp_enable(True)\n')
         device.pyhackrf_set_amp_enable(True)
 
+    cdef object rx_ddc = None
+    if ddc_sample_rate is not None and rx_mode:
+        rx_ddc = ddc.DigitalDownConverter(sample_rate, int(ddc_sample_rate), ddc_offset)
+        if print_to_console:
+            sys.stderr.write(f'DDC: offset {ddc_offset / 1e6:.3f} MHz, {sample_rate / 1e6:.3f} MHz -> {rx_ddc.output_rate / 1e6:.3f} MHz (decimation stages {[stage.decimation for stage in rx_ddc.stages]})\n')
+
+    cdef object rx_recorder = None
+    if rx_segment_size is not None and rx_filename not in ('-', None) and rx_mode:
+        rx_recorder = recording.SegmentedRecorder(
+            rx_filename,
+            rx_ddc.output_rate if rx_ddc is not None else sample_rate,
+            (frequency if frequency is not None else explicit_frequency) + (ddc_offset if rx_ddc is not None else 0),
+            segment_size=rx_segment_size,
+            metadata={
+                'core:hw': f'HackRF {device.serialno}',
+                'pyhackrf:lna_gain': rx_lna_gain,
+                'pyhackrf:vga_gain': rx_vga_gain,
+                'pyhackrf:amp_enable': amp_enable,
+                'pyhackrf:baseband_filter_bandwidth': baseband_filter_bandwidth,
+            },
+        )
+        if print_to_console:
+            sys.stderr.write(f'Recording into {rx_recorder.meta_path}, {rx_segment_size} samples per segment\n')
+
     cdef dict device_data = {
+        'device_id': device_id,
+
         'num_samples': num_samples,
         'flush_complete': False,
         'repeat_tx': repeat_tx,
+        # +-1 LSB triangular dither when TX samples are quantized to int8
+        'tx_dither': tx_dither,
         'tx_complete': False,
         'stream_power': 0,
         'byte_count': 0,
 
         'close_ready': threading.Event(),
+        # guards counters updated by the libusb callback thread and read/reset by this thread
+        'lock': threading.Lock(),
 
-        'rx_file': open(rx_filename, 'wb') if rx_filename not in ('-', None) else (sys.stdout.buffer if rx_filename == '-' else None),
+        'rx_file': open(rx_filename, 'wb') if rx_filename not in ('-', None) and rx_recorder is None else (sys.stdout.buffer if rx_filename == '-' else None),
         'tx_file': open(tx_filename, 'rb') if tx_filename not in ('-', None) else (sys.stdin.buffer if tx_filename == '-' else None),
         'rx_buffer': rx_buffer,
-        'tx_buffer': tx_buffer
+        'tx_buffer': tx_buffer,
+        'tx_playlist': tx_playlist,
+        'rx_recorder': rx_recorder,
+        'ddc': rx_ddc,
+        'channelizer': channelizer,
+        'sink': sink,
+        'rx_frequency': (frequency if frequency is not None else explicit_frequency) + (ddc_offset if rx_ddc is not None else 0),
+        'rx_sample_rate': rx_ddc.output_rate if rx_ddc is not None else sample_rate,
+        'pre_trigger': pre_trigger,
+        'iq_output': rx_buffer is not None or rx_filename is not None or channelizer is not None or sink is not None,
     }
 
     device.device_data = device_data
@@ -398,7 +493,7 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
             sys.stderr.write('call pyhackrf_set_antenna_enable(True)\n')
         device.pyhackrf_set_antenna_enable(True)
 
-    if rx_buffer is not None or rx_filename is not None:
+    if rx_mode:
         if rx_lna_gain % 8 and print_to_console:
             sys.stderr.write('Warning: lna_gain must be a multiple of 8\n')
 
@@ -408,10 +503,23 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
         device.pyhackrf_set_lna_gain(rx_lna_gain)
         device.pyhackrf_set_vga_gain(rx_vga_gain)
 
+        if pre_trigger is not None:
+            pre_trigger.start(
+                sample_rate,
+                frequency if frequency is not None else explicit_frequency,
+                metadata={
+                    'core:hw': f'HackRF {device.serialno}',
+                    'pyhackrf:lna_gain': rx_lna_gain,
+                    'pyhackrf:vga_gain': rx_vga_gain,
+                    'pyhackrf:amp_enable': amp_enable,
+                    'pyhackrf:baseband_filter_bandwidth': baseband_filter_bandwidth,
+                },
+            )
+
         device.set_rx_callback(rx_callback)
         device.pyhackrf_start_rx()
 
-    elif tx_buffer is not None or tx_filename is not None:
+    elif tx_mode:
         device.pyhackrf_set_txvga_gain(tx_vga_gain)
         device.pyhackrf_enable_tx_block_complete_callback()
         device.pyhackrf_enable_tx_flush()
@@ -437,8 +545,9 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
         time_difference = time_now - time_prev
         if time_difference >= 1.0:
             if print_to_console:
-                byte_count, stream_power = device_data['byte_count'], device_data['stream_power']
-                device_data['stream_power'], device_data['byte_count'] = 0, 0
+                with device_data['lock']:
+                    byte_count, stream_power = device_data['byte_count'], device_data['stream_power']
+                    device_data['stream_power'], device_data['byte_count'] = 0, 0
 
                 if byte_count == 0 and synchronize:
                     sys.stderr.write('Waiting for trigger...\n')
@@ -462,17 +571,25 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
     if print_to_console:
         sys.stderr.write(f'Total time: {time_now - time_start:.5f} seconds\n')
 
+    if getattr(rx_buffer, 'channel', None) is not None and print_to_console:
+        sys.stderr.write(rx_buffer.channel.format_stats())
+
+    if tx_playlist is not None and print_to_console:
+        sys.stderr.write(tx_playlist.format_stats())
+
     working_sdrs[device_id].store(0)
     device_data['close_ready'].wait()
     sdr_ids.pop(device.serialno, None)
 
-    if rx_filename not in ('-', None):
+    if rx_recorder is not None:
+        rx_recorder.close()
+    elif rx_filename not in ('-', None):
         device_data['rx_file'].close()
 
     if tx_filename not in ('-', None):
         device_data['tx_file'].close()
 
-    if rx_buffer is not None or rx_filename is not None:
+    if rx_mode:
         try:
             device.pyhackrf_stop_rx()
             if print_to_console:
@@ -480,7 +597,7 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
         except Exception as e:
             sys.stderr.write(f'{e}\n')
 
-    elif tx_buffer is not None or tx_filename is not None:
+    elif tx_mode:
         try:
             device.pyhackrf_stop_tx()
             if print_to_console:
@@ -488,6 +605,11 @@ def pyhackrf_transfer(frequency: int | None = None, sample_rate: int = 10_000_00
         except Exception as e:
             sys.stderr.write(f'{e}\n')
 
+    if pre_trigger is not None:
+        pre_trigger.stop()
+        if print_to_console:
+            sys.stderr.write(pre_trigger.format_stats())
+
     if antenna_enable:
         try:
             device.pyhackrf_set_antenna_enable(False)
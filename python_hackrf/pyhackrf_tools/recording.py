@@ -0,0 +1,227 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+
+SIGMF_VERSION = '1.0.0'
+SIGMF_DATATYPE = 'cf32_le'
+META_EXTENSION = '.sigmf-meta'
+DATA_EXTENSION = '.sigmf-data'
+
+
+def _datetime(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class SegmentedRecorder:
+    '''
+    Writes complex64 IQ into fixed-size segment files <prefix>.<index>.sigmf-data and keeps a SigMF-style
+    <prefix>.sigmf-meta up to date. Besides the SigMF global and captures sections the metadata holds a
+    `segments` list (file, sample_start, sample_count) that maps sample offsets to segment files.
+    The metadata is rewritten atomically on every segment rotation and on close, so an interrupted recording
+    stays readable up to the last completed segment.
+    '''
+    def __init__(self, prefix: str, sample_rate: int, frequency: int, segment_size: int = 100_000_000,
+                 metadata: dict[str, Any] | None = None) -> None:
+        if segment_size <= 0:
+            raise ValueError('segment_size must be positive')
+
+        self.prefix = prefix
+        self.sample_rate = int(sample_rate)
+        self.segment_size = int(segment_size)
+        self.num_samples = 0
+
+        self._global = {
+            'core:datatype': SIGMF_DATATYPE,
+            'core:sample_rate': self.sample_rate,
+            'core:version': SIGMF_VERSION,
+            'core:recorder': 'python_hackrf',
+        }
+        if metadata is not None:
+            self._global.update(metadata)
+
+        self._captures: list[dict[str, Any]] = [{'core:sample_start': 0, 'core:frequency': int(frequency)}]
+        self._segments: list[dict[str, Any]] = []
+        self._file: Any = None
+        self._segment_samples = 0
+
+    @property
+    def meta_path(self) -> str:
+        return self.prefix + META_EXTENSION
+
+    def _segment_filename(self, index: int) -> str:
+        return f'{os.path.basename(self.prefix)}.{index:05d}{DATA_EXTENSION}'
+
+    def _open_segment(self) -> None:
+        filename = self._segment_filename(len(self._segments))
+        self._file = open(os.path.join(os.path.dirname(self.prefix), filename), 'wb')
+        self._segments.append({'file': filename, 'sample_start': self.num_samples, 'sample_count': 0})
+        self._segment_samples = 0
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.write_meta()
+
+    def append(self, data: np.ndarray[Any, Any]) -> None:
+        data = data.astype(np.complex64, copy=False)
+        if self.num_samples == 0 and len(data) and 'core:datetime' not in self._captures[0]:
+            self._captures[0]['core:datetime'] = _datetime(time.time() - len(data) / self.sample_rate)
+
+        position = 0
+        while position < len(data):
+            if self._file is None:
+                self._open_segment()
+
+            count = min(len(data) - position, self.segment_size - self._segment_samples)
+            data[position:position + count].tofile(self._file)
+            position += count
+            self._segment_samples += count
+            self._segments[-1]['sample_count'] += count
+            self.num_samples += count
+
+            if self._segment_samples >= self.segment_size:
+                self._close_segment()
+
+    def add_capture(self, frequency: int, timestamp: float | None = None) -> None:
+        '''Marks a retune at the current sample offset.'''
+        capture = {
+            'core:sample_start': self.num_samples,
+            'core:frequency': int(frequency),
+            'core:datetime': _datetime(timestamp if timestamp is not None else time.time()),
+        }
+        if self._captures[-1]['core:sample_start'] == self.num_samples:
+            self._captures[-1] = capture
+        else:
+            self._captures.append(capture)
+
+    def write_meta(self) -> None:
+        meta = {
+            'global': self._global,
+            'captures': self._captures,
+            'annotations': [],
+            'segments': self._segments,
+        }
+        temp_path = f'{self.meta_path}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(meta, file, indent=2)
+        os.replace(temp_path, self.meta_path)
+
+    def close(self) -> None:
+        self._close_segment()
+        self.write_meta()
+
+
+class Recording:
+    '''
+    Read-only view of a SegmentedRecorder recording as one array of complex64 samples.
+    Segments are opened as np.memmap on first access, so slicing touches only the segments it overlaps.
+    Supports recording[start:stop], recording[index] and time-based slicing with time_slice().
+    '''
+    def __init__(self, path: str) -> None:
+        if not path.endswith(META_EXTENSION):
+            path += META_EXTENSION
+        with open(path, 'r') as file:
+            meta = json.load(file)
+
+        self.directory = os.path.dirname(path)
+        self.meta = meta
+        self.sample_rate = int(meta['global']['core:sample_rate'])
+        self.captures = meta['captures']
+        self.segments = [segment for segment in meta['segments'] if segment['sample_count']]
+
+        self._segment_starts = np.array([segment['sample_start'] for segment in self.segments], dtype=np.int64)
+        self._memmaps: dict[int, np.memmap[Any, Any]] = {}
+        self.num_samples = self.segments[-1]['sample_start'] + self.segments[-1]['sample_count'] if self.segments else 0
+
+        datetime_string = self.captures[0].get('core:datetime') if self.captures else None
+        self.start_time = datetime.strptime(datetime_string, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc).timestamp() if datetime_string else None
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+    def _segment(self, index: int) -> np.memmap[Any, Any]:
+        if index not in self._memmaps:
+            segment = self.segments[index]
+            self._memmaps[index] = np.memmap(os.path.join(self.directory, segment['file']), dtype=np.complex64, mode='r', shape=(segment['sample_count'],))
+        return self._memmaps[index]
+
+    def segment_index(self, sample: int) -> int:
+        return int(np.searchsorted(self._segment_starts, sample, side='right')) - 1
+
+    def read(self, start: int, stop: int) -> np.ndarray[Any, Any]:
+        start = max(0, start)
+        stop = min(self.num_samples, stop)
+        if stop <= start:
+            return np.array([], dtype=np.complex64)
+
+        first = self.segment_index(start)
+        last = self.segment_index(stop - 1)
+        if first == last:
+            offset = self.segments[first]['sample_start']
+            return self._segment(first)[start - offset:stop - offset]
+
+        parts = []
+        for index in range(first, last + 1):
+            offset = self.segments[index]['sample_start']
+            parts.append(self._segment(index)[max(start - offset, 0):stop - offset])
+        return np.concatenate(parts)
+
+    def __getitem__(self, key: int | slice) -> Any:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.num_samples)
+            if step < 0:
+                return self.read(stop + 1, start + 1)[::step]
+            return self.read(start, stop)[::step]
+
+        if key < 0:
+            key += self.num_samples
+        if not 0 <= key < self.num_samples:
+            raise IndexError('sample index out of range')
+        return self.read(key, key + 1)[0]
+
+    def sample_at(self, seconds: float) -> int:
+        '''Sample index for a time in seconds. Absolute UNIX timestamps are accepted when the recording start time is known.'''
+        if self.start_time is not None and seconds >= self.start_time:
+            seconds -= self.start_time
+        return int(round(seconds * self.sample_rate))
+
+    def time_slice(self, start: float, stop: float) -> np.ndarray[Any, Any]:
+        return self.read(self.sample_at(start), self.sample_at(stop))
+
+    def frequency_at(self, sample: int) -> int:
+        frequency = self.captures[0]['core:frequency']
+        for capture in self.captures:
+            if capture['core:sample_start'] > sample:
+                break
+            frequency = capture['core:frequency']
+        return frequency
+
+    def close(self) -> None:
+        self._memmaps.clear()
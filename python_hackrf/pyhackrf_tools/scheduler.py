@@ -0,0 +1,200 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+from threading import RLock
+from typing import Any
+
+
+class HopScheduler:
+    '''
+    Priority hop scheduler for pyhackrf_scan.
+    Hops are the scan tune steps (start frequencies in Hz, one sample_rate wide). Bands assign a weight, a dwell
+    length in samples and a maximum revisit interval in seconds to the hops whose center they contain; bands that
+    are not covered by the scan ranges add their own hops. Hops with weight 0 are skipped.
+
+    Ordering: a hop past its max_revisit is served first (most overdue relative to its limit). Otherwise hops are
+    picked by stride scheduling (a hop's pass value grows by 1 / weight per visit, so a hop is visited proportionally
+    to its weight) and among hops whose pass is within `jump_tolerance` of the minimum the one closest to the current
+    LO frequency wins, which turns each round into a back-and-forth sweep instead of long LO jumps.
+    All methods are thread-safe and band changes take effect from the next hop.
+    '''
+    def __init__(self, jump_tolerance: float = 0.5) -> None:
+        self.jump_tolerance = float(jump_tolerance)
+        self.sample_rate = 0
+        self.default_dwell = 0
+
+        self._lock = RLock()
+        self._bands: dict[int, dict[str, Any]] = {}
+        self._next_band_id = 0
+        self._base_steps: list[int] = []
+        self._steps: dict[int, dict[str, Any]] = {}
+        self._start_time = time.time()
+
+    def set_band(self, start_frequency: int, stop_frequency: int, weight: float = 1.0, dwell: int | None = None,
+                 max_revisit: float | None = None) -> int:
+        '''Adds a band (frequencies in Hz) and returns its id. Later bands take precedence where bands overlap.'''
+        if stop_frequency <= start_frequency:
+            raise ValueError('stop_frequency must be greater than start_frequency')
+        if weight < 0:
+            raise ValueError('weight must not be negative')
+
+        with self._lock:
+            band_id = self._next_band_id
+            self._next_band_id += 1
+            self._bands[band_id] = {
+                'start_frequency': int(start_frequency),
+                'stop_frequency': int(stop_frequency),
+                'weight': float(weight),
+                'dwell': int(dwell) if dwell is not None else None,
+                'max_revisit': float(max_revisit) if max_revisit is not None else None,
+            }
+            self._rebuild()
+            return band_id
+
+    def update_band(self, band_id: int, **changes: Any) -> None:
+        with self._lock:
+            band = self._bands[band_id]
+            for key, value in changes.items():
+                if key not in band:
+                    raise KeyError(f'unknown band parameter: {key}')
+                band[key] = value
+            self._rebuild()
+
+    def remove_band(self, band_id: int) -> None:
+        with self._lock:
+            self._bands.pop(band_id, None)
+            self._rebuild()
+
+    def bands(self) -> dict[int, dict[str, Any]]:
+        with self._lock:
+            return {band_id: dict(band) for band_id, band in self._bands.items()}
+
+    def set_steps(self, frequencies: list[int], sample_rate: int, default_dwell: int) -> None:
+        '''Called by pyhackrf_scan with its calculated hop frequencies (Hz).'''
+        with self._lock:
+            self._base_steps = [int(frequency) for frequency in frequencies]
+            self.sample_rate = int(sample_rate)
+            self.default_dwell = int(default_dwell)
+            self._start_time = time.time()
+            self._rebuild()
+
+    def _band_for(self, frequency: int) -> int | None:
+        center = frequency + self.sample_rate // 2
+        for band_id in reversed(self._bands):
+            band = self._bands[band_id]
+            if band['start_frequency'] <= center < band['stop_frequency']:
+                return band_id
+        return None
+
+    def _rebuild(self) -> None:
+        if not self.sample_rate:
+            return
+
+        frequencies = list(self._base_steps)
+        covered = sorted(frequencies)
+        for band in self._bands.values():
+            frequency = band['start_frequency']
+            while frequency < band['stop_frequency']:
+                center = frequency + self.sample_rate // 2
+                if not any(step <= center < step + self.sample_rate for step in covered):
+                    frequencies.append(frequency)
+                    covered.append(frequency)
+                frequency += self.sample_rate
+
+        min_pass = min((step['pass'] for step in self._steps.values()), default=0.0)
+        steps = {}
+        for frequency in frequencies:
+            step = self._steps.get(frequency)
+            if step is None:
+                step = {'pass': min_pass, 'last_visit': 0.0, 'visits': 0, 'revisit_sum': 0.0}
+            step['band'] = self._band_for(frequency)
+            steps[frequency] = step
+        self._steps = steps
+
+    def _parameters(self, step: dict[str, Any]) -> tuple[float, int, float | None]:
+        if step['band'] is None:
+            return 1.0, self.default_dwell, None
+        band = self._bands[step['band']]
+        return band['weight'], band['dwell'] if band['dwell'] is not None else self.default_dwell, band['max_revisit']
+
+    def next_hop(self, now: float | None = None, current_frequency: int | None = None) -> tuple[int, int]:
+        '''Returns (hop start frequency in Hz, dwell in samples) and records the visit.'''
+        now = now if now is not None else time.time()
+        with self._lock:
+            candidates = []
+            for frequency, step in self._steps.items():
+                weight, dwell, max_revisit = self._parameters(step)
+                if weight > 0:
+                    candidates.append((frequency, step, weight, dwell, max_revisit))
+
+            if not candidates:
+                raise RuntimeError('no hops with positive weight')
+
+            def distance(candidate: tuple[int, dict[str, Any], float, int, float | None]) -> int:
+                return abs(candidate[0] - current_frequency) if current_frequency is not None else candidate[0]
+
+            overdue = []
+            for candidate in candidates:
+                max_revisit = candidate[4]
+                if max_revisit is not None:
+                    age = now - (candidate[1]['last_visit'] or self._start_time)
+                    if age >= max_revisit:
+                        overdue.append((age / max_revisit, candidate))
+
+            if overdue:
+                ratio = max(item[0] for item in overdue)
+                chosen = min((item[1] for item in overdue if item[0] >= ratio * .9), key=distance)
+            else:
+                min_pass = min(candidate[1]['pass'] for candidate in candidates)
+                chosen = min((candidate for candidate in candidates if candidate[1]['pass'] <= min_pass + self.jump_tolerance), key=distance)
+
+            frequency, step, weight, dwell, _ = chosen
+            step['pass'] += 1 / weight
+            if step['last_visit']:
+                step['revisit_sum'] += now - step['last_visit']
+            step['last_visit'] = now
+            step['visits'] += 1
+
+            return frequency, dwell
+
+    def num_hops(self) -> int:
+        with self._lock:
+            return sum(1 for step in self._steps.values() if self._parameters(step)[0] > 0)
+
+    def stats(self) -> list[dict[str, Any]]:
+        '''Per band (None for hops outside all bands): visits, hops and mean revisit interval in seconds.'''
+        with self._lock:
+            groups: dict[int | None, list[dict[str, Any]]] = {}
+            for step in self._steps.values():
+                groups.setdefault(step['band'], []).append(step)
+
+            result = []
+            for band_id, steps in groups.items():
+                revisits = sum(step['visits'] - 1 for step in steps if step['visits'] > 1)
+                result.append({
+                    'band': band_id,
+                    'hops': len(steps),
+                    'visits': sum(step['visits'] for step in steps),
+                    'revisit_interval': sum(step['revisit_sum'] for step in steps) / revisits if revisits else None,
+                })
+            return result
@@ -24,24 +24,33 @@ import atexit
 import io
 import os
 import sys
-import time
-from queue import Queue
+from queue import Empty
 from tempfile import NamedTemporaryFile
 from threading import Event, RLock, Thread
 from typing import Any
 
 import numpy as np
 
+from python_hackrf.pyhackrf_tools.channel import OutputChannel
+
 
 class FileBuffer:
     '''
     A file-based buffer designed for efficient data transmission and reception, minimizing RAM usage.
     Provides methods for appending data, retrieving new data, accessing the entire buffer, and processing data in chunks.
     Supports ring-buffer behavior.
+    With use_thread=True appends go through an OutputChannel bounded by `capacity_bytes` with the given `policy`
+    (unbounded by default), see `channel` for its counters. With the 'block' policy append() waits for the writer
+    thread up to `block_timeout` seconds (forever if None) before the data is dropped.
     '''
-    def __init__(self, dtype: type = np.complex64, use_thread: bool = False) -> None:
+    def __init__(self, dtype: type = np.complex64, use_thread: bool = False, capacity_bytes: int | None = None,
+                 policy: str = 'block', block_timeout: float | None = None) -> None:
         self._use_thread = use_thread
         self._dtype = dtype
+        self._capacity_bytes = capacity_bytes
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self.channel: OutputChannel | None = None
 
         self._read_ptr = 0
         self._write_ptr = 0
@@ -57,7 +66,7 @@ class FileBuffer:
 
         if use_thread:
             self._run_available = True
-            self._queue = Queue()  # type: ignore
+            self._queue = self.channel = OutputChannel(capacity_bytes=capacity_bytes, policy=policy, block_timeout=block_timeout)
             self._append_thread = Thread(target=self._append, daemon=True)
             self._append_thread.start()
 
@@ -123,31 +132,31 @@ class FileBuffer:
 
     def _append(self) -> None:
         while self._run_available:
-            if not self._queue.empty():
-                data, chunk_size = self._queue.get_nowait()
+            try:
+                data, chunk_size = self._queue.get(timeout=.035)
+            except Empty:
+                continue
 
-                data = data.astype(self._dtype, copy=False)
-                chunk_elements = chunk_size // self._dtype_size
+            data = data.astype(self._dtype, copy=False)
+            chunk_elements = chunk_size // self._dtype_size
 
-                with self._wlock:
-                    for i in range(0, len(data), chunk_elements):
-                        chunk = data[i:i + chunk_elements]
+            with self._wlock:
+                for i in range(0, len(data), chunk_elements):
+                    chunk = data[i:i + chunk_elements]
 
-                        self._writer.write(chunk)
-                        self._write_ptr += self._dtype_size * chunk.size
+                    self._writer.write(chunk)
+                    self._write_ptr += self._dtype_size * chunk.size
 
-                        self._not_empty.set()
+                    self._not_empty.set()
 
-                        if not self._run_available:
-                            break  # type: ignore
-            else:
-                time.sleep(.035)
+                    if not self._run_available:
+                        break
 
     def append(self, data: np.ndarray[Any, Any], chunk_size: int = 131072) -> None:
         if len(data) == 0:
             return
         if self._use_thread:
-            self._queue.put_nowait((data, chunk_size))
+            self._queue.put((data, chunk_size))
         else:
             data = data.astype(self._dtype, copy=False)
             chunk_elements = chunk_size // self._dtype_size
@@ -275,6 +284,6 @@ class FileBuffer:
 
         if self._use_thread:
             self._run_available = True
-            self._queue = Queue()
+            self._queue = self.channel = OutputChannel(capacity_bytes=self._capacity_bytes, policy=self._policy, block_timeout=self._block_timeout)
             self._append_thread = Thread(target=self._append, daemon=True)
             self._append_thread.start()
@@ -0,0 +1,393 @@
+# MIT License
+
+# Copyright (c) 2023-2025 GvozdevLeonid
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from queue import Queue
+from threading import Lock, Thread
+from typing import Any
+
+import numpy as np
+
+from python_hackrf.pyhackrf_tools.archive import SweepArchiveReader
+
+REDUCTIONS = ('max', 'mean')
+PALETTE_ANCHORS = ((0, 0, 4), (40, 11, 84), (101, 21, 110), (159, 42, 99), (212, 72, 66), (245, 125, 21), (250, 193, 39), (252, 255, 164))
+
+
+def default_palette() -> np.ndarray[Any, Any]:
+    '''256 x RGB uint8 heat palette, index 0 (no data) is black and written as transparent.'''
+    anchors = np.array(PALETTE_ANCHORS, dtype=np.float64)
+    positions = np.linspace(0, 1, len(anchors))
+    levels = np.linspace(0, 1, 255)
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    for channel in range(3):
+        palette[1:, channel] = np.rint(np.interp(levels, positions, anchors[:, channel]))
+    return palette
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(tile: np.ndarray[Any, Any], palette: np.ndarray[Any, Any] | None = None) -> bytes:
+    '''Encodes a 2D uint8 array as an 8-bit PNG, palette indexed (index 0 transparent) or grayscale without a palette.'''
+    height, width = tile.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)
+    raw[:, 1:] = tile  # filter type 0 for every scanline
+
+    png = b'\x89PNG\r\n\x1a\n'
+    png += _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3 if palette is not None else 0, 0, 0, 0))
+    if palette is not None:
+        png += _png_chunk(b'PLTE', np.ascontiguousarray(palette, dtype=np.uint8).tobytes())
+        png += _png_chunk(b'tRNS', b'\x00')
+    png += _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), 6))
+    png += _png_chunk(b'IEND', b'')
+    return png
+
+
+class WaterfallTileBuilder:
+    '''
+    Incremental multi-resolution waterfall tile pyramid (write_spectrum interface).
+    Spectra are mapped onto a fixed grid of `bin_width` columns from `frequency_min` to `frequency_max` and quantized
+    to uint8: 0 is no data, 1..255 cover `db_min`..`db_max`. Every `sweeps_per_row` sweeps (a sweep ends when the
+    start frequency does not increase) form one row of level 0, bins falling into the same cell keep their maximum.
+    Each level halves both time and frequency resolution of the level below by 2x2 `reduction` ('max' keeps peaks,
+    'mean' averages cells with data). Levels are updated as soon as two rows of the level below exist, so the cost per
+    row is constant and no level is ever rebuilt.
+    Tiles are `tile_size` x `tile_size` cells (time down, frequency right) stored as `{directory}/{level}/{y}/{x}.npy`
+    and `.png`. Completed tile rows are written once and dropped from memory, the tiles of the growing edge that
+    received data are rewritten on flush() (every `flush_interval` seconds while sweeping). Tiles are encoded and
+    written by a background thread, write_spectrum() and flush() only hand over copies; close() waits for the writes.
+    get_tile() serves any level in constant time.
+    `{directory}/tiles.json` describes the grid and `{directory}/timestamps.f8` holds the float64 timestamp of every
+    level 0 row.
+    '''
+    def __init__(self, directory: str, frequency_min: int, frequency_max: int, bin_width: float, tile_size: int = 256,
+                 num_levels: int = 8, db_min: float = -120.0, db_max: float = -20.0, reduction: str = 'max',
+                 sweeps_per_row: int = 1, write_png: bool = True, palette: np.ndarray[Any, Any] | None = None,
+                 flush_interval: float = 10.0) -> None:
+        if frequency_max <= frequency_min or bin_width <= 0:
+            raise ValueError('frequency_max must be greater than frequency_min and bin_width must be positive')
+        if db_max <= db_min:
+            raise ValueError('db_max must be greater than db_min')
+        if reduction not in REDUCTIONS:
+            raise ValueError(f'reduction must be one of {REDUCTIONS}')
+        if tile_size < 1 or num_levels < 1 or sweeps_per_row < 1:
+            raise ValueError('tile_size, num_levels and sweeps_per_row must be positive')
+
+        self.directory = directory
+        self.frequency_min = int(frequency_min)
+        self.frequency_max = int(frequency_max)
+        self.bin_width = float(bin_width)
+        self.tile_size = int(tile_size)
+        self.num_levels = int(num_levels)
+        self.db_min = float(db_min)
+        self.db_max = float(db_max)
+        self.reduction = reduction
+        self.sweeps_per_row = int(sweeps_per_row)
+        self.write_png = write_png
+        self.palette = palette if palette is not None else default_palette()
+        self.flush_interval = float(flush_interval)
+
+        self.width = int(np.ceil((self.frequency_max - self.frequency_min) / self.bin_width))
+        self.widths = [-(-self.width // (1 << level)) for level in range(self.num_levels)]
+        self.rows = [0] * self.num_levels
+
+        self._bands = [np.zeros((self.tile_size, -(-width // self.tile_size) * self.tile_size), dtype=np.uint8) for width in self.widths]
+        self._pending_rows: list[np.ndarray[Any, Any] | None] = [None] * self.num_levels
+        self._row = np.zeros(self.width, dtype=np.uint8)
+        self._row_timestamp: float | None = None
+        self._row_sweeps = 0
+        self._last_start_frequency: int | None = None
+        self._mappings: dict[tuple[int, int, int], tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]] = {}
+        self._timestamps: list[float] = []
+        self._last_flush = time.time()
+        self._lock = Lock()
+
+        # tile columns of the current band row that changed since they were last handed to the writer / were written
+        self._dirty: list[set[int]] = [set() for _ in range(self.num_levels)]
+        self._written: list[set[int]] = [set() for _ in range(self.num_levels)]
+        # completed band rows waiting for the writer, get_tile() serves them from here
+        self._completed: dict[tuple[int, int], np.ndarray[Any, Any]] = {}
+        self._pending: Queue[tuple[str, Any] | None] = Queue()
+        self._pending_flushes = 0
+        self._error: Exception | None = None
+        self._closed = False
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'timestamps.f8'), 'wb'):
+            pass
+
+        self._thread = Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def _mapping(self, start_frequency: int, stop_frequency: int, num_bins: int) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        '''(grid columns, input bins) pairs: the column of every input bin plus the input bin of every column in range.'''
+        key = (start_frequency, stop_frequency, num_bins)
+        mapping = self._mappings.get(key)
+        if mapping is None:
+            input_width = (stop_frequency - start_frequency) / num_bins
+            bins = np.arange(num_bins)
+            bin_columns = np.floor((start_frequency + (bins + .5) * input_width - self.frequency_min) / self.bin_width).astype(np.intp)
+
+            first = max(0, int(np.ceil((start_frequency - self.frequency_min) / self.bin_width - .5)))
+            last = min(self.width, int(np.ceil((stop_frequency - self.frequency_min) / self.bin_width - .5)))
+            columns = np.arange(first, max(first, last))
+            column_bins = np.clip(np.floor((self.frequency_min + (columns + .5) * self.bin_width - start_frequency) / input_width).astype(np.intp), 0, num_bins - 1)
+
+            columns = np.concatenate((bin_columns, columns))
+            bins = np.concatenate((bins, column_bins))
+            valid = (columns >= 0) & (columns < self.width)
+            mapping = (columns[valid], bins[valid])
+            self._mappings[key] = mapping
+        return mapping
+
+    def quantize(self, dbfs: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        scaled = (np.asarray(dbfs, dtype=np.float32) - self.db_min) * (254 / (self.db_max - self.db_min)) + 1
+        return np.clip(np.rint(scaled), 1, 255).astype(np.uint8)
+
+    def write_spectrum(self, timestamp: float, start_frequency: int, stop_frequency: int, dbfs: np.ndarray[Any, Any]) -> None:
+        with self._lock:
+            if self._last_start_frequency is not None and start_frequency <= self._last_start_frequency:
+                self._row_sweeps += 1
+                if self._row_sweeps >= self.sweeps_per_row:
+                    self._finish_row()
+            self._last_start_frequency = start_frequency
+
+            columns, bins = self._mapping(int(start_frequency), int(stop_frequency), len(dbfs))
+            if len(columns):
+                if self._row_timestamp is None:
+                    self._row_timestamp = float(timestamp)
+                np.maximum.at(self._row, columns, self.quantize(dbfs)[bins])
+
+        if time.time() - self._last_flush >= self.flush_interval and not self._pending_flushes:
+            self.flush()
+
+    def _finish_row(self) -> None:
+        self._row_sweeps = 0
+        if self._row_timestamp is None:
+            return
+
+        self._timestamps.append(self._row_timestamp)
+        self._push_row(0, self._row)
+        self._row = np.zeros(self.width, dtype=np.uint8)
+        self._row_timestamp = None
+
+    def _reduce(self, first: np.ndarray[Any, Any], second: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        width = len(first)
+        cells = np.zeros((2, width + (width & 1)), dtype=np.uint8)
+        cells[0, :width] = first
+        cells[1, :width] = second
+        cells = cells.reshape(2, -1, 2)
+        if self.reduction == 'max':
+            return cells.max(axis=(0, 2))
+
+        counts = np.count_nonzero(cells, axis=(0, 2))
+        sums = cells.sum(axis=(0, 2), dtype=np.uint16)
+        return np.where(counts, np.rint(sums / np.maximum(counts, 1)), 0).astype(np.uint8)
+
+    def _push_row(self, level: int, row: np.ndarray[Any, Any]) -> None:
+        y, offset = divmod(self.rows[level], self.tile_size)
+        self._bands[level][offset, :len(row)] = row
+        self._dirty[level].update((np.flatnonzero(row) // self.tile_size).tolist())
+        self.rows[level] += 1
+        if offset == self.tile_size - 1:
+            # the band is final: hand it over whole, every tile not written yet or changed since is written once more
+            band = self._bands[level]
+            self._bands[level] = np.zeros_like(band)
+            self._completed[(level, y)] = band
+            tiles = self._dirty[level] | (set(range(band.shape[1] // self.tile_size)) - self._written[level])
+            self._pending.put(('band', (level, y, band, sorted(tiles))))
+            self._dirty[level] = set()
+            self._written[level] = set()
+
+        if level + 1 < self.num_levels:
+            pending = self._pending_rows[level]
+            if pending is None:
+                self._pending_rows[level] = row.copy()
+            else:
+                self._pending_rows[level] = None
+                self._push_row(level + 1, self._reduce(pending, row))
+
+    def _write_tiles(self, level: int, y: int, tiles: list[tuple[int, np.ndarray[Any, Any]]]) -> None:
+        band_directory = os.path.join(self.directory, str(level), str(y))
+        os.makedirs(band_directory, exist_ok=True)
+        for x, tile in tiles:
+            if len(tile) < self.tile_size:
+                tile = np.pad(tile, ((0, self.tile_size - len(tile)), (0, 0)))
+            path = os.path.join(band_directory, str(x))
+            with open(f'{path}.npy.tmp', 'wb') as file:
+                np.save(file, tile)
+            os.replace(f'{path}.npy.tmp', f'{path}.npy')
+            if self.write_png:
+                with open(f'{path}.png.tmp', 'wb') as file:
+                    file.write(encode_png(tile, self.palette))
+                os.replace(f'{path}.png.tmp', f'{path}.png')
+
+    def tile_count(self, level: int) -> tuple[int, int]:
+        '''(tiles along frequency, tiles along time) currently available at `level`.'''
+        return -(-self.widths[level] // self.tile_size), -(-self.rows[level] // self.tile_size)
+
+    def get_tile(self, level: int, x: int, y: int) -> np.ndarray[Any, Any] | None:
+        '''tile_size x tile_size uint8 tile, from memory for the growing edge or from disk, None if it does not exist.'''
+        if not 0 <= level < self.num_levels or not 0 <= x < self.tile_count(level)[0]:
+            return None
+
+        with self._lock:
+            current = self.rows[level] // self.tile_size
+            if y == current and self.rows[level] % self.tile_size:
+                return self._bands[level][:, x * self.tile_size:(x + 1) * self.tile_size].copy()
+            band = self._completed.get((level, y))
+            if band is not None:
+                return band[:, x * self.tile_size:(x + 1) * self.tile_size].copy()
+
+        if not 0 <= y < current:
+            return None
+        return np.load(os.path.join(self.directory, str(level), str(y), f'{x}.npy'))
+
+    def dbfs(self, tile: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        '''Converts tile values back to dBfs, NaN where there is no data.'''
+        values = (tile.astype(np.float32) - 1) * ((self.db_max - self.db_min) / 254) + self.db_min
+        values[tile == 0] = np.nan
+        return values
+
+    def metadata(self) -> dict[str, Any]:
+        return {
+            'frequency_min': self.frequency_min,
+            'frequency_max': self.frequency_max,
+            'bin_width': self.bin_width,
+            'width': self.width,
+            'tile_size': self.tile_size,
+            'num_levels': self.num_levels,
+            'db_min': self.db_min,
+            'db_max': self.db_max,
+            'reduction': self.reduction,
+            'sweeps_per_row': self.sweeps_per_row,
+            'rows': list(self.rows),
+        }
+
+    def flush(self) -> None:
+        '''Hands the changed tiles of the growing edge of every level, new row timestamps and tiles.json to the writer thread.'''
+        with self._lock:
+            edges = []
+            for level in range(self.num_levels):
+                filled = self.rows[level] % self.tile_size
+                if filled and self._dirty[level]:
+                    # only the filled rows are copied, the writer pads the tiles
+                    band = self._bands[level]
+                    tiles = [(x, band[:filled, x * self.tile_size:(x + 1) * self.tile_size].copy()) for x in sorted(self._dirty[level])]
+                    edges.append((level, self.rows[level] // self.tile_size, tiles))
+                    self._written[level] |= self._dirty[level]
+                    self._dirty[level] = set()
+
+            self._pending_flushes += 1
+            self._pending.put(('flush', (edges, self._timestamps, self.metadata())))
+            self._timestamps = []
+            self._last_flush = time.time()
+
+    def _write(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+
+            kind, data = item
+            try:
+                if self._error is None:
+                    if kind == 'band':
+                        level, y, band, tiles = data
+                        self._write_tiles(level, y, [(x, band[:, x * self.tile_size:(x + 1) * self.tile_size]) for x in tiles])
+                    else:
+                        edges, timestamps, metadata = data
+                        for level, y, tiles in edges:
+                            self._write_tiles(level, y, tiles)
+
+                        if timestamps:
+                            with open(os.path.join(self.directory, 'timestamps.f8'), 'ab') as file:
+                                file.write(np.array(timestamps, dtype='<f8').tobytes())
+
+                        path = os.path.join(self.directory, 'tiles.json')
+                        with open(f'{path}.tmp', 'w') as file:
+                            json.dump(metadata, file)
+                        os.replace(f'{path}.tmp', path)
+            except Exception as e:
+                self._error = e
+                sys.stderr.write(f'Waterfall: writing tiles to {self.directory} failed: {e}\n')
+
+            with self._lock:
+                if kind == 'band':
+                    self._completed.pop(data[:2], None)
+                else:
+                    self._pending_flushes -= 1
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        with self._lock:
+            self._finish_row()
+            # leave a complete set of tiles on disk, also for the parts of the growing edge that never got data
+            for level in range(self.num_levels):
+                if self.rows[level] % self.tile_size:
+                    self._dirty[level] |= set(range(self._bands[level].shape[1] // self.tile_size)) - self._written[level]
+        self.flush()
+        self._closed = True
+        self._pending.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> 'WaterfallTileBuilder':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def ingest_archive(self, filename: str, time_start: float | None = None, time_stop: float | None = None) -> int:
+        '''Feeds the records of a SweepArchiveWriter archive in time order. Returns the number of records.'''
+        num_records = 0
+        with SweepArchiveReader(filename) as reader:
+            for records, dbfs in reader.read(time_start, time_stop, self.frequency_min, self.frequency_max):
+                for record, spectrum in zip(records.tolist(), dbfs):
+                    self.write_spectrum(record[0], record[1], record[2], spectrum)
+                num_records += len(records)
+        return num_records
+
+    def ingest_binary(self, filename: str) -> int:
+        '''Feeds binary pyhackrf_sweep/hackrf_sweep output (-B). Records carry no time, the record index is used instead.'''
+        num_records = 0
+        with open(filename, 'rb') as file:
+            while True:
+                header = file.read(4)
+                if len(header) < 4:
+                    break
+                record_length = struct.unpack('<I', header)[0]
+                record = file.read(record_length)
+                if len(record) < record_length:
+                    break
+                start_frequency, stop_frequency = struct.unpack('<QQ', record[:16])
+                self.write_spectrum(float(num_records), start_frequency, stop_frequency, np.frombuffer(record[16:], dtype='<f4'))
+                num_records += 1
+        return num_records
@@ -31,6 +31,7 @@ from enum import IntEnum
 from ctypes import c_int
 from . cimport chackrf
 import numpy as np
+import threading
 cimport cython
 
 IF ANDROID:
@@ -38,6 +39,11 @@ IF ANDROID:
 
 
 cdef dict global_callbacks = {}
+# guards registration and removal of devices in global_callbacks; callbacks read their entry once with dict.get()
+cdef object global_callbacks_lock = threading.Lock()
+# libhackrf tracks open devices in a global array without a mutex, so opening and closing are serialized;
+# everything else on an open device may run in parallel
+cdef object open_close_lock = threading.RLock()
 
 PY_BYTES_PER_BLOCK = chackrf.BYTES_PER_BLOCK
 PY_MAX_SWEEP_RANGES = chackrf.MAX_SWEEP_RANGES
@@ -131,14 +137,14 @@ class py_operacake_switching_mode(IntEnum):
         return self.name
 
 class py_operacake_ports(IntEnum):
-    A1: 0
-    A2: 1
-    A3: 2
-    A4: 3
-    B1: 4
-    B2: 5
-    B3: 6
-    B4: 7
+    A1 = 0
+    A2 = 1
+    A3 = 2
+    A4 = 3
+    B1 = 4
+    B2 = 5
+    B3 = 6
+    B4 = 7
 
     def __str__(self) -> str:
         return self.name
@@ -171,8 +177,9 @@ cdef int __rx_callback(chackrf.hackrf_transfer *transfer) noexcept nogil:
             transfer.valid_length,
         )
 
-        if global_callbacks[<size_t> transfer.device]['__rx_callback'] is not None:
-            result = global_callbacks[<size_t> transfer.device]['__rx_callback'](global_callbacks[<size_t> transfer.device]['device'], np_buffer, transfer.buffer_length, transfer.valid_length)
+        callbacks = global_callbacks.get(<size_t> transfer.device)
+        if callbacks is not None and callbacks['__rx_callback'] is not None:
+            result = callbacks['__rx_callback'](callbacks['device'], np_buffer, transfer.buffer_length, transfer.valid_length)
 
     return result
 
@@ -190,8 +197,9 @@ cdef int __tx_callback(chackrf.hackrf_transfer *transfer) noexcept nogil:
         valid_length = c_int(transfer.valid_length)
         np_buffer_ptr = <uint8_t*> <uintptr_t> np_buffer.ctypes.data
 
-        if global_callbacks[<size_t> transfer.device]['__tx_callback'] is not None:
-            result = global_callbacks[<size_t> transfer.device]['__tx_callback'](global_callbacks[<size_t> transfer.device]['device'], np_buffer, transfer.buffer_length, valid_length)
+        callbacks = global_callbacks.get(<size_t> transfer.device)
+        if callbacks is not None and callbacks['__tx_callback'] is not None:
+            result = callbacks['__tx_callback'](callbacks['device'], np_buffer, transfer.buffer_length, valid_length)
             transfer.valid_length = valid_length.value
         else:
             transfer.valid_length = 0
@@ -223,8 +231,9 @@ cdef int __sweep_callback(chackrf.hackrf_transfer *transfer) noexcept nogil:
             transfer.valid_length,
         )
 
-        if global_callbacks[<size_t> transfer.device]['__sweep_callback'] is not None:
-            result = global_callbacks[<size_t> transfer.device]['__sweep_callback'](global_callbacks[<size_t> transfer.device]['device'], np_buffer, transfer.buffer_length, transfer.valid_length)
+        callbacks = global_callbacks.get(<size_t> transfer.device)
+        if callbacks is not None and callbacks['__sweep_callback'] is not None:
+            result = callbacks['__sweep_callback'](callbacks['device'], np_buffer, transfer.buffer_length, transfer.valid_length)
 
     return result
 
@@ -246,8 +255,9 @@ cdef void __tx_complete_callback(chackrf.hackrf_transfer *transfer, int success)
             transfer.valid_length,
         )
 
-        if global_callbacks[<size_t> transfer.device]['__tx_complete_callback'] is not None:
-            global_callbacks[<size_t> transfer.device]['__tx_complete_callback'](global_callbacks[<size_t> transfer.device]['device'], np_buffer, transfer.buffer_length, transfer.valid_length, success)
+        callbacks = global_callbacks.get(<size_t> transfer.device)
+        if callbacks is not None and callbacks['__tx_complete_callback'] is not None:
+            callbacks['__tx_complete_callback'](callbacks['device'], np_buffer, transfer.buffer_length, transfer.valid_length, success)
 
 
 cdef void __tx_flush_callback(void *flush_ctx, int success) noexcept nogil:
@@ -255,8 +265,9 @@ cdef void __tx_flush_callback(void *flush_ctx, int success) noexcept nogil:
 
     with gil:
 
-        if global_callbacks[device_ptr]['__tx_flush_callback'] is not None:
-            global_callbacks[device_ptr]['__tx_flush_callback'](global_callbacks[device_ptr]['device'], success)
+        callbacks = global_callbacks.get(device_ptr)
+        if callbacks is not None and callbacks['__tx_flush_callback'] is not None:
+            callbacks['__tx_flush_callback'](callbacks['device'], success)
 
 
 IF ANDROID:
@@ -328,11 +339,12 @@ cdef class PyHackrfDevice:
         cdef int result
 
         if self.__hackrf_device is not NULL:
-            if <size_t> self.__hackrf_device in global_callbacks.keys():
-                global_callbacks.pop(<size_t> self.__hackrf_device)
+            with global_callbacks_lock:
+                global_callbacks.pop(<size_t> self.__hackrf_device, None)
 
-            with nogil:
-                result = chackrf.hackrf_close(self.__hackrf_device)
+            with open_close_lock:
+                with nogil:
+                    result = chackrf.hackrf_close(self.__hackrf_device)
             self.__hackrf_device = NULL
 
             raise_error('__dealloc__', result)
@@ -348,14 +360,15 @@ cdef class PyHackrfDevice:
         if self.__hackrf_device is not NULL:
             self.serialno = self.pyhackrf_serialno_read()
 
-            global_callbacks[<size_t> self.__hackrf_device] = {
-                '__rx_callback': None,
-                '__tx_callback': None,
-                '__sweep_callback': None,
-                '__tx_complete_callback': None,
-                '__tx_flush_callback': None,
-                'device': self,
-            }
+            with global_callbacks_lock:
+                global_callbacks[<size_t> self.__hackrf_device] = {
+                    '__rx_callback': None,
+                    '__tx_callback': None,
+                    '__sweep_callback': None,
+                    '__tx_complete_callback': None,
+                    '__tx_flush_callback': None,
+                    'device': self,
+                }
             return
 
         raise RuntimeError(f'_setup_device() failed: Device not initialized!')
@@ -365,11 +378,12 @@ cdef class PyHackrfDevice:
         cdef int result
 
         if self.__hackrf_device is not NULL:
-            if <size_t> self.__hackrf_device in global_callbacks.keys():
-                global_callbacks.pop(<size_t> self.__hackrf_device)
+            with global_callbacks_lock:
+                global_callbacks.pop(<size_t> self.__hackrf_device, None)
 
-            with nogil:
-                result = chackrf.hackrf_close(self.__hackrf_device)
+            with open_close_lock:
+                with nogil:
+                    result = chackrf.hackrf_close(self.__hackrf_device)
             self.__hackrf_device = NULL
             self.device_data.clear()
 
@@ -380,14 +394,18 @@ cdef class PyHackrfDevice:
         raise_error('pyhackrf_reset()', result)
 
     def pyhackrf_board_id_read(self) -> tuple[int, str]:
+        cdef int result
         cdef uint8_t value
-        result = chackrf.hackrf_board_id_read(self.__hackrf_device, &value)
+        with nogil:
+            result = chackrf.hackrf_board_id_read(self.__hackrf_device, &value)
         raise_error('pyhackrf_board_id_read()', result)
         return value, chackrf.hackrf_board_id_name(<chackrf.hackrf_board_id> value).decode('utf-8')
 
     def pyhackrf_board_rev_read(self) -> tuple[int, str]:
+        cdef int result
         cdef uint8_t value
-        result = chackrf.hackrf_board_rev_read(self.__hackrf_device, &value)
+        with nogil:
+            result = chackrf.hackrf_board_rev_read(self.__hackrf_device, &value)
         raise_error('pyhackrf_board_rev_read()', result)
         if value == chackrf.BOARD_REV_UNDETECTED:
             return value, 'Error: Hardware revision not yet detected by firmware.'
@@ -397,20 +415,26 @@ cdef class PyHackrfDevice:
             return value, chackrf.hackrf_board_rev_name(<chackrf.hackrf_board_rev>value).decode('utf-8')
 
     def pyhackrf_version_string_read(self) -> str:
+        cdef int result
         cdef char[255] version
-        result = chackrf.hackrf_version_string_read(self.__hackrf_device, version, 255)
+        with nogil:
+            result = chackrf.hackrf_version_string_read(self.__hackrf_device, version, 255)
         raise_error('pyhackrf_version_string_read()', result)
         return version.decode('utf-8')
 
     def pyhackrf_usb_api_version_read(self) -> str:
+        cdef int result
         cdef uint16_t version
-        result = chackrf.hackrf_usb_api_version_read(self.__hackrf_device, &version)
+        with nogil:
+            result = chackrf.hackrf_usb_api_version_read(self.__hackrf_device, &version)
         raise_error('pyhackrf_usb_api_version_read()', result)
         return 'API:{:x}.{:02x}'.format((version >> 8) & 0xFF, version & 0xFF)
 
     def pyhackrf_board_partid_serialno_read(self) -> tuple[tuple[int, int], tuple[int, int, int, int]]:
+        cdef int result
         cdef chackrf.read_partid_serialno_t read_partid_serialno
-        result = chackrf.hackrf_board_partid_serialno_read(self.__hackrf_device, &read_partid_serialno)
+        with nogil:
+            result = chackrf.hackrf_board_partid_serialno_read(self.__hackrf_device, &read_partid_serialno)
         raise_error('pyhackrf_board_partid_serialno_read()', result)
 
         return (
@@ -427,8 +451,10 @@ cdef class PyHackrfDevice:
         )
 
     def pyhackrf_serialno_read(self) -> str:
+        cdef int result
         cdef chackrf.read_partid_serialno_t read_partid_serialno
-        result = chackrf.hackrf_board_partid_serialno_read(self.__hackrf_device, &read_partid_serialno)
+        with nogil:
+            result = chackrf.hackrf_board_partid_serialno_read(self.__hackrf_device, &read_partid_serialno)
         raise_error('pyhackrf_serialno_read()', result)
 
         return '{0:08x}{1:08x}{2:08x}{3:08x}'.format(
@@ -678,35 +704,40 @@ cdef class PyHackrfDevice:
     # ---- python callbacks setters ---- #
     def set_rx_callback(self, rx_callback_function) -> None:
         if self.__hackrf_device is not NULL:
-            global_callbacks[<size_t> self.__hackrf_device]['__rx_callback'] = rx_callback_function
+            with global_callbacks_lock:
+                global_callbacks[<size_t> self.__hackrf_device]['__rx_callback'] = rx_callback_function
             return
 
         raise RuntimeError(f'set_rx_callback() failed: Device not initialized!')
 
     def set_tx_callback(self, tx_callback_function) -> None:
         if self.__hackrf_device is not NULL:
-            global_callbacks[<size_t> self.__hackrf_device]['__tx_callback'] = tx_callback_function
+            with global_callbacks_lock:
+                global_callbacks[<size_t> self.__hackrf_device]['__tx_callback'] = tx_callback_function
             return
 
         raise RuntimeError(f'set_tx_callback() failed: Device not initialized!')
 
     def set_sweep_callback(self, sweep_callback_function) -> None:
         if self.__hackrf_device is not NULL:
-            global_callbacks[<size_t> self.__hackrf_device]['__sweep_callback'] = sweep_callback_function
+            with global_callbacks_lock:
+                global_callbacks[<size_t> self.__hackrf_device]['__sweep_callback'] = sweep_callback_function
             return
 
         raise RuntimeError(f'set_sweep_callback() failed: Device not initialized!')
 
     def set_tx_complete_callback(self, tx_complete_callback_function) -> None:
         if self.__hackrf_device is not NULL:
-            global_callbacks[<size_t> self.__hackrf_device]['__tx_complete_callback'] = tx_complete_callback_function
+            with global_callbacks_lock:
+                global_callbacks[<size_t> self.__hackrf_device]['__tx_complete_callback'] = tx_complete_callback_function
             return
 
         raise RuntimeError(f'set_tx_complete_callback() failed: Device not initialized!')
 
     def set_tx_flush_callback(self, tx_flush_callback_function) -> None:
         if self.__hackrf_device is not NULL:
-            global_callbacks[<size_t> self.__hackrf_device]['__tx_flush_callback'] = tx_flush_callback_function
+            with global_callbacks_lock:
+                global_callbacks[<size_t> self.__hackrf_device]['__tx_flush_callback'] = tx_flush_callback_function
             return
 
         raise RuntimeError(f'set_tx_flush_callback() failed: Device not initialized!')
@@ -721,8 +752,12 @@ cdef class PyHackrfDevice:
     # ---- operacake ---- #
     def pyhackrf_get_operacake_boards(self) -> list:
         self.__pyoperacakes.clear()
+        cdef int result
         cdef uint8_t *operacakes = <uint8_t*> malloc(PY_HACKRF_OPERACAKE_MAX_BOARDS * sizeof(uint8_t))
-        result = chackrf.hackrf_get_operacake_boards(self.__hackrf_device, &operacakes[0])
+        with nogil:
+            result = chackrf.hackrf_get_operacake_boards(self.__hackrf_device, &operacakes[0])
+        if result != chackrf.hackrf_error.HACKRF_SUCCESS:
+            free(operacakes)
         raise_error('pyhackrf_get_operacake_boards()', result)
 
         for i in range(PY_HACKRF_OPERACAKE_MAX_BOARDS):
@@ -738,8 +773,11 @@ cdef class PyHackrfDevice:
         raise_error('pyhackrf_set_operacake_mode()', result)
 
     def pyhackrf_get_operacake_mode(self, address: int) -> py_operacake_switching_mode:
+        cdef int result
         cdef chackrf.operacake_switching_mode mode
-        result = chackrf.hackrf_get_operacake_mode(self.__hackrf_device, <uint8_t> address, &mode)
+        cdef uint8_t c_address = <uint8_t> address
+        with nogil:
+            result = chackrf.hackrf_get_operacake_mode(self.__hackrf_device, c_address, &mode)
         raise_error('pyhackrf_get_operacake_mode()', result)
         return py_operacake_switching_mode(mode)
 
@@ -805,10 +843,11 @@ def pyhackrf_device_list() -> PyHackRFDeviceList:
 
 def pyhackrf_device_list_open(pyhackrf_device_list: PyHackRFDeviceList, index: int) -> PyHackrfDevice | None:
     pyhackrf_device = PyHackrfDevice()
-    IF ANDROID:
-        result = chackrf.hackrf_open_on_android(pyhackrf_device_list.file_descriptors[index], pyhackrf_device.get_hackrf_device_double_ptr())
-    ELSE:
-        result = chackrf.hackrf_device_list_open(pyhackrf_device_list.get_hackrf_device_list_ptr(), index, pyhackrf_device.get_hackrf_device_double_ptr())
+    with open_close_lock:
+        IF ANDROID:
+            result = chackrf.hackrf_open_on_android(pyhackrf_device_list.file_descriptors[index], pyhackrf_device.get_hackrf_device_double_ptr())
+        ELSE:
+            result = chackrf.hackrf_device_list_open(pyhackrf_device_list.get_hackrf_device_list_ptr(), index, pyhackrf_device.get_hackrf_device_double_ptr())
 
     if result == chackrf.hackrf_error.HACKRF_SUCCESS:
         pyhackrf_device._setup_device()
@@ -822,9 +861,11 @@ def pyhackrf_open() -> PyHackrfDevice | None:
         result = chackrf.hackrf_error.HACKRF_ERROR_NOT_FOUND
         hackrf_device_list = get_hackrf_device_list(1)
         if len(hackrf_device_list):
-            result = chackrf.hackrf_open_on_android(hackrf_device_list[0][0], pyhackrf_device.get_hackrf_device_double_ptr())
+            with open_close_lock:
+                result = chackrf.hackrf_open_on_android(hackrf_device_list[0][0], pyhackrf_device.get_hackrf_device_double_ptr())
     ELSE:
-        result = chackrf.hackrf_open(pyhackrf_device.get_hackrf_device_double_ptr())
+        with open_close_lock:
+            result = chackrf.hackrf_open(pyhackrf_device.get_hackrf_device_double_ptr())
 
     raise_error('pyhackrf_open()', result)
     pyhackrf_device._setup_device()
@@ -834,6 +875,10 @@ def pyhackrf_open_by_serial(desired_serial_number: str) -> PyHackrfDevice | None
     if desired_serial_number in (None, ''):
         return pyhackrf_open()
 
+    cdef int result
+    cdef const char *c_serial_number
+    cdef chackrf.hackrf_device **hackrf_device_ptr
+
     pyhackrf_device = PyHackrfDevice()
     IF ANDROID:
         result = chackrf.hackrf_error.HACKRF_ERROR_NOT_FOUND
@@ -841,9 +886,15 @@ def pyhackrf_open_by_serial(desired_serial_number: str) -> PyHackrfDevice | None
         if len(hackrf_device_list):
             for file_descriptor, board_id, serial_number in hackrf_device_list:
                 if serial_number == desired_serial_number:
-                    result = chackrf.hackrf_open_on_android(file_descriptor, pyhackrf_device.get_hackrf_device_double_ptr())
+                    with open_close_lock:
+                        result = chackrf.hackrf_open_on_android(file_descriptor, pyhackrf_device.get_hackrf_device_double_ptr())
     ELSE:
-        result = chackrf.hackrf_open_by_serial(desired_serial_number.encode('utf-8'), pyhackrf_device.get_hackrf_device_double_ptr())
+        encoded_serial_number = desired_serial_number.encode('utf-8')
+        c_serial_number = <const char*> encoded_serial_number
+        hackrf_device_ptr = pyhackrf_device.get_hackrf_device_double_ptr()
+        with open_close_lock:
+            with nogil:
+                result = chackrf.hackrf_open_by_serial(c_serial_number, hackrf_device_ptr)
 
     raise_error('pyhackrf_open_by_serial()', result)
     pyhackrf_device._setup_device()
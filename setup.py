@@ -107,6 +107,13 @@ setup(  # type: ignore
             extra_compile_args=['-w'],
             language='c++',
         ),
+        Extension(  # type: ignore
+            name='python_hackrf.pyhackrf_tools.kernels',
+            sources=['python_hackrf/pyhackrf_tools/kernels.pyx'],
+            include_dirs=['python_hackrf/pyhackrf_tools', numpy.get_include()],
+            extra_compile_args=['-w'],
+            language='c++',
+        ),
         Extension(  # type: ignore
             name='python_hackrf.pyhackrf_tools.pyhackrf_sweep',
             sources=['python_hackrf/pyhackrf_tools/pyhackrf_sweep.pyx'],